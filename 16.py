@@ -1,31 +1,85 @@
 # Import necessary modules
 import pypsn
-from flask import Flask, render_template, render_template_string, request, jsonify
-from threading import Thread, Event
+from pypsn.recorder import psn_recorder
+from pypsn.player import psn_recording, psn_player
+from pypsn.history import psn_tracker_history
+from pypsn.sacn_bridge import psn_sacn_bridge, load_patch
+from pypsn.stats import psn_receive_stats
+from pypsn.quarantine import psn_quarantine
+from pypsn.metrics import psn_metrics, psn_metric_family, receive_stats_families, sacn_sender_families, ingest_pool_families, quarantine_families
+from pypsn.logs import setup_logging
+from pypsn.state import psn_state_table, psn_state_view
+from pypsn.shm import psn_ingest_receiver
+from pypsn.workers import psn_worker_pool
+import sacn
+from flask import Flask, Response, render_template, render_template_string, request, jsonify
+from threading import Thread, Event, Lock
+from concurrent.futures import ThreadPoolExecutor
 import time
 from datetime import datetime
 import json
 import os
 from werkzeug.serving import make_server
+from markupsafe import Markup
 import subprocess
 import re
+import uuid
+import logging
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Dictionary to store system information keyed by source IP
-systems_info = {}
-stale_systems = {}
-trackers_list = {}
-stale_trackers = {}
+# System information keyed by source IP and tracker information keyed by "<ip>_<id>";
+# the receiver and cleaner write, readers refresh a shared view with only what changed
+systems_state = psn_state_table()
+trackers_state = psn_state_table()
+state_views = (psn_state_view(systems_state), psn_state_view(trackers_state))
+state_views_lock = Lock()
+# Bounded position/speed/orientation history per tracker key
+tracker_history = psn_tracker_history()
+# Rendered <tr> per tracker key, stored with the tracker_info it was rendered from
+tracker_row_cache = {}
+
+# Background network configuration jobs keyed by job id, run one at a time
+network_jobs = {}
+network_job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='network-config')
+latest_network_job_id = None
+max_network_jobs = 20
+
+# Prometheus metrics; the counters are sharded per thread so the receive path never waits on a lock
+metrics = psn_metrics()
+callback_packets = metrics.counter('psn_callback_packets_total', 'PSN packets handled by the monitor callback', ('kind',))
+trackers_expired = metrics.counter('psn_trackers_expired_total', 'Trackers moved to stale after not being updated')
+systems_expired = metrics.counter('psn_systems_expired_total', 'Systems moved to stale after not sending info')
 
 # Default settings
 default_config = {
     'log_info': False,
     'log_debug': False,
+    'log_format': 'text',  # 'text' or 'json' (one object per line)
+    'log_rate_limit': 1,  # log messages per second allowed per message key, 0 to only allow the burst
+    'log_burst': 5,  # messages per key let through before rate limiting starts
+    'log_sample_every': 1,  # only consider every Nth message per key
+    'log_queue_size': 10000,  # queued log records before new ones are dropped
     'page_auto_refresh_rate': 1,  # in seconds
     'system_info_cleanup_duration': 3,  # in seconds
     'trackers_cleanup_duration': 1,  # in seconds
+    'recording_path': '',  # strftime pattern for raw PSN recordings, empty to disable
+    'replay_path': '',  # play this recording instead of listening on the network
+    'replay_speed': 1,  # replay speed multiplier, 0 for as fast as possible
+    'server_mode': 'waitress',  # 'waitress' (production server, falls back to 'threaded' without the waitress package), 'threaded' or 'dev' (single-threaded); both werkzeug modes are development servers
+    'server_threads': 8,  # worker threads for the waitress server
+    'sacn_bridge_patch': '',  # JSON fixture patch for the PSN-to-sACN bridge, empty to disable
+    'sacn_bind_address': '0.0.0.0',  # interface the bridge sends sACN from
+    'sacn_interfaces': [],  # IP addresses of the NICs (e.g. eth0 and eth1) the bridge sends every universe on, empty for sacn_bind_address only
+    'ingest_mode': 'thread',  # 'thread', 'process' (shared-memory table) or 'reuseport' (SO_REUSEPORT worker pool)
+    'ingest_interfaces': ['0.0.0.0'],  # process/reuseport mode: one group of processes per interface address
+    'ingest_processes': 2,  # process/reuseport mode: processes per interface, PSN sources are split between them
+    'ingest_group': '236.10.10.10',  # reuseport mode: multicast group, empty to receive unicast PSN
+    'ingest_table_rows': 4096,  # process mode: tracker rows per ingest process
+    'ingest_poll_interval': 0.02,  # process mode: seconds between reads of the shared tracker table
+    'latency_stats': True,  # per-stage receive latency histograms, served at /api/latency
+    'tracker_fields': ['pos', 'speed', 'ori', 'accel', 'trgtpos', 'status'],  # PSN tracker fields decoded, stored and shown
     'eth0': {
         'method': 'dhcp',
         'ip_address': '',
@@ -38,8 +92,8 @@ default_config = {
     }
 }
 
-# Load or create config file
-config_file = 'config.json'
+# Load or create config file, PSN_MONITOR_CONFIG points the monitor at another one (benchmarks, tests)
+config_file = os.environ.get('PSN_MONITOR_CONFIG', 'config.json')
 if os.path.exists(config_file):
     with open(config_file, 'r') as file:
         config = json.load(file)
@@ -54,12 +108,59 @@ config = {**default_config, **config}
 # Apply settings from config file
 log_info = config['log_info']
 log_debug = config['log_debug']
+log_format = config['log_format']
+log_rate_limit = config['log_rate_limit']
+log_burst = config['log_burst']
+log_sample_every = config['log_sample_every']
+log_queue_size = config['log_queue_size']
 page_auto_refresh_rate = config['page_auto_refresh_rate']
 system_info_cleanup_duration = config['system_info_cleanup_duration']
 trackers_cleanup_duration = config['trackers_cleanup_duration']
+recording_path = config['recording_path']
+replay_path = config['replay_path']
+replay_speed = config['replay_speed']
+server_mode = config['server_mode']
+server_threads = config['server_threads']
+sacn_bridge_patch = config['sacn_bridge_patch']
+sacn_bind_address = config['sacn_bind_address']
+sacn_interfaces = config['sacn_interfaces']
+latency_stats = config['latency_stats']
+ingest_mode = config['ingest_mode']
+ingest_interfaces = config['ingest_interfaces']
+ingest_processes = config['ingest_processes']
+ingest_table_rows = config['ingest_table_rows']
+ingest_group = config['ingest_group']
+ingest_poll_interval = config['ingest_poll_interval']
+tracker_fields = config['tracker_fields']
 eth0_config = config['eth0']
 eth1_config = config['eth1']
 
+# Only the configured tracker fields are decoded by the receiver, stored and shown in the tracker tables
+# (the sACN bridge aims at tracker positions, so it always gets them)
+tracker_field_mask = pypsn.tracker_field_mask(tracker_fields + (['pos'] if sacn_bridge_patch else []))
+tracker_vector_fields = [field for field in ('pos', 'speed', 'ori', 'accel', 'trgtpos') if field in tracker_fields]
+tracker_field_labels = {'pos': 'Pos', 'speed': 'Speed', 'ori': 'Ori', 'accel': 'Accel', 'trgtpos': 'Target Pos'}
+tracker_columns = [('src_ip', 'Source IP'), ('system_name', 'Server Name'), ('tracker_id', 'Tracker ID'), ('tracker_name', 'Tracker Name')]
+for field in tracker_vector_fields:
+    tracker_columns += [(f'{field}_{axis}', f'{tracker_field_labels[field]} {axis.upper()}') for axis in 'xyz']
+if 'status' in tracker_fields:
+    tracker_columns.append(('status', 'Status'))
+tracker_columns.append(('timestamp', 'Timestamp'))
+
+# Define a function to derive the logger levels from the log_info and log_debug switches, so records
+# nobody asked for (e.g. werkzeug or sacn debug output) are dropped before they reach the rate-limit filter
+def apply_log_level():
+    level = logging.DEBUG if log_debug else logging.INFO if log_info else logging.WARNING
+    log_pipeline.logger.setLevel(level)
+    # The monitor's own info messages (e.g. the startup steps) are always shown, like the prints they replaced
+    logger.setLevel(min(level, logging.INFO))
+
+# Log through a queue so a slow console never blocks the receiver
+log_pipeline = setup_logging(logging.WARNING, json_format=(log_format == 'json'), rate=log_rate_limit,
+                             burst=log_burst, sample_every=log_sample_every, queue_size=log_queue_size)
+logger = logging.getLogger('psn_monitor')
+apply_log_level()
+
 # Define a function to convert bytes to string
 def bytes_to_str(b):
     return b.decode('utf-8') if isinstance(b, bytes) else b
@@ -161,16 +262,50 @@ def apply_ip_settings(interface, settings):
 # Apply IP settings on startup
 def apply_ip_settings_on_startup():
     global eth0_config, eth1_config, eth0_apply_result, eth1_apply_result
-    print("Applying eth0 IP settings...")
+    logger.info("Applying eth0 IP settings...")
     eth0_apply_result = apply_ip_settings('eth0', eth0_config)
-    print(f"eth0 apply result: {eth0_apply_result}")
+    logger.info("eth0 apply result: %s", eth0_apply_result)
 
-    print("Applying eth1 IP settings...")
+    logger.info("Applying eth1 IP settings...")
     eth1_apply_result = apply_ip_settings('eth1', eth1_config)
-    print(f"eth1 apply result: {eth1_apply_result}")
+    logger.info("eth1 apply result: %s", eth1_apply_result)
 
 apply_ip_settings_on_startup()
 
+# Define a function that applies IP settings for both interfaces as a background job
+def run_network_job(job_id, eth0_settings, eth1_settings):
+    job = network_jobs[job_id]
+    job['status'] = 'running'
+    try:
+        job['eth0'] = apply_ip_settings('eth0', eth0_settings)
+        job['eth1'] = apply_ip_settings('eth1', eth1_settings)
+        job['status'] = 'done'
+    except Exception as e:
+        job['error'] = str(e)
+        job['status'] = 'failed'
+    job['finished'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+# Define a function to queue a network configuration job and return its id
+def submit_network_job():
+    global latest_network_job_id
+    job_id = uuid.uuid4().hex[:12]
+    network_jobs[job_id] = {
+        'id': job_id,
+        'status': 'pending',
+        'submitted': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'finished': '',
+        'eth0': '',
+        'eth1': '',
+        'error': ''
+    }
+    # Forget the oldest finished jobs
+    for old_job_id in list(network_jobs)[:-max_network_jobs]:
+        if network_jobs[old_job_id]['status'] in ('done', 'failed'):
+            del network_jobs[old_job_id]
+    latest_network_job_id = job_id
+    network_job_executor.submit(run_network_job, job_id, dict(eth0_config), dict(eth1_config))
+    return job_id
+
 # Check if the network interface is available
 def is_interface_available(interface):
     try:
@@ -181,10 +316,15 @@ def is_interface_available(interface):
 
 # Define a callback function to handle the received PSN data
 def callback_function(data):
-    global systems_info, trackers_list, stale_trackers, stale_systems
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    now = time.time()
+
+    # Drive the moving heads first, they are more latency sensitive than the web page
+    if sacn_bridge is not None:
+        sacn_bridge.on_psn_data(data)
     
     if isinstance(data, pypsn.psn_info_packet):
+        callback_packets.labels('info').inc()
         info = data.info
         ip_address = info.src_ip if hasattr(info, 'src_ip') else 'N/A'
         
@@ -203,27 +343,28 @@ def callback_function(data):
             },
             'tracker_count': len(data.trackers)
         }
-        systems_info[ip_address] = system_info
-
-        if ip_address in stale_systems:
-            del stale_systems[ip_address]
+        # Putting an entry also brings it back from stale
+        systems_state.put(ip_address, system_info)
         
         if log_info:
-            print(f"Received system info from {ip_address} at {timestamp}")
+            logger.info("Received system info from %s", ip_address,
+                        extra={'key': ('system_info', ip_address), 'src_ip': ip_address, 'frame_id': info.frame_id})
     
     elif isinstance(data, pypsn.psn_data_packet):
+        callback_packets.labels('data').inc()
         if data.trackers:
             ip_address = data.trackers[0].src_ip
         else:
             ip_address = 'N/A'
-       # print(systems_info)
-        if ip_address in systems_info:
-            system_trackers = systems_info[ip_address].get('trackers', {})
-            system_name = systems_info[ip_address].get('server_name', 'Unknown')
+        system = systems_state.get(ip_address)
+        if system is not None:
+            system_trackers = system.get('trackers', {})
+            system_name = system.get('server_name', 'Unknown')
         else:
             system_trackers = {}
             system_name = 'Unknown'
 
+        updates = []
         for tracker in data.trackers:
             tracker_key = f"{tracker.src_ip}_{tracker.id}"  # Unique key combining IP and tracker ID
             tracker_name = system_trackers.get(tracker.id, 'Unknown')
@@ -231,89 +372,202 @@ def callback_function(data):
                 'tracker_id': tracker.id,
                 'src_ip': tracker.src_ip,
                 'timestamp': timestamp,
-                'pos_x': round(tracker.pos.x, 3),
-                'pos_y': round(tracker.pos.y, 3),
-                'pos_z': round(tracker.pos.z, 3),
                 'tracker_name': tracker_name,
                 'system_name': system_name,
-                'speed_x': round(tracker.speed.x, 3) if hasattr(tracker.speed, 'x') else 'N/A',
-                'speed_y': round(tracker.speed.y, 3) if hasattr(tracker.speed, 'y') else 'N/A',
-                'speed_z': round(tracker.speed.z, 3) if hasattr(tracker.speed, 'z') else 'N/A',
-                'ori_x': round(tracker.ori.x, 3) if hasattr(tracker.ori, 'x') else 'N/A',
-                'ori_y': round(tracker.ori.y, 3) if hasattr(tracker.ori, 'y') else 'N/A',
-                'ori_z': round(tracker.ori.z, 3) if hasattr(tracker.ori, 'z') else 'N/A',
-                'accel_x': round(tracker.accel.x, 3) if hasattr(tracker.accel, 'x') else 'N/A',
-                'accel_y': round(tracker.accel.y, 3) if hasattr(tracker.accel, 'y') else 'N/A',
-                'accel_z': round(tracker.accel.z, 3) if hasattr(tracker.accel, 'z') else 'N/A',
-                'trgtpos_x': round(tracker.trgtpos.x, 3) if hasattr(tracker.trgtpos, 'x') else 'N/A',
-                'trgtpos_y': round(tracker.trgtpos.y, 3) if hasattr(tracker.trgtpos, 'y') else 'N/A',
-                'trgtpos_z': round(tracker.trgtpos.z, 3) if hasattr(tracker.trgtpos, 'z') else 'N/A',
-                'status': tracker.status if hasattr(tracker, 'status') else 'N/A'
             }
-            trackers_list[tracker_key] = tracker_info
-
-            # Remove the tracker from stale_trackers if it is being updated
-            if tracker_key in stale_trackers:
-                del stale_trackers[tracker_key]
+            for field in tracker_vector_fields:
+                vector = getattr(tracker, field)
+                if vector is not None:
+                    tracker_info[f'{field}_x'] = round(vector.x, 3)
+                    tracker_info[f'{field}_y'] = round(vector.y, 3)
+                    tracker_info[f'{field}_z'] = round(vector.z, 3)
+                else:
+                    tracker_info[f'{field}_x'] = tracker_info[f'{field}_y'] = tracker_info[f'{field}_z'] = 'N/A'
+            if 'status' in tracker_fields:
+                tracker_info['status'] = tracker.status
+            updates.append((tracker_key, tracker_info))
+            tracker_history.append(tracker_key, now, tracker.pos, tracker.speed, tracker.ori)
+
+        trackers_state.put_many(updates)
 
         if log_info:
-            print(f"Received tracker data from {ip_address} at {timestamp}")
+            logger.info("Received tracker data from %s", ip_address,
+                        extra={'key': ('tracker_data', ip_address), 'src_ip': ip_address, 'trackers': len(updates)})
+
+# Create the PSN-to-sACN bridge if a fixture patch is configured
+sacn_bridge = None
+sacn_sender = None
+if sacn_bridge_patch:
+    sacn_sender = sacn.sACNsender(bind_address=sacn_bind_address, source_name='PSN bridge', interfaces=sacn_interfaces)
+    sacn_bridge = psn_sacn_bridge(load_patch(sacn_bridge_patch), sacn_sender)
+    for universe in sacn_bridge.universes:
+        sacn_sender[universe].multicast = True
+
+# Create the packet recorder if recording is enabled in the config
+recorder = None
+if recording_path:
+    recorder = psn_recorder(datetime.now().strftime(recording_path))
+
+# Receive latency and per-source rate statistics, if enabled in the config
+receive_stats = psn_receive_stats() if latency_stats else None
+
+if receive_stats is not None:
+    metrics.register(lambda: receive_stats_families(receive_stats))
+
+# Malformed packets are dropped by the receiver, counted by reason and the last few kept for /api/quarantine
+packet_quarantine = psn_quarantine()
+metrics.register(lambda: quarantine_families(packet_quarantine))
+if sacn_sender is not None:
+    metrics.register(lambda: sacn_sender_families(sacn_sender))
 
 # Create a receiver object with the callback function
-if is_interface_available('eth0') or is_interface_available('eth1'):
-    receiver = pypsn.receiver(callback_function)
+if replay_path:
+    receiver = psn_player(psn_recording(replay_path), callback_function, speed=replay_speed, fields=tracker_field_mask,
+                          quarantine=packet_quarantine)
+elif ingest_mode == 'process':
+    # The ingest processes own the sockets, so the recorder and latency stats only apply to thread mode;
+    # the same goes for the reuseport worker pool below
+    receiver = psn_ingest_receiver(callback_function, ingest_interfaces, ingest_processes,
+                                   rows_per_shard=ingest_table_rows, poll_interval=ingest_poll_interval,
+                                   fields=tracker_field_mask, quarantine=packet_quarantine)
+elif ingest_mode == 'reuseport':
+    receiver = psn_worker_pool(callback_function, ingest_interfaces, ingest_processes, mcast_grp=ingest_group or None,
+                               fields=tracker_field_mask, quarantine=packet_quarantine)
+elif is_interface_available('eth0') or is_interface_available('eth1'):
+    receiver = pypsn.receiver(callback_function, recorder=recorder, stats=receive_stats, fields=tracker_field_mask,
+                              quarantine=packet_quarantine)
 else:
-    print("Network interfaces eth0 or eth1 not available.")
+    logger.warning("Network interfaces eth0 or eth1 not available.")
+
+if ingest_mode == 'process' and not replay_path:
+    metrics.register(lambda: ingest_pool_families(receiver.pool))
 
 # Function to clean up stale entries
 def clean_stale_entries(stop_event):
-    global systems_info, stale_systems, trackers_list, stale_trackers, system_info_cleanup_duration, trackers_cleanup_duration
     while not stop_event.is_set():
-        current_time = datetime.now()
-        systems_to_delete = []
-        trackers_to_delete = []
-
-        # Clean up systems_info
-        for ip, system in systems_info.items():
-            system_timestamp = datetime.strptime(system['timestamp'], '%Y-%m-%d %H:%M:%S')
-            if (current_time - system_timestamp).total_seconds() > system_info_cleanup_duration:
-                systems_to_delete.append(ip)
-
-        for ip in systems_to_delete:
-            stale_systems[ip] = systems_info[ip]
-            del systems_info[ip]
-
-        # Clean up trackers_list
-        for tracker_key, tracker in trackers_list.items():
-            tracker_timestamp = datetime.strptime(tracker['timestamp'], '%Y-%m-%d %H:%M:%S')
-            if (current_time - tracker_timestamp).total_seconds() > trackers_cleanup_duration:
-                trackers_to_delete.append(tracker_key)
-
-        for tracker_key in trackers_to_delete:
-            stale_trackers[tracker_key] = trackers_list[tracker_key]
-            del trackers_list[tracker_key]
-
+        # Entries are checked by monotonic last-seen time, oldest first, so only expiring entries cost anything
+        expired_systems = systems_state.expire(system_info_cleanup_duration)
+        expired_trackers = trackers_state.expire(trackers_cleanup_duration)
+        systems_expired.inc(len(expired_systems))
+        trackers_expired.inc(len(expired_trackers))
+        # Free the history rings of trackers that stopped sending once their whole history is older
+        # than the longest ring reaches back; until then it can still be queried
+        tracker_history.expire(time.time())
+
+        # Log a summary instead of the tables themselves, dumping them scales with the tracker count
         if log_debug:
-            print(f"Cleaned systems_info: {systems_info}")  # Debug print
-            print(f"Cleaned trackers_list: {trackers_list}")  # Debug print
-            print(f"Stale trackers: {stale_trackers}")  # Debug print
-            print(f"Stale systems: {stale_systems}")  # Debug print
+            logger.debug("Cleanup: %d active / %d stale systems, %d active / %d stale trackers",
+                         systems_state.active_count, systems_state.stale_count,
+                         trackers_state.active_count, trackers_state.stale_count,
+                         extra={'expired_systems': expired_systems, 'expired_trackers': expired_trackers})
 
         stop_event.wait(1)  # Run cleanup every second
 
+# Define a function to render tracker table rows, only re-rendering rows whose data changed
+def render_tracker_rows(trackers):
+    row_template = app.jinja_env.get_template('tracker_row.html')
+    rows = []
+    for tracker_key, tracker in trackers:
+        cached = tracker_row_cache.get(tracker_key)
+        if cached is None or (cached[0] is not tracker and cached[0] != tracker):
+            cached = (tracker, row_template.render(tracker=tracker, tracker_columns=tracker_columns))
+            tracker_row_cache[tracker_key] = cached
+        rows.append(cached[1])
+    return Markup(''.join(rows))
+
+# Define a function bringing the shared views of the system and tracker tables up to date; the threaded server
+# starts a thread per request, so one view per thread would copy the whole table on every request.
+# Call with state_views_lock held and copy what is needed before releasing it
+def state_snapshot():
+    for view in state_views:
+        view.refresh()
+    return state_views
+
 @app.route('/trackers', methods=['GET'])
 def combined_info():
-    sorted_systems_info = dict(sorted(systems_info.items()))
-    sorted_stale_systems_info = dict(sorted(stale_systems.items()))
-    sorted_trackers_list = list(trackers_list.values())
-    sorted_stale_trackers_list = list(stale_trackers.values())
+    with state_views_lock:
+        systems_view, trackers_view = state_snapshot()
+        sorted_systems_info = dict(sorted(systems_view.active.items()))
+        sorted_stale_systems_info = dict(sorted(systems_view.stale.items()))
+        sorted_trackers_list = sorted(trackers_view.active.items())
+        sorted_stale_trackers_list = sorted(trackers_view.stale.items())
+
+    tracker_rows = render_tracker_rows(sorted_trackers_list)
+    stale_tracker_rows = render_tracker_rows(sorted_stale_trackers_list)
+
+    # Drop cached rows of trackers that are gone from both tables
+    if len(tracker_row_cache) > len(sorted_trackers_list) + len(sorted_stale_trackers_list):
+        known_keys = {key for key, _ in sorted_trackers_list} | {key for key, _ in sorted_stale_trackers_list}
+        for tracker_key in [key for key in list(tracker_row_cache) if key not in known_keys]:
+            tracker_row_cache.pop(tracker_key, None)
 
     # Render the HTML template file with the sorted data
     return render_template('trackers.html', 
                            sorted_systems_info=sorted_systems_info, 
                            sorted_stale_systems_info=sorted_stale_systems_info, 
-                           sorted_trackers_list=sorted_trackers_list, 
-                           sorted_stale_trackers_list=sorted_stale_trackers_list)
+                           tracker_columns=tracker_columns,
+                           tracker_rows=tracker_rows, 
+                           stale_tracker_rows=stale_tracker_rows)
+
+# Define route to query a tracker's history; negative from/to are seconds relative to now
+@app.route('/api/trackers/<tracker_key>/history', methods=['GET'])
+def tracker_history_info(tracker_key):
+    now = time.time()
+    try:
+        t_from = float(request.args.get('from', -10))
+        t_to = float(request.args.get('to', 0))
+    except ValueError:
+        return jsonify({'error': 'from and to must be numbers'}), 400
+    if t_from <= 0:
+        t_from += now
+    if t_to <= 0:
+        t_to += now
+    try:
+        history = tracker_history.query_dict(tracker_key, t_from, t_to, request.args.get('res'))
+    except KeyError:
+        return jsonify({'error': f'No history for tracker {tracker_key}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(history)
+
+# Define a function to collect the current tracker and system counts for /metrics
+@metrics.register
+def state_families():
+    trackers = psn_metric_family('psn_trackers', 'gauge', 'Trackers currently shown, by state')
+    systems = psn_metric_family('psn_systems', 'gauge', 'Systems currently shown, by state')
+    trackers.add({'state': 'active'}, trackers_state.active_count).add({'state': 'stale'}, trackers_state.stale_count)
+    systems.add({'state': 'active'}, systems_state.active_count).add({'state': 'stale'}, systems_state.stale_count)
+    return [trackers, systems]
+
+# Define a function to report what the logging pipeline had to throw away
+@metrics.register
+def logging_families():
+    dropped = psn_metric_family('psn_log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full')
+    suppressed = psn_metric_family('psn_log_records_suppressed_total', 'counter', 'Log records suppressed by rate limiting or sampling')
+    return [dropped.add({}, log_pipeline.dropped), suppressed.add({}, log_pipeline.suppressed)]
+
+# Define route to expose runtime statistics in the Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics_info():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Define route to report receive latency histograms; ?reset=1 starts a new measurement window
+@app.route('/api/latency', methods=['GET'])
+def latency_info():
+    if receive_stats is None:
+        return jsonify({'error': 'Latency statistics are disabled'}), 404
+    snapshot = receive_stats.snapshot()
+    if request.args.get('reset') in ('1', 'true'):
+        receive_stats.reset()
+    return jsonify(snapshot)
+
+# Define route to report rejected packets by reason with the last few samples; ?reset=1 clears them
+@app.route('/api/quarantine', methods=['GET'])
+def quarantine_info():
+    snapshot = packet_quarantine.snapshot()
+    if request.args.get('reset') in ('1', 'true'):
+        packet_quarantine.reset()
+    return jsonify(snapshot)
 
 # Define route to display the main page with logging controls and frames
 @app.route('/', methods=['GET', 'POST'])
@@ -323,6 +577,7 @@ def display_info():
     if request.method == 'POST':
         log_info = 'log_info' in request.form
         log_debug = 'log_debug' in request.form
+        apply_log_level()
         page_auto_refresh_rate = int(request.form.get('page_auto_refresh_rate', 5))
         system_info_cleanup_duration = int(request.form.get('system_info_cleanup_duration', 10))
         trackers_cleanup_duration = int(request.form.get('trackers_cleanup_duration', 5))
@@ -348,13 +603,10 @@ def display_info():
         with open(config_file, 'w') as file:
             json.dump(config, file)
 
-        # Apply IP settings immediately after updating the config
-        global eth0_apply_result, eth1_apply_result
-        eth0_apply_result = apply_ip_settings('eth0', eth0_config)
-        eth1_apply_result = apply_ip_settings('eth1', eth1_config)
-    else:
-        eth0_apply_result = ''
-        eth1_apply_result = ''
+        # Apply IP settings in the background, the status is polled from /api/jobs/<job_id>
+        submit_network_job()
+
+    network_job = network_jobs.get(latest_network_job_id, {})
 
     current_ip_eth0, current_netmask_eth0 = get_ip_settings('eth0')
     current_ip_eth1, current_netmask_eth1 = get_ip_settings('eth1')
@@ -425,8 +677,28 @@ def display_info():
         <h1>Combined Information</h1>
         <iframe id="trackerFrame" src="/trackers" width="100%" onload="resizeIframe()"></iframe>
         <h2>Apply IP Settings Status</h2>
-        <p>eth0: {{ eth0_apply_result }}</p>
-        <p>eth1: {{ eth1_apply_result }}</p>
+        <p>Job: <span id="job_status">{{ network_job.get('status', '') }}</span></p>
+        <p>eth0: <span id="job_eth0">{{ network_job.get('eth0', '') }}</span></p>
+        <p>eth1: <span id="job_eth1">{{ network_job.get('eth1', '') }}</span></p>
+        <p id="job_error">{{ network_job.get('error', '') }}</p>
+        <script>
+            function pollNetworkJob(jobId) {
+                fetch('/api/jobs/' + jobId).then(function (response) {
+                    return response.json();
+                }).then(function (job) {
+                    document.getElementById('job_status').textContent = job.status;
+                    document.getElementById('job_eth0').textContent = job.eth0;
+                    document.getElementById('job_eth1').textContent = job.eth1;
+                    document.getElementById('job_error').textContent = job.error;
+                    if (job.status === 'pending' || job.status === 'running') {
+                        setTimeout(function () { pollNetworkJob(jobId); }, 1000);
+                    }
+                });
+            }
+            {% if network_job.get('status') in ('pending', 'running') %}
+            pollNetworkJob('{{ network_job.id }}');
+            {% endif %}
+        </script>
     </body>
     </html>
     """
@@ -444,10 +716,17 @@ def display_info():
         current_netmask_eth0=current_netmask_eth0,
         current_ip_eth1=current_ip_eth1,
         current_netmask_eth1=current_netmask_eth1,
-        eth0_apply_result=eth0_apply_result,
-        eth1_apply_result=eth1_apply_result
+        network_job=network_job
     )
 
+# Define route to report the status of a background network configuration job
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def network_job_status(job_id):
+    job = network_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job)
+
 @app.route('/update_ip', methods=['POST'])
 def update_ip():
     eth0_method = request.form['eth0_method']
@@ -463,27 +742,58 @@ def update_ip():
     return jsonify({'result_eth0': result_eth0, 'result_eth1': result_eth1})
 
 # Function to run Flask app
+# 'waitress' is the production server with a fixed worker pool (needs the waitress package),
+# 'threaded' serves every request on its own thread and 'dev' is the old single-threaded
+# server; both of these are werkzeug's development server
 class ServerThread(Thread):
-    def __init__(self, app):
+    def __init__(self, app, mode='waitress', threads=8):
         Thread.__init__(self)
-        self.server = make_server('0.0.0.0', 5002, app)
+        if mode == 'waitress':
+            try:
+                from waitress.server import create_server
+            except ImportError:
+                logger.warning("waitress is not installed, falling back to the werkzeug development server; "
+                               "install waitress to serve the monitor in production")
+                mode = 'threaded'
+        self.mode = mode
+        if mode == 'waitress':
+            self.server = create_server(app, host='0.0.0.0', port=5002, threads=threads)
+        else:
+            self.server = make_server('0.0.0.0', 5002, app, threaded=(mode != 'dev'))
         self.ctx = app.app_context()
         self.ctx.push()
 
     def run(self):
-        print("Starting Flask server...")
-        self.server.serve_forever()
+        logger.info("Starting Flask server (%s)...", self.mode)
+        if self.mode == 'waitress':
+            self.server.run()
+        else:
+            self.server.serve_forever()
 
     def shutdown(self):
-        self.server.shutdown()
+        if self.mode == 'waitress':
+            self.server.close()
+        else:
+            self.server.shutdown()
 
 # Start the receiver and Flask server in separate threads
 if __name__ == '__main__':
     try:
         stop_event = Event()
 
+        # Start the recorder's writer thread before packets arrive
+        if recorder is not None:
+            logger.info("Recording PSN packets to %s", recorder.path)
+            recorder.start()
+
+        # Start the sACN sender used by the bridge
+        if sacn_sender is not None:
+            logger.info("Bridging %d fixtures to sACN universes %s", len(sacn_bridge.fixtures), sacn_bridge.universes)
+            sacn_sender.start()
+            sacn_bridge.start()
+
         # Start the receiver
-        print("Starting PSN receiver...")
+        logger.info("Starting PSN receiver...")
         receiver_thread = Thread(target=receiver.start)
         receiver_thread.start()
 
@@ -492,14 +802,14 @@ if __name__ == '__main__':
         cleaner_thread.start()
 
         # Start Flask server
-        server_thread = ServerThread(app)
+        server_thread = ServerThread(app, server_mode, server_threads)
         server_thread.start()
 
         # Keep the main thread alive
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        print("Stopping receiver, cleaner, and Flask server...")
+        logger.info("Stopping receiver, cleaner, and Flask server...")
 
         # Signal the cleaner thread to stop
         stop_event.set()
@@ -507,12 +817,23 @@ if __name__ == '__main__':
         # Stop the receiver
         receiver.stop()
 
-        # Stop Flask server
+        # Stop the sACN sender
+        if sacn_sender is not None:
+            sacn_bridge.stop()
+            sacn_sender.stop()
+
+        # Flush and close the recording
+        if recorder is not None:
+            recorder.stop()
+
+        # Stop Flask server and drop queued network jobs
         server_thread.shutdown()
+        network_job_executor.shutdown(wait=False, cancel_futures=True)
 
         # Wait for threads to finish
         receiver_thread.join()
         cleaner_thread.join()
         server_thread.join()
 
-        print("Stopped.")
+        logger.info("Stopped.")
+        log_pipeline.stop()
@@ -0,0 +1,274 @@
+#!/bin/env python3
+
+# End-to-end benchmark suite for the PSN monitor on synthetic traffic, no tracking
+# hardware needed. For every tracker count it measures:
+#
+#   parse    parse_psn_packet throughput on generated frames
+#   e2e      frames per second from a loopback multicast socket through pypsn.receiver
+#            into the monitor callback; closed loop, the next frame is only sent once
+#            the previous one was handled, so nothing is lost to socket buffers
+#   cleanup  one cleaner pass over the tracker table, with nothing and with everything
+#            expiring
+#   render   serving /trackers, the first time and after 10% of the trackers moved
+#
+# Frames are split over as many packets as the MTU requires, like a real server does.
+# The monitor (16.py) is loaded with a throwaway config that leaves the network
+# interfaces alone. Results are written as JSON.
+#
+#   python benchmarks/psn_suite.py --trackers 10 100 1000 5000 --output psn_suite.json
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pypsn  # noqa: E402
+from pypsn.generator import DEFAULT_FIELDS, psn_generator, psn_server_stream  # noqa: E402
+
+PSN_MCAST_GRP = "236.10.10.10"
+
+
+def load_monitor():
+    # import 16.py as a module with a config that skips the IP setup and the extras
+    config = {
+        "eth0": {"method": "none", "ip_address": "", "netmask": ""},
+        "eth1": {"method": "none", "ip_address": "", "netmask": ""},
+        "log_info": False,
+        "log_debug": False,
+        "recording_path": "",
+        "replay_path": "",
+        "sacn_bridge_patch": "",
+        "ingest_mode": "thread",
+        "latency_stats": False,
+    }
+    handle, path = tempfile.mkstemp(suffix=".json", prefix="psn_suite_")
+    with os.fdopen(handle, "w") as file:
+        json.dump(config, file)
+    os.environ["PSN_MONITOR_CONFIG"] = path
+    try:
+        spec = importlib.util.spec_from_file_location("psn_monitor", os.path.join(ROOT, "16.py"))
+        monitor = importlib.util.module_from_spec(spec)
+        sys.modules["psn_monitor"] = monitor  # Flask finds templates relative to the module
+        spec.loader.exec_module(monitor)
+    finally:
+        os.unlink(path)
+    return monitor
+
+
+def reset_monitor(monitor):
+    monitor.systems_state = monitor.psn_state_table()
+    monitor.trackers_state = monitor.psn_state_table()
+    reset_views(monitor)
+    monitor.tracker_row_cache.clear()
+    monitor.tracker_history = monitor.psn_tracker_history()
+
+
+def reset_views(monitor):
+    # fresh views on the current tables, so the next request reads them from scratch
+    with monitor.state_views_lock:
+        monitor.state_views = (monitor.psn_state_view(monitor.systems_state), monitor.psn_state_view(monitor.trackers_state))
+
+
+def frames(stream, count, info=True):
+    # count frames of data packets, optionally preceded by the stream's info packets
+    packets = stream.info_packets(0.0) if info else []
+    return packets, [stream.data_packets(n / 60.0) for n in range(count)]
+
+
+def bench_parse(stream, min_time):
+    _, data = frames(stream, 16, info=False)
+    packets = [packet for frame in data for packet in frame]
+    size = sum(len(packet) for packet in packets)
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        for packet in packets:
+            pypsn.parse_psn_packet(packet, "127.0.0.1")
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    tracker_count = len(stream.tracker_ids)
+    return {
+        "packets_per_frame": len(data[0]),
+        "packets_per_s": rounds * len(packets) / elapsed,
+        "frames_per_s": rounds * len(data) / elapsed,
+        "trackers_per_s": rounds * len(data) * tracker_count / elapsed,
+        "mbytes_per_s": rounds * size / elapsed / 1e6,
+        "us_per_frame": elapsed / (rounds * len(data)) * 1e6,
+    }
+
+
+def bench_e2e(monitor, stream, port, min_time, window=32, timeout=2.0):
+    # at most window packets are in flight, a frame of a few thousand trackers sent in
+    # one burst would overflow the default socket buffer
+    handled = [0]
+
+    def callback(packet):
+        monitor.callback_function(packet)
+        handled[0] += 1
+
+    def wait(sent, in_flight):
+        deadline = time.monotonic() + timeout
+        while sent - handled[0] > in_flight and time.monotonic() < deadline:
+            time.sleep(0)
+        return max(0, sent - handled[0] - in_flight)
+
+    receiver = pypsn.receiver(callback, "0.0.0.0", mcast_port=port)
+    receiver.start()
+    generator = psn_generator([stream], destination=(PSN_MCAST_GRP, port))
+    sock, destination = generator.sockets[0], generator.destination
+    try:
+        info, data = frames(stream, 16)
+        for packet in info:
+            sock.sendto(packet, destination)
+        sent = len(info)
+        lost = wait(sent, 0)
+        sent -= lost
+        delivered = 0
+        start = time.perf_counter()
+        while True:
+            for packet in data[delivered % len(data)]:
+                sock.sendto(packet, destination)
+                sent += 1
+                missing = wait(sent, window - 1)
+                lost += missing
+                sent -= missing
+            missing = wait(sent, 0)
+            lost += missing
+            sent -= missing
+            delivered += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+    finally:
+        receiver.stop()
+        generator.stop()
+    return {
+        "frames_per_s": delivered / elapsed,
+        "trackers_per_s": delivered * len(stream.tracker_ids) / elapsed,
+        "us_per_frame": elapsed / delivered * 1e6,
+        "packets_lost": lost,
+    }
+
+
+def feed(monitor, stream, count=1):
+    info, data = frames(stream, count)
+    for packet in info + [packet for frame in data for packet in frame]:
+        monitor.callback_function(pypsn.parse_psn_packet(packet, "127.0.0.1"))
+
+
+def bench_cleanup(monitor, stream, repeat):
+    table = monitor.trackers_state
+    max_age = monitor.trackers_cleanup_duration
+    quiet = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        table.expire(max_age)
+        quiet.append(time.perf_counter() - start)
+    # everything expires: pretend the trackers were last seen long ago
+    expiring = []
+    for _ in range(repeat):
+        feed(monitor, stream)
+        start = time.perf_counter()
+        table.expire(max_age, now=time.monotonic() + max_age + 1)
+        expiring.append(time.perf_counter() - start)
+    feed(monitor, stream)
+    return {
+        "idle_us": min(quiet) * 1e6,
+        "all_expire_us": min(expiring) * 1e6,
+    }
+
+
+def bench_render(monitor, stream, repeat):
+    client = monitor.app.test_client()
+    monitor.tracker_row_cache.clear()
+    reset_views(monitor)
+    start = time.perf_counter()
+    response = client.get("/trackers")
+    cold = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+    moved = max(1, len(stream.tracker_ids) // 10)
+    subset = psn_server_stream(moved, stream.fields, stream.system_name, stream.max_packet_size)
+    warm = []
+    for n in range(repeat):
+        for packet in subset.data_packets(1.0 + n):
+            monitor.callback_function(pypsn.parse_psn_packet(packet, "127.0.0.1"))
+        start = time.perf_counter()
+        client.get("/trackers")
+        warm.append(time.perf_counter() - start)
+    return {
+        "cold_ms": cold * 1e3,
+        "moved_10pct_ms": min(warm) * 1e3,
+        "bytes": len(response.data),
+    }
+
+
+def run(args):
+    monitor = load_monitor()
+    fields = [field for field in args.fields.split(",") if field]
+    results = []
+    try:
+        for tracker_count in args.trackers:
+            stream = psn_server_stream(tracker_count, fields, max_packet_size=args.mtu)
+            reset_monitor(monitor)
+            result = {"trackers": tracker_count, "parse": bench_parse(stream, args.min_time)}
+            if not args.skip_e2e:
+                result["e2e"] = bench_e2e(monitor, stream, args.port, args.min_time)
+            reset_monitor(monitor)
+            feed(monitor, stream)
+            result["cleanup"] = bench_cleanup(monitor, stream, args.repeat)
+            result["render"] = bench_render(monitor, stream, args.repeat)
+            results.append(result)
+            print(summary(result), file=sys.stderr)
+    finally:
+        monitor.log_pipeline.stop()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fields": fields,
+        "mtu": args.mtu,
+        "results": results,
+    }
+
+
+def summary(result):
+    line = f"{result['trackers']:>5} trackers  parse {result['parse']['frames_per_s']:>9.0f} frames/s"
+    if "e2e" in result:
+        line += f"  e2e {result['e2e']['frames_per_s']:>8.0f} frames/s"
+    line += f"  cleanup {result['cleanup']['all_expire_us']:>8.0f} us"
+    line += f"  render {result['render']['cold_ms']:>7.1f} / {result['render']['moved_10pct_ms']:>7.1f} ms"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PSN parse, end-to-end, cleanup and render benchmarks")
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS), help="comma separated tracker fields to send")
+    parser.add_argument("--mtu", type=int, default=1500, help="maximum PSN packet size, frames are split to fit")
+    parser.add_argument("--port", type=int, default=56599, help="loopback port for the end-to-end run")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per throughput measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the cleanup and render timings, best is kept")
+    parser.add_argument("--skip-e2e", action="store_true", help="skip the loopback measurement")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
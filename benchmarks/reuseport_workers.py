@@ -0,0 +1,111 @@
+#!/bin/env python3
+
+# Throughput of the SO_REUSEPORT worker pool for 1..N workers on synthetic traffic.
+#
+# Sources are sender processes bound to distinct loopback addresses (127.0.0.2, ...)
+# blasting unicast PSN data packets at the pool, so the kernel spreads them over the
+# workers. For every worker count the merged packet rate and the share of packets the
+# pool did not deliver (dropped by full socket buffers) are reported.
+#
+#   python benchmarks/reuseport_workers.py --workers 1 2 4 --sources 12 --trackers 20
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pypsn  # noqa: E402
+from pypsn.generator import encode_data_packet  # noqa: E402
+from pypsn.workers import psn_worker_pool  # noqa: E402
+
+
+def send_source(host, port, packets, trackers, start_event):
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.bind((host, 0))
+    frames = [
+        encode_data_packet(
+            [pypsn.psn_tracker(i, pos=pypsn.psn_vector3(frame_id, i, 0), speed=pypsn.psn_vector3(1, 0, 0)) for i in range(trackers)],
+            frame_id,
+        )
+        for frame_id in range(256)
+    ]
+    start_event.wait()
+    for n in range(packets):
+        sender.sendto(frames[n & 0xFF], ("127.0.0.1", port))
+    sender.close()
+
+
+def run(workers, sources, packets, trackers, port):
+    counter = {"packets": 0, "first": None, "last": None}
+
+    def callback(packet):
+        now = time.perf_counter()
+        if counter["first"] is None:
+            counter["first"] = now
+        counter["last"] = now
+        counter["packets"] += 1
+
+    pool = psn_worker_pool(callback, ["127.0.0.1"], workers, port, mcast_grp=None, rcvbuf=4 << 20)
+    pool.start()
+    while not pool.ready:
+        time.sleep(0.01)
+    context = multiprocessing.get_context("fork")
+    start_event = context.Event()
+    senders = [
+        context.Process(target=send_source, args=(f"127.0.0.{2 + i}", port, packets, trackers, start_event))
+        for i in range(sources)
+    ]
+    for sender in senders:
+        sender.start()
+    started = time.perf_counter()
+    start_event.set()
+    for sender in senders:
+        sender.join()
+    # wait until the workers have drained their sockets
+    seen = -1
+    while seen != counter["packets"]:
+        seen = counter["packets"]
+        time.sleep(0.2)
+    pool.stop()
+    sent = sources * packets
+    elapsed = (counter["last"] or started) - started
+    return {
+        "workers": workers,
+        "sent": sent,
+        "delivered": counter["packets"],
+        "loss": round(1 - counter["packets"] / sent, 4),
+        "seconds": round(elapsed, 3),
+        "packets_per_second": round(counter["packets"] / elapsed) if elapsed > 0 else 0,
+        "per_worker": pool.per_worker,
+        "duplicates": pool.duplicates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SO_REUSEPORT worker pool throughput benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sources", type=int, default=12)
+    parser.add_argument("--packets", type=int, default=5000, help="packets per source")
+    parser.add_argument("--trackers", type=int, default=20, help="trackers per packet")
+    parser.add_argument("--port", type=int, default=56600)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per run")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        result = run(workers, args.sources, args.packets, args.trackers, args.port)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(
+                f"{workers:>2} workers: {result['packets_per_second']:>8} packets/s, "
+                f"{result['loss'] * 100:5.1f}% lost, per worker {result['per_worker']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
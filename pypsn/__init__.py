@@ -1,11 +1,18 @@
 #!/bin/env python3
 
+import logging
 import socket
-from struct import unpack
-from enum import IntEnum
+from struct import unpack, unpack_from
+from enum import IntEnum, IntFlag
 from typing import List
 import os
 from threading import Thread
+from time import perf_counter_ns, time_ns
+
+from pypsn.quarantine import psn_quarantine
+from pypsn.stats import enable_kernel_timestamps, recv_timestamped
+
+logger = logging.getLogger("pypsn")
 
 
 class psn_vector3:
@@ -130,6 +137,52 @@ class psn_tracker_chunk_info(IntEnum):
     PSN_DATA_TRACKER_TIMESTAMP = 0x0006
 
 
+# Tracker fields to decode, bit n stands for tracker sub-chunk id n; the other
+# sub-chunks are skipped by their length without being unpacked
+class psn_tracker_field(IntFlag):
+    POS = 1 << psn_tracker_chunk.PSN_DATA_TRACKER_POS
+    SPEED = 1 << psn_tracker_chunk.PSN_DATA_TRACKER_SPEED
+    ORI = 1 << psn_tracker_chunk.PSN_DATA_TRACKER_ORI
+    STATUS = 1 << psn_tracker_chunk_info.PSN_DATA_TRACKER_STATUS
+    ACCEL = 1 << psn_tracker_chunk.PSN_DATA_TRACKER_ACCEL
+    TRGTPOS = 1 << psn_tracker_chunk.PSN_DATA_TRACKER_TRGTPOS
+    TIMESTAMP = 1 << psn_tracker_chunk_info.PSN_DATA_TRACKER_TIMESTAMP
+    ALL = POS | SPEED | ORI | STATUS | ACCEL | TRGTPOS | TIMESTAMP
+
+
+def tracker_field_mask(names) -> "psn_tracker_field":
+    # ["pos", "status"] -> psn_tracker_field.POS | psn_tracker_field.STATUS
+    mask = psn_tracker_field(0)
+    for name in names:
+        try:
+            mask |= psn_tracker_field[name.upper()]
+        except KeyError:
+            raise ValueError(f"unknown PSN tracker field {name!r}") from None
+    return mask
+
+
+_PSN_V1_IDS = frozenset(psn_v1_chunk)
+
+
+class psn_parse_error(ValueError):
+    # a malformed packet; reason is one of a few short strings to count rejects by
+    # (truncated, bad_length, missing_header, unknown_packet, unsupported_version)
+    def __init__(self, reason: str, detail: str = ""):
+        ValueError.__init__(self, f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+
+# vector sub-chunk id -> psn_tracker attribute
+_TRACKER_VECTORS = {
+    psn_tracker_chunk.PSN_DATA_TRACKER_POS: "pos",
+    psn_tracker_chunk.PSN_DATA_TRACKER_SPEED: "speed",
+    psn_tracker_chunk.PSN_DATA_TRACKER_ORI: "ori",
+    psn_tracker_chunk.PSN_DATA_TRACKER_ACCEL: "accel",
+    psn_tracker_chunk.PSN_DATA_TRACKER_TRGTPOS: "trgtpos",
+}
+
+
 def join_multicast_windows(MCAST_GRP, MCAST_PORT, if_ip):
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -147,7 +200,7 @@ def join_multicast_posix(MCAST_GRP, MCAST_PORT, if_ip):
     try:
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     except Exception as e:
-        print(e)
+        logger.warning("Could not set SO_REUSEADDR: %s", e)
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 32)
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
 
@@ -173,13 +226,23 @@ def determine_os():
 
 
 class receiver(Thread):
-    def __init__(self, callback, ip_addr="0.0.0.0", mcast_port=56565, timeout=2):
+    def __init__(self, callback, ip_addr="0.0.0.0", mcast_port=56565, timeout=2, recorder=None, stats=None, accept=None,
+                 fields=psn_tracker_field.ALL, quarantine=None):
         Thread.__init__(self)
         self.callback = callback
+        self.ip_addr = ip_addr
+        self.fields = fields  # psn_tracker_field mask of the tracker fields to decode
+        self.quarantine = quarantine if quarantine is not None else psn_quarantine()  # rejected packets by reason
+        self.recorder = recorder  # optional pypsn.recorder.psn_recorder, fed raw datagrams
+        self.stats = stats  # optional pypsn.stats.psn_receive_stats, fed per-stage timings
+        self.accept = accept  # optional callable(src_ip) -> bool, other sources are dropped before parsing
+        self.kernel_timestamps = False
         self.running = True
         self.socket = get_socket(ip_addr, mcast_port)
         if timeout is not None and self.socket is not None:
             self.socket.settimeout(timeout)
+        if stats is not None and self.socket is not None:
+            self.kernel_timestamps = stats.kernel_timestamps = enable_kernel_timestamps(self.socket)
 
     def stop(self):
         self.running = False
@@ -191,14 +254,51 @@ class receiver(Thread):
         data = ""
         if self.socket is None:
             return
+        kernel_ns = None
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(1500)
+                if self.kernel_timestamps:
+                    data, addr, kernel_ns = recv_timestamped(self.socket, 1500)
+                else:
+                    data, addr = self.socket.recvfrom(1500)
+            except socket.timeout:
+                continue  # the timeout only exists so stop() is noticed
             except Exception as e:
-                print("Network data error:", e)
+                if not self.running:
+                    break  # stop() closed the socket under us
+                logger.warning("Network data error: %s", e, extra={"key": "network_data_error"})
             else:
-                psn_data = parse_psn_packet(data, addr[0])  # Pass the source IP address
-                self.callback(psn_data)
+                if self.accept is not None and not self.accept(addr[0]):
+                    continue
+                try:
+                    self.handle(data, addr[0], kernel_ns)
+                except Exception as e:
+                    # a failing callback or recorder must not take the receiver down
+                    logger.error("Error handling PSN packet from %s: %s", addr[0], e, exc_info=True,
+                                 extra={"key": ("handler_error", addr[0])})
+
+    def handle(self, data, src_ip, kernel_ns=None):
+        stats = self.stats
+        if stats is not None:
+            received_ns = perf_counter_ns()
+            socket_ns = time_ns() - kernel_ns if kernel_ns is not None else None
+        if self.recorder is not None:
+            self.recorder.record(data, src_ip, self.ip_addr)
+        try:
+            psn_data = parse_psn_packet(data, src_ip, self.fields)  # Pass the source IP address
+        except Exception as e:
+            reason = self.quarantine.reject(src_ip, data, e)
+            logger.warning("Rejected PSN packet from %s: %s", src_ip, e, extra={"key": ("parse_error", src_ip, reason)})
+            psn_data = None
+        if stats is not None:
+            parsed_ns = perf_counter_ns()
+        self.callback(psn_data)
+        if stats is not None:
+            stats.record(src_ip, len(data), received_ns, parsed_ns, perf_counter_ns(), socket_ns)
+            if psn_data is None:
+                stats.record_parse_error(src_ip)
+            elif isinstance(psn_data, psn_data_packet):
+                stats.record_frame(src_ip, psn_data.info.frame_id, psn_data.info.packet_count)
 
 
 def get_socket(ip_addr, mcast_port):
@@ -212,26 +312,33 @@ def get_socket(ip_addr, mcast_port):
         sock = join_multicast_posix(MCAST_GRP, MCAST_PORT, IP_ADDR)
 
     if sock is None:
-        print("error getting network interface")
+        logger.error("error getting network interface")
         return
     return sock
 
 
-def parse_psn_packet(buffer, src_ip):
-    psn_id = unpack("<H", buffer[0:2])[0]
-    if psn_id in iter(psn_v1_chunk):
-        pass  # PSN V1 not supported by this parser
-    elif psn_id in iter(psn_v2_chunk):
-        chunk_id, chunk_buffer, rest = parse_chunk(buffer)
-        if chunk_id == psn_v2_chunk.PSN_INFO_PACKET:
-            return parse_info(chunk_buffer, src_ip)  # Pass the source IP address
-        elif chunk_id == psn_v2_chunk.PSN_DATA_PACKET:
-            return parse_data(chunk_buffer, src_ip)  # Pass the source IP address
+def parse_psn_packet(buffer, src_ip, fields=psn_tracker_field.ALL):
+    # raises psn_parse_error for anything that is not a well formed PSN v2 packet
+    if len(buffer) < 4:
+        raise psn_parse_error("truncated", f"{len(buffer)} byte datagram")
+    psn_id = unpack_from("<H", buffer)[0]
+    if psn_id in _PSN_V1_IDS:
+        raise psn_parse_error("unsupported_version", "PSN v1 packet")  # PSN V1 not supported by this parser
+    chunk_id, chunk_buffer, rest = parse_chunk(buffer)
+    if chunk_id == psn_v2_chunk.PSN_INFO_PACKET:
+        return parse_info(chunk_buffer, src_ip)  # Pass the source IP address
+    elif chunk_id == psn_v2_chunk.PSN_DATA_PACKET:
+        return parse_data(chunk_buffer, src_ip, fields)  # Pass the source IP address
+    raise psn_parse_error("unknown_packet", f"packet id 0x{psn_id:04x}")
 
 
 def parse_chunk(buffer):
-    chunk_id, data_field = unpack("<HH", buffer[0:4])
+    if len(buffer) < 4:
+        raise psn_parse_error("truncated", f"{len(buffer)} bytes left for a chunk header")
+    chunk_id, data_field = unpack_from("<HH", buffer)
     data_len = data_field & 0x7FFF
+    if data_len + 4 > len(buffer):
+        raise psn_parse_error("truncated", f"chunk 0x{chunk_id:04x} of {data_len} bytes with {len(buffer) - 4} left")
     data = buffer[4 : 4 + data_len]
     rest = None
 
@@ -241,31 +348,40 @@ def parse_chunk(buffer):
 
 
 def parse_info(buffer, src_ip):
+    info = None
+    system_name = b""
+    trackers = []
     while buffer:
         chunk_id, chunk_buffer, buffer = parse_chunk(buffer)
         if chunk_id == psn_info_chunk.PSN_INFO_PACKET_HEADER:
-            info = parse_header(chunk_buffer[:12], src_ip)  # Pass the source IP address
+            info = parse_header(chunk_buffer, src_ip)  # Pass the source IP address
         elif chunk_id == psn_info_chunk.PSN_INFO_SYSTEM_NAME:
             system_name = parse_system_name(chunk_buffer)
         elif chunk_id == psn_info_chunk.PSN_INFO_TRACKER_LIST:
             trackers = parse_info_tracker_list(chunk_buffer)
-    packet = psn_info_packet(info, system_name, trackers) if 'trackers' in locals() else psn_info_packet(info, system_name, [])
-    return packet
+    if info is None:
+        raise psn_parse_error("missing_header", "info packet without a header chunk")
+    return psn_info_packet(info, system_name, trackers)
 
 
-def parse_data(buffer, src_ip):
+def parse_data(buffer, src_ip, fields=psn_tracker_field.ALL):
+    info = None
+    trackers = []
     while buffer:
         chunk_id, chunk_buffer, buffer = parse_chunk(buffer)
         if chunk_id == psn_data_chunk.PSN_DATA_PACKET_HEADER:
-            info = parse_header(chunk_buffer[:12], src_ip)  # Pass the source IP address
+            info = parse_header(chunk_buffer, src_ip)  # Pass the source IP address
         elif chunk_id == psn_data_chunk.PSN_DATA_TRACKER_LIST:
-            trackers = parse_data_tracker_list(chunk_buffer, src_ip)  # Pass the source IP address
-    packet = psn_data_packet(info, trackers) if 'trackers' in locals() else psn_data_packet(info, [])
-    return packet
+            trackers = parse_data_tracker_list(chunk_buffer, src_ip, fields)  # Pass the source IP address
+    if info is None:
+        raise psn_parse_error("missing_header", "data packet without a header chunk")
+    return psn_data_packet(info, trackers)
 
 
 def parse_header(buffer, src_ip):
-    timestamp, version_high, version_low, frame_id, packet_count = unpack("<QBBBB", buffer)
+    if len(buffer) < 12:
+        raise psn_parse_error("bad_length", f"{len(buffer)} byte packet header")
+    timestamp, version_high, version_low, frame_id, packet_count = unpack_from("<QBBBB", buffer)
     info = psn_info(timestamp, version_high, version_low, frame_id, packet_count, src_ip)
     return info
 
@@ -292,34 +408,45 @@ def parse_info_tracker_list(buffer):
     return trackers
 
 
-def parse_data_tracker_list(buffer, src_ip):
+def parse_data_tracker_list(buffer, src_ip, fields=psn_tracker_field.ALL):
+    # walks the tracker chunks and their sub-chunks by offset, so sub-chunks outside
+    # the fields mask cost a header read and nothing else; every length is checked
+    # against the enclosing chunk before anything is unpacked
     trackers: List["psn_tracker"] = []
-    while buffer:
-        tracker_id, chunk_buffer, buffer = parse_chunk(buffer)
+    fields = int(fields)
+    end = len(buffer)
+    offset = 0
+    while offset + 4 <= end:
+        tracker_id, data_field = unpack_from("<HH", buffer, offset)
+        offset += 4
+        tracker_end = offset + (data_field & 0x7FFF)
+        if tracker_end > end:
+            raise psn_parse_error("truncated", f"tracker {tracker_id} of {data_field & 0x7FFF} bytes with {end - offset} left")
 
         tracker = psn_tracker(tracker_id, src_ip=src_ip)  # Pass the source IP address
 
-        if len(chunk_buffer) > 0:
-            while chunk_buffer:
-                chunk_id, data_buffer, chunk_buffer = parse_chunk(chunk_buffer)
-                if chunk_id in iter(psn_tracker_chunk):
-                    vector = psn_vector3(*unpack("<fff", data_buffer))
-                    if chunk_id == psn_tracker_chunk.PSN_DATA_TRACKER_POS:
-                        tracker.pos = vector
-                    elif chunk_id == psn_tracker_chunk.PSN_DATA_TRACKER_ORI:
-                        tracker.ori = vector
-                    elif chunk_id == psn_tracker_chunk.PSN_DATA_TRACKER_ACCEL:
-                        tracker.accel = vector
-                    elif chunk_id == psn_tracker_chunk.PSN_DATA_TRACKER_SPEED:
-                        tracker.speed = vector
-                    elif chunk_id == psn_tracker_chunk.PSN_DATA_TRACKER_TRGTPOS:
-                        tracker.trgtpos = vector
-
-                elif chunk_id == psn_tracker_chunk_info.PSN_DATA_TRACKER_STATUS:
-                    status = unpack("<f", data_buffer)[0]
-                    tracker.status = status
-                elif chunk_id == psn_tracker_chunk_info.PSN_DATA_TRACKER_TIMESTAMP:
-                    timestamp = unpack("<L", data_buffer[:4])[0]
-                    tracker.timestamp = timestamp
+        while offset + 4 <= tracker_end:
+            chunk_id, data_field = unpack_from("<HH", buffer, offset)
+            data_offset = offset + 4
+            offset = data_offset + (data_field & 0x7FFF)
+            if offset > tracker_end:
+                raise psn_parse_error("truncated", f"tracker {tracker_id} sub-chunk 0x{chunk_id:04x} overruns its tracker")
+            if not (fields >> chunk_id) & 1:
+                continue
+            size = offset - data_offset
+            attribute = _TRACKER_VECTORS.get(chunk_id)
+            if attribute is not None:
+                if size < 12:
+                    raise psn_parse_error("bad_length", f"tracker {tracker_id} {attribute} of {size} bytes")
+                setattr(tracker, attribute, psn_vector3(*unpack_from("<fff", buffer, data_offset)))
+            elif chunk_id == psn_tracker_chunk_info.PSN_DATA_TRACKER_STATUS:
+                if size < 4:
+                    raise psn_parse_error("bad_length", f"tracker {tracker_id} status of {size} bytes")
+                tracker.status = unpack_from("<f", buffer, data_offset)[0]
+            elif chunk_id == psn_tracker_chunk_info.PSN_DATA_TRACKER_TIMESTAMP:
+                if size < 4:
+                    raise psn_parse_error("bad_length", f"tracker {tracker_id} timestamp of {size} bytes")
+                tracker.timestamp = unpack_from("<L", buffer, data_offset)[0]
+        offset = tracker_end
         trackers.append(tracker)
     return trackers
@@ -0,0 +1,263 @@
+#!/bin/env python3
+
+# PSN v2 encoder, the counterpart of the parser in pypsn. Used to generate synthetic
+# traffic for tests and benchmarks, it produces what a PSN server puts on the wire.
+#
+#   python -m pypsn.generator --servers 3 --trackers 100 --loopback-sources
+
+import socket
+import time
+from math import cos, pi, sin
+from struct import Struct
+from threading import Thread
+from typing import List
+
+from pypsn import (
+    psn_data_chunk,
+    psn_info_chunk,
+    psn_tracker,
+    psn_vector3,
+    psn_tracker_chunk,
+    psn_tracker_chunk_info,
+    psn_tracker_list_chunk,
+    psn_v2_chunk,
+)
+
+chunk_header = Struct("<HH")
+packet_header = Struct("<QBBBB")
+vector3 = Struct("<fff")
+status = Struct("<f")
+timestamp = Struct("<Q")
+
+PSN_VERSION = (2, 3)
+TRACKER_VECTORS = (
+    ("pos", psn_tracker_chunk.PSN_DATA_TRACKER_POS),
+    ("speed", psn_tracker_chunk.PSN_DATA_TRACKER_SPEED),
+    ("ori", psn_tracker_chunk.PSN_DATA_TRACKER_ORI),
+    ("accel", psn_tracker_chunk.PSN_DATA_TRACKER_ACCEL),
+    ("trgtpos", psn_tracker_chunk.PSN_DATA_TRACKER_TRGTPOS),
+)
+
+
+def encode_chunk(chunk_id: int, data: bytes, has_subchunks: bool = False) -> bytes:
+    if len(data) > 0x7FFF:
+        raise ValueError(f"chunk {chunk_id} of {len(data)} bytes does not fit a PSN chunk")
+    return chunk_header.pack(chunk_id, len(data) | (0x8000 if has_subchunks else 0)) + data
+
+
+def encode_header(frame_id: int, packet_count: int = 1, timestamp_us: int = 0) -> bytes:
+    return packet_header.pack(timestamp_us, PSN_VERSION[0], PSN_VERSION[1], frame_id & 0xFF, packet_count)
+
+
+def encode_tracker(tracker: "psn_tracker") -> bytes:
+    body = b""
+    for name, chunk_id in TRACKER_VECTORS:
+        vector = getattr(tracker, name)
+        if vector is not None:
+            body += encode_chunk(chunk_id, vector3.pack(vector.x, vector.y, vector.z))
+    if tracker.status:
+        body += encode_chunk(psn_tracker_chunk_info.PSN_DATA_TRACKER_STATUS, status.pack(tracker.status))
+    if tracker.timestamp:
+        body += encode_chunk(psn_tracker_chunk_info.PSN_DATA_TRACKER_TIMESTAMP, timestamp.pack(tracker.timestamp))
+    return encode_chunk(tracker.id, body, True)
+
+
+def encode_data_packet(trackers: List["psn_tracker"], frame_id: int, packet_count: int = 1, timestamp_us: int = 0) -> bytes:
+    header = encode_chunk(psn_data_chunk.PSN_DATA_PACKET_HEADER, encode_header(frame_id, packet_count, timestamp_us))
+    tracker_list = encode_chunk(psn_data_chunk.PSN_DATA_TRACKER_LIST, b"".join(map(encode_tracker, trackers)), True)
+    return encode_chunk(psn_v2_chunk.PSN_DATA_PACKET, header + tracker_list, True)
+
+
+def encode_info_packet(system_name: bytes, tracker_names: dict, frame_id: int, packet_count: int = 1, timestamp_us: int = 0) -> bytes:
+    # tracker_names maps tracker id -> name (bytes)
+    header = encode_chunk(psn_info_chunk.PSN_INFO_PACKET_HEADER, encode_header(frame_id, packet_count, timestamp_us))
+    name = encode_chunk(psn_info_chunk.PSN_INFO_SYSTEM_NAME, system_name)
+    trackers = b"".join(
+        encode_chunk(tracker_id, encode_chunk(psn_tracker_list_chunk.PSN_INFO_TRACKER_NAME, tracker_name), True)
+        for tracker_id, tracker_name in tracker_names.items()
+    )
+    tracker_list = encode_chunk(psn_info_chunk.PSN_INFO_TRACKER_LIST, trackers, True)
+    return encode_chunk(psn_v2_chunk.PSN_INFO_PACKET, header + name + tracker_list, True)
+
+
+# size of the chunk headers wrapped around the tracker list: packet chunk, header chunk
+# with its 12 byte body and the tracker list chunk
+DATA_PACKET_OVERHEAD = 3 * chunk_header.size + packet_header.size
+DEFAULT_FIELDS = ("pos", "speed", "ori", "status", "timestamp")
+
+
+def split_chunks(chunks: List[bytes], budget: int) -> List[List[bytes]]:
+    # greedy packing of encoded chunks into groups of at most budget bytes each
+    groups, group, size = [], [], 0
+    for chunk in chunks:
+        if group and size + len(chunk) > budget:
+            groups.append(group)
+            group, size = [], 0
+        group.append(chunk)
+        size += len(chunk)
+    groups.append(group)
+    return groups
+
+
+class psn_server_stream:
+    # a synthetic PSN server: trackers moving on circles, encoded with the chosen fields
+    # and split over as many packets per frame as max_packet_size requires
+    def __init__(
+        self,
+        trackers: int = 10,
+        fields=DEFAULT_FIELDS,
+        system_name: bytes = b"pypsn generator",
+        max_packet_size: int = 1500,
+        radius: float = 5.0,
+        period: float = 10.0,
+        first_tracker_id: int = 0,
+    ):
+        self.tracker_ids = list(range(first_tracker_id, first_tracker_id + trackers))
+        self.fields = tuple(fields)
+        self.system_name = system_name
+        self.max_packet_size = max_packet_size
+        self.radius = radius
+        self.period = period
+        self.frame_id = 0
+        self.info_frame_id = 0
+
+    def trackers(self, t: float) -> List["psn_tracker"]:
+        fields = self.fields
+        trackers = []
+        w = 2 * pi / self.period
+        for n, tracker_id in enumerate(self.tracker_ids):
+            phase = w * t + n * 0.1
+            tracker = psn_tracker(tracker_id)
+            if "pos" in fields:
+                tracker.pos = psn_vector3(self.radius * cos(phase), self.radius * sin(phase), 1.0 + n * 0.01)
+            if "speed" in fields:
+                tracker.speed = psn_vector3(-self.radius * w * sin(phase), self.radius * w * cos(phase), 0.0)
+            if "ori" in fields:
+                tracker.ori = psn_vector3(0.0, 0.0, phase % (2 * pi))
+            if "accel" in fields:
+                tracker.accel = psn_vector3(-self.radius * w * w * cos(phase), -self.radius * w * w * sin(phase), 0.0)
+            if "trgtpos" in fields:
+                tracker.trgtpos = psn_vector3(self.radius * cos(phase + w), self.radius * sin(phase + w), 1.0)
+            if "status" in fields:
+                tracker.status = 1.0
+            if "timestamp" in fields:
+                tracker.timestamp = int(t * 1e6)
+            trackers.append(tracker)
+        return trackers
+
+    def data_packets(self, t: float) -> List[bytes]:
+        # all packets of the next frame, they share its frame id and packet count
+        frame_id = self.frame_id
+        self.frame_id = (self.frame_id + 1) & 0xFF
+        groups = split_chunks([encode_tracker(tracker) for tracker in self.trackers(t)], self.max_packet_size - DATA_PACKET_OVERHEAD)
+        header = encode_chunk(psn_data_chunk.PSN_DATA_PACKET_HEADER, encode_header(frame_id, len(groups), int(t * 1e6)))
+        return [
+            encode_chunk(
+                psn_v2_chunk.PSN_DATA_PACKET,
+                header + encode_chunk(psn_data_chunk.PSN_DATA_TRACKER_LIST, b"".join(group), True),
+                True,
+            )
+            for group in groups
+        ]
+
+    def info_packets(self, t: float) -> List[bytes]:
+        frame_id = self.info_frame_id
+        self.info_frame_id = (self.info_frame_id + 1) & 0xFF
+        names = [
+            encode_chunk(tracker_id, encode_chunk(psn_tracker_list_chunk.PSN_INFO_TRACKER_NAME, b"tracker %d" % tracker_id), True)
+            for tracker_id in self.tracker_ids
+        ]
+        name = encode_chunk(psn_info_chunk.PSN_INFO_SYSTEM_NAME, self.system_name)
+        budget = self.max_packet_size - DATA_PACKET_OVERHEAD - len(name)
+        groups = split_chunks(names, budget)
+        header = encode_chunk(psn_info_chunk.PSN_INFO_PACKET_HEADER, encode_header(frame_id, len(groups), int(t * 1e6)))
+        return [
+            encode_chunk(
+                psn_v2_chunk.PSN_INFO_PACKET,
+                header + name + encode_chunk(psn_info_chunk.PSN_INFO_TRACKER_LIST, b"".join(group), True),
+                True,
+            )
+            for group in groups
+        ]
+
+
+class psn_generator(Thread):
+    # sends streams at a fixed frame rate, info packets once a second; every stream can
+    # be bound to its own source address (127.0.0.x on loopback) to look like a server
+    def __init__(self, streams, sources=None, destination=("236.10.10.10", 56565), fps: float = 60.0, ttl: int = 1):
+        Thread.__init__(self, name="psn-generator", daemon=True)
+        self.streams = list(streams)
+        self.destination = tuple(destination)
+        self.fps = fps
+        self.running = True
+        self.frames_sent = 0
+        self.packets_sent = 0
+        self.sockets = []
+        for n in range(len(self.streams)):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            if sources:
+                sock.bind((sources[n], 0))
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(sources[n]))
+            self.sockets.append(sock)
+
+    def send_frame(self, t: float, info: bool = False):
+        for stream, sock in zip(self.streams, self.sockets):
+            packets = stream.data_packets(t)
+            if info:
+                packets = stream.info_packets(t) + packets
+            for packet in packets:
+                sock.sendto(packet, self.destination)
+            self.packets_sent += len(packets)
+        self.frames_sent += 1
+
+    def run(self):
+        start = time.monotonic()
+        next_info = start
+        frame = 0
+        while self.running:
+            now = time.monotonic()
+            self.send_frame(now - start, info=now >= next_info)
+            if now >= next_info:
+                next_info += 1.0
+            frame += 1
+            time.sleep(max(0.0, start + frame / self.fps - time.monotonic()))
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Send synthetic PSN traffic")
+    parser.add_argument("--servers", type=int, default=1, help="number of simulated PSN servers")
+    parser.add_argument("--trackers", type=int, default=10, help="trackers per server")
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS), help="comma separated tracker fields to send")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--group", default="236.10.10.10", help="destination multicast group or unicast address")
+    parser.add_argument("--port", type=int, default=56565)
+    parser.add_argument("--loopback-sources", action="store_true", help="send server n from 127.0.0.(n + 2)")
+    args = parser.parse_args()
+
+    fields = [field for field in args.fields.split(",") if field]
+    streams = [
+        psn_server_stream(args.trackers, fields, system_name=b"pypsn generator %d" % n, first_tracker_id=0)
+        for n in range(args.servers)
+    ]
+    sources = [f"127.0.0.{n + 2}" for n in range(args.servers)] if args.loopback_sources else None
+    generator = psn_generator(streams, sources, (args.group, args.port), args.fps)
+    generator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        generator.stop()
+
+
+if __name__ == "__main__":
+    main()
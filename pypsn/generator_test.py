@@ -0,0 +1,66 @@
+import pytest
+
+import pypsn
+from pypsn.generator import encode_data_packet, encode_info_packet, psn_server_stream
+from pypsn.player_test import data_packet
+
+
+def test_data_packet_matches_hand_built_packet():
+    tracker = pypsn.psn_tracker(7, pos=pypsn.psn_vector3(1.5, 2.0, 3.0))
+    packet = encode_data_packet([tracker], frame_id=4, timestamp_us=1000)
+    assert packet == data_packet(4, 1.5)
+
+
+def test_round_trip():
+    trackers = [
+        pypsn.psn_tracker(1, pos=pypsn.psn_vector3(1, 2, 3), speed=pypsn.psn_vector3(4, 5, 6), status=0.5, timestamp=99),
+        pypsn.psn_tracker(2, ori=pypsn.psn_vector3(0, 0, 1), accel=pypsn.psn_vector3(1, 1, 1), trgtpos=pypsn.psn_vector3(2, 2, 2)),
+    ]
+    packet = pypsn.parse_psn_packet(encode_data_packet(trackers, frame_id=300, packet_count=2), "10.0.0.1")
+    assert packet.info.frame_id == 300 & 0xFF
+    assert packet.info.packet_count == 2
+    first, second = packet.trackers
+    assert (first.id, first.pos, first.speed, first.status, first.timestamp) == (1, trackers[0].pos, trackers[0].speed, 0.5, 99)
+    assert (second.id, second.ori, second.accel, second.trgtpos) == (2, trackers[1].ori, trackers[1].accel, trackers[1].trgtpos)
+
+    info = pypsn.parse_psn_packet(encode_info_packet(b"server", {1: b"bob", 2: b"alice"}, frame_id=1), "10.0.0.1")
+    assert info.name == b"server"
+    assert [(t.tracker_id, t.tracker_name) for t in info.trackers] == [(1, b"bob"), (2, b"alice")]
+
+
+def test_stream_splits_frames_under_the_packet_size():
+    stream = psn_server_stream(200, max_packet_size=1000)
+    packets = stream.data_packets(1.0)
+    assert len(packets) > 1
+    assert all(len(packet) <= 1000 for packet in packets)
+    parsed = [pypsn.parse_psn_packet(packet, "10.0.0.1") for packet in packets]
+    assert {(p.info.frame_id, p.info.packet_count) for p in parsed} == {(0, len(packets))}
+    assert [t.id for p in parsed for t in p.trackers] == list(range(200))
+    assert pypsn.parse_psn_packet(stream.data_packets(2.0)[0], "10.0.0.1").info.frame_id == 1
+
+    info = [pypsn.parse_psn_packet(packet, "10.0.0.1") for packet in stream.info_packets(1.0)]
+    assert len(info) > 1 and all(p.name == b"pypsn generator" for p in info)
+    assert [t.tracker_id for p in info for t in p.trackers] == list(range(200))
+
+
+def test_stream_fields():
+    stream = psn_server_stream(2, fields=("pos", "status"))
+    tracker = pypsn.parse_psn_packet(stream.data_packets(0.0)[0], "10.0.0.1").trackers[1]
+    assert tracker.pos.z > 1.0 and tracker.status == 1.0
+    assert tracker.speed is None and tracker.ori is None and not tracker.timestamp
+
+
+def test_field_mask_skips_unrequested_sub_chunks():
+    trackers = [
+        pypsn.psn_tracker(1, pos=pypsn.psn_vector3(1, 2, 3), speed=pypsn.psn_vector3(4, 5, 6), ori=pypsn.psn_vector3(0, 0, 1), status=0.5, timestamp=99),
+        pypsn.psn_tracker(2, accel=pypsn.psn_vector3(1, 1, 1), trgtpos=pypsn.psn_vector3(2, 2, 2)),
+    ]
+    fields = pypsn.tracker_field_mask(["pos", "status"])
+    assert fields == pypsn.psn_tracker_field.POS | pypsn.psn_tracker_field.STATUS
+    first, second = pypsn.parse_psn_packet(encode_data_packet(trackers, frame_id=1), "10.0.0.1", fields).trackers
+    assert (first.id, first.pos, first.status) == (1, trackers[0].pos, 0.5)
+    assert (first.speed, first.ori, first.timestamp) == (None, None, 0)
+    assert (second.id, second.pos, second.accel, second.trgtpos) == (2, None, None, None)
+
+    with pytest.raises(ValueError):
+        pypsn.tracker_field_mask(["pos", "colour"])
@@ -0,0 +1,139 @@
+#!/bin/env python3
+
+# Bounded per-tracker time series of (t, pos, speed, ori) kept in NumPy ring buffers.
+# Each tracker gets one ring per resolution; coarser rings keep the first sample seen
+# in each of their time buckets, so minutes of history cost a few hundred rows.
+
+from threading import Lock
+
+import numpy as np
+
+# resolution name -> samples per second (None keeps every sample)
+HISTORY_RESOLUTIONS = {"raw": None, "10hz": 10, "1hz": 1}
+HISTORY_FIELDS = ("pos", "speed", "ori")
+
+_NAN3 = (float("nan"),) * 3
+
+
+class psn_ring:
+    def __init__(self, capacity: int, rate: float = None):
+        self.capacity = capacity
+        self.rate = rate
+        self.t = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, 3 * len(HISTORY_FIELDS)), dtype=np.float32)
+        self.count = 0  # total samples ever appended
+        self._bucket = None
+
+    def append(self, t: float, values: tuple):
+        if self.rate is not None:
+            bucket = int(t * self.rate)
+            if bucket == self._bucket:
+                return
+            self._bucket = bucket
+        i = self.count % self.capacity
+        self.t[i] = t
+        self.values[i] = values
+        self.count += 1
+
+    def oldest(self) -> float:
+        if not self.count:
+            return float("inf")
+        return float(self.t[self.count % self.capacity if self.count > self.capacity else 0])
+
+    def ordered(self):
+        count = self.count
+        if count <= self.capacity:
+            return self.t[:count].copy(), self.values[:count].copy()
+        i = count % self.capacity
+        return np.concatenate((self.t[i:], self.t[:i])), np.concatenate((self.values[i:], self.values[:i]))
+
+
+class psn_tracker_history:
+    def __init__(self, raw_capacity: int = 600, capacity: int = 600):
+        # defaults: ~10 s of raw 60 Hz data, 1 min at 10 Hz and 10 min at 1 Hz per tracker
+        self.raw_capacity = raw_capacity
+        self.capacity = capacity
+        self._trackers = {}
+        self._lock = Lock()
+
+    def _rings(self, key):
+        rings = self._trackers.get(key)
+        if rings is None:
+            with self._lock:
+                rings = self._trackers.setdefault(key, {
+                    res: psn_ring(self.raw_capacity if rate is None else self.capacity, rate)
+                    for res, rate in HISTORY_RESOLUTIONS.items()
+                })
+        return rings
+
+    def append(self, key, t: float, pos=None, speed=None, ori=None):
+        values = (*(pos or _NAN3), *(speed or _NAN3), *(ori or _NAN3))
+        for ring in self._rings(key).values():
+            ring.append(t, values)
+
+    def keys(self):
+        return list(self._trackers.keys())
+
+    def forget(self, key):
+        with self._lock:
+            self._trackers.pop(key, None)
+
+    @property
+    def span(self) -> float:
+        # seconds the longest ring reaches back (10 min at 1 Hz by default)
+        return max(self.capacity / rate for rate in HISTORY_RESOLUTIONS.values() if rate is not None)
+
+    def newest(self, key) -> float:
+        rings = self._trackers.get(key)
+        if rings is None or not rings["raw"].count:
+            return float("-inf")
+        ring = rings["raw"]
+        return float(ring.t[(ring.count - 1) % ring.capacity])
+
+    def expire(self, now: float, max_age: float = None) -> list:
+        # forgets the trackers without a sample for max_age seconds (default: span), so the
+        # history of a tracker that just stopped can still be looked at until it ran out
+        cutoff = now - (self.span if max_age is None else max_age)
+        expired = [key for key in list(self._trackers) if self.newest(key) < cutoff]
+        for key in expired:
+            self.forget(key)
+        return expired
+
+    def memory_usage(self) -> int:
+        return sum(r.t.nbytes + r.values.nbytes for rings in list(self._trackers.values()) for r in rings.values())
+
+    def pick_resolution(self, key, t_from: float) -> str:
+        # finest resolution that still reaches back to t_from, otherwise the finest
+        # one holding the oldest data (young trackers have the same span everywhere)
+        rings = self._trackers.get(key)
+        if rings is None:
+            return "raw"
+        oldest = {res: ring.oldest() for res, ring in rings.items()}
+        for res, t in oldest.items():
+            if t <= t_from:
+                return res
+        return min(oldest, key=oldest.get)
+
+    def query(self, key, t_from: float, t_to: float, res: str = None):
+        if res is None:
+            res = self.pick_resolution(key, t_from)
+        if res not in HISTORY_RESOLUTIONS:
+            raise ValueError(f"unknown resolution {res}, expected one of {', '.join(HISTORY_RESOLUTIONS)}")
+        rings = self._trackers.get(key)
+        if rings is None:
+            raise KeyError(key)
+        t, values = rings[res].ordered()
+        lo = np.searchsorted(t, t_from, side="left")
+        hi = np.searchsorted(t, t_to, side="right")
+        return res, t[lo:hi], values[lo:hi]
+
+    def query_dict(self, key, t_from: float, t_to: float, res: str = None) -> dict:
+        # JSON friendly, column oriented; missing fields become None
+        res, t, values = self.query(key, t_from, t_to, res)
+        result = {"tracker": key, "res": res, "t": t.tolist()}
+        missing = np.isnan(values)
+        values = np.round(values.astype(np.float64), 3).astype(object)
+        values[missing] = None
+        for i, field in enumerate(HISTORY_FIELDS):
+            result[field] = values[:, i * 3 : i * 3 + 3].tolist()
+        return result
@@ -0,0 +1,69 @@
+import pytest
+
+from pypsn import psn_vector3
+from pypsn.history import psn_tracker_history
+
+
+def fill(history, key, seconds, rate=60, start=1000.0):
+    for i in range(int(seconds * rate)):
+        t = start + i / rate
+        history.append(key, t, psn_vector3(i, 0, 0), psn_vector3(1, 1, 1))
+
+
+def test_query_raw():
+    history = psn_tracker_history()
+    fill(history, "10.0.0.1_1", 2)
+    res, t, values = history.query("10.0.0.1_1", 1001.0, 1001.5, "raw")
+    assert res == "raw"
+    assert len(t) == 31
+    assert t[0] == 1001.0
+    assert values[0, 0] == 60  # pos x
+    assert values[0, 3] == 1  # speed x
+
+
+def test_ring_is_bounded():
+    history = psn_tracker_history(raw_capacity=100, capacity=10)
+    fill(history, "a", 60)
+    memory = history.memory_usage()
+    fill(history, "a", 60, start=2000.0)
+    assert history.memory_usage() == memory
+    _, t, _ = history.query("a", 0, 1e9, "raw")
+    assert len(t) == 100
+    assert list(t) == sorted(t)
+    assert t[-1] == pytest.approx(2000 + 3599 / 60)
+
+
+def test_downsampled_resolutions():
+    history = psn_tracker_history(raw_capacity=120)
+    fill(history, "a", 30)
+    _, t, _ = history.query("a", 1000, 1030, "10hz")
+    assert len(t) == 300
+    _, t, _ = history.query("a", 1000, 1030, "1hz")
+    assert len(t) == 30
+    # raw only reaches back two seconds, so older queries pick a coarser ring
+    assert history.pick_resolution("a", 1029) == "raw"
+    assert history.pick_resolution("a", 1010) == "10hz"
+
+
+def test_query_dict_marks_missing_fields():
+    history = psn_tracker_history()
+    history.append("a", 1.0, psn_vector3(1.23456, 2, 3))
+    result = history.query_dict("a", 0, 2)
+    assert result["t"] == [1.0]
+    assert result["pos"] == [[1.235, 2.0, 3.0]]
+    assert result["speed"] == [[None, None, None]]
+    with pytest.raises(KeyError):
+        history.query("b", 0, 2)
+    with pytest.raises(ValueError):
+        history.query("a", 0, 2, "5hz")
+
+
+def test_expire_keeps_history_for_its_span():
+    history = psn_tracker_history(capacity=60)  # the 1 Hz ring reaches back 60 s
+    fill(history, "a", 1, start=1000.0)
+    fill(history, "b", 1, start=1050.0)
+    assert history.span == 60
+    assert history.expire(1055.0) == []
+    assert history.query("a", 0, 1e9)[1].size
+    assert history.expire(1061.0) == ["a"]
+    assert history.keys() == ["b"]
@@ -0,0 +1,176 @@
+#!/bin/env python3
+
+# Non-blocking logging pipeline for show-time use.
+#
+# Threads that log (the PSN receiver above all) only run the rate limit filter and
+# put the record on a bounded queue; a listener thread formats and writes it. When
+# the output stalls (a slow serial console) the queue fills up and records are
+# dropped and counted instead of blocking the caller.
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from threading import Lock
+
+# attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class psn_rate_limit_filter(logging.Filter):
+    # Token bucket per message key. The key is `extra={"key": ...}` if given, else the
+    # logger name plus the unformatted message, so "%s"-style calls from one call site
+    # share a bucket. With sample_every=N only every Nth record of a key is considered.
+    # The first record let through after a suppression carries `suppressed` = count.
+    def __init__(self, rate: float = 1.0, burst: int = 5, sample_every: int = 1, max_keys: int = 4096):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = max(1, int(sample_every))
+        self.max_keys = max_keys
+        self.suppressed_total = 0
+        self._buckets = {}  # key -> [tokens, last refill, seen, suppressed]
+        self._lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING and not hasattr(record, "key"):
+            return True  # problems are never sampled away unless they opt in with a key
+        key = getattr(record, "key", None) or (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [float(self.burst), now, 0, 0]
+            bucket[2] += 1
+            if self.rate > 0:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if (bucket[2] - 1) % self.sample_every or bucket[0] < 1:
+                bucket[3] += 1
+                self.suppressed_total += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[3] = bucket[3], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class psn_queue_handler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.output = None  # the handler the listener writes to, see setup_child_logging
+
+    def prepare(self, record):
+        # the listener lives in this process, so skip the default eager formatting and
+        # hand the record over as is; callers must not mutate objects passed as args
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class psn_json_formatter(logging.Formatter):
+    # one JSON object per line; fields passed with `extra` are kept as top-level keys
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name not in entry:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class psn_text_formatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" ({suppressed} similar suppressed)"
+        return text
+
+
+class psn_logging:
+    def __init__(self, handler: psn_queue_handler, rate_filter: psn_rate_limit_filter, listener, logger):
+        self.handler = handler
+        self.rate_filter = rate_filter
+        self.listener = listener
+        self.logger = logger
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    @property
+    def suppressed(self) -> int:
+        return self.rate_filter.suppressed_total
+
+    def stop(self):
+        # flushes whatever is still queued, then detaches from the logger
+        self.listener.stop()
+        self.logger.removeHandler(self.handler)
+
+
+def setup_logging(
+    level=logging.INFO,
+    json_format: bool = False,
+    stream=None,
+    rate: float = 1.0,
+    burst: int = 5,
+    sample_every: int = 1,
+    queue_size: int = 10000,
+    logger: logging.Logger = None,
+) -> psn_logging:
+    logger = logger if logger is not None else logging.getLogger()
+    output = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    output.setFormatter(psn_json_formatter() if json_format else psn_text_formatter())
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = psn_queue_handler(log_queue)
+    rate_filter = psn_rate_limit_filter(rate, burst, sample_every)
+    handler.addFilter(rate_filter)
+    handler.output = output
+    listener = logging.handlers.QueueListener(log_queue, output)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    listener.start()
+    return psn_logging(handler, rate_filter, listener, logger)
+
+
+def setup_child_logging(logger: logging.Logger = None):
+    # For the entry point of a forked worker process. The queue handler inherited from
+    # the parent feeds a copy of the queue that no listener drains, and the rate limit
+    # filter lock may have been held by another thread at fork time. Both are replaced
+    # by a direct handler with the same output and format and a fresh filter; workers
+    # log rarely, so writing on the calling thread is fine there.
+    logger = logger if logger is not None else logging.getLogger()
+    for handler in list(logger.handlers):
+        if not isinstance(handler, psn_queue_handler):
+            continue
+        logger.removeHandler(handler)
+        output = handler.output
+        direct = logging.StreamHandler(output.stream if output is not None else sys.stdout)
+        direct.setFormatter(output.formatter if output is not None else psn_text_formatter())
+        for log_filter in handler.filters:
+            if isinstance(log_filter, psn_rate_limit_filter):
+                log_filter = psn_rate_limit_filter(log_filter.rate, log_filter.burst, log_filter.sample_every,
+                                                   log_filter.max_keys)
+            direct.addFilter(log_filter)
+        logger.addHandler(direct)
@@ -0,0 +1,80 @@
+import io
+import json
+import logging
+import multiprocessing
+import queue
+
+from pypsn.logs import psn_queue_handler, psn_rate_limit_filter, setup_child_logging, setup_logging
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_per_key():
+    rate_filter = psn_rate_limit_filter(rate=0, burst=3)
+    passed = [rate_filter.filter(make_record("packet from %s", ip)) for ip in ["a"] * 10]
+    assert passed == [True] * 3 + [False] * 7
+    # a different message template has its own bucket, explicit keys split a template
+    assert rate_filter.filter(make_record("other message"))
+    assert rate_filter.filter(make_record("packet from %s", "b", key="b"))
+    # warnings without a key are never limited
+    assert all(rate_filter.filter(make_record("broken", level=logging.WARNING)) for _ in range(10))
+    assert rate_filter.suppressed_total == 7
+
+
+def test_sampling_reports_suppressed_count():
+    rate_filter = psn_rate_limit_filter(rate=1000, burst=1000, sample_every=4)
+    records = [make_record("tick") for _ in range(9)]
+    passed = [record for record in records if rate_filter.filter(record)]
+    assert passed == [records[0], records[4], records[8]]
+    assert not hasattr(passed[0], "suppressed")
+    assert passed[1].suppressed == 3
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = psn_queue_handler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record("message %d", i))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_pipeline_writes_json_lines():
+    stream = io.StringIO()
+    logger = logging.getLogger("pypsn.logs_test")
+    logger.propagate = False
+    pipeline = setup_logging(logging.DEBUG, json_format=True, stream=stream, logger=logger)
+    try:
+        logger.debug("cleanup: %d trackers", 3, extra={"expired_trackers": ["10.0.0.1_1"]})
+    finally:
+        pipeline.stop()
+    entry = json.loads(stream.getvalue())
+    assert entry["msg"] == "cleanup: 3 trackers"
+    assert entry["level"] == "DEBUG"
+    assert entry["expired_trackers"] == ["10.0.0.1_1"]
+    assert logger.handlers == []
+
+
+def log_from_child():
+    setup_child_logging(logging.getLogger("pypsn.logs_test.child"))
+    logging.getLogger("pypsn.logs_test.child").info("hello from %s", "worker")
+
+
+def test_child_logging_after_fork(tmp_path):
+    path = tmp_path / "log.txt"
+    logger = logging.getLogger("pypsn.logs_test.child")
+    logger.propagate = False
+    with open(path, "w") as stream:
+        pipeline = setup_logging(logging.INFO, stream=stream, logger=logger)
+        try:
+            # the child's records go straight to the output, not into the copied queue
+            process = multiprocessing.get_context("fork").Process(target=log_from_child)
+            process.start()
+            process.join(10)
+            assert process.exitcode == 0
+        finally:
+            pipeline.stop()
+    assert "INFO pypsn.logs_test.child: hello from worker" in path.read_text()
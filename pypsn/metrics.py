@@ -0,0 +1,192 @@
+#!/bin/env python3
+
+# Prometheus text exposition (format 0.0.4) for PSN and sACN runtime statistics.
+# Hot paths never format anything: they bump plain or per-thread counters, and all
+# the work of turning them into text happens when /metrics is scraped.
+
+from threading import get_ident
+
+from sacn.sending.sender_socket_base import TICK_LATENESS_BUCKETS
+
+# histogram bucket upper bounds in seconds for the receive stage latencies
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+
+class psn_counter:
+    # one slot per writing thread, so increments never contend and need no lock;
+    # the value is the sum over all slots and is only computed on scrape
+    def __init__(self):
+        self._shards = {}
+
+    def inc(self, amount=1):
+        shards = self._shards
+        ident = get_ident()
+        shards[ident] = shards.get(ident, 0) + amount
+
+    @property
+    def value(self):
+        return sum(list(self._shards.values()))
+
+
+class psn_metric_family:
+    def __init__(self, name: str, kind: str, help: str):
+        self.name = name
+        self.kind = kind  # "counter", "gauge" or "histogram"
+        self.help = help
+        self.samples = []  # (sample name, labels dict, value)
+
+    def add(self, labels: dict, value, suffix: str = ""):
+        self.samples.append((self.name + suffix, labels, value))
+        return self
+
+    def add_histogram(self, labels: dict, bounds, cumulative_counts, count, total):
+        for bound, cumulative in zip(bounds, cumulative_counts):
+            self.add({**labels, "le": format_value(bound)}, cumulative, "_bucket")
+        self.add({**labels, "le": "+Inf"}, count, "_bucket")
+        self.add(labels, count, "_count")
+        self.add(labels, total, "_sum")
+        return self
+
+
+class psn_counter_family:
+    # labelled sharded counters, children are created once and then only incremented
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels_names = tuple(labels)
+        self._children = {}
+
+    def labels(self, *values) -> psn_counter:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, psn_counter())
+        return child
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def collect(self):
+        family = psn_metric_family(self.name, "counter", self.help)
+        for values, child in list(self._children.items()):
+            family.add(dict(zip(self.labels_names, values)), child.value)
+        return [family]
+
+
+class psn_metrics:
+    def __init__(self):
+        self._collectors = []
+
+    def counter(self, name: str, help: str, labels=()) -> psn_counter_family:
+        counter = psn_counter_family(name, help, labels)
+        self.register(counter.collect)
+        return counter
+
+    def register(self, collector):
+        # collector() returns a list of psn_metric_family, called on every scrape
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        for collector in self._collectors:
+            for family in collector():
+                lines.append(f"# HELP {family.name} {escape_help(family.help)}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for name, labels, value in family.samples:
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def receive_stats_families(stats) -> list:
+    # pypsn.stats.psn_receive_stats -> per-source counters and stage latency histograms
+    packets = psn_metric_family("psn_packets_received_total", "counter", "PSN packets received per source")
+    received_bytes = psn_metric_family("psn_bytes_received_total", "counter", "PSN payload bytes received per source")
+    parse_errors = psn_metric_family("psn_parse_errors_total", "counter", "PSN packets that could not be parsed")
+    frames = psn_metric_family("psn_frames_total", "counter", "PSN data frames started per source")
+    incomplete = psn_metric_family(
+        "psn_frames_incomplete_total", "counter", "PSN data frames superseded before all of their packets arrived"
+    )
+    for src_ip, source in list(stats.sources.items()):
+        labels = {"source": src_ip}
+        packets.add(labels, source.packets)
+        received_bytes.add(labels, source.bytes)
+        parse_errors.add(labels, source.parse_errors)
+        frames.add(labels, source.frames)
+        incomplete.add(labels, source.frames_incomplete)
+
+    latency = psn_metric_family("psn_receive_stage_seconds", "histogram", "Time spent per receive stage")
+    for stage, histogram in stats.stages.items():
+        cumulative = [histogram.cumulative(int(bound * 1e9)) for bound in LATENCY_BUCKETS]
+        latency.add_histogram({"stage": stage}, LATENCY_BUCKETS, cumulative, histogram.count, histogram.total / 1e9)
+    return [packets, received_bytes, parse_errors, frames, incomplete, latency]
+
+
+def sacn_sender_families(sender) -> list:
+    # sacn.sACNsender -> per-universe send counts, unicast send errors and sending loop tick lateness
+    sent = psn_metric_family("sacn_packets_sent_total", "counter", "sACN data packets sent per universe")
+    for universe, count in sorted(sender.get_packets_sent().items()):
+        sent.add({"universe": universe}, count)
+    errors = psn_metric_family("sacn_send_errors_total", "counter", "Failed sACN unicast sends per universe and destination")
+    for universe, destinations in sorted(sender.get_send_errors().items()):
+        for destination, count in sorted(destinations.items()):
+            errors.add({"universe": universe, "destination": destination}, count)
+
+    ticks = sender.tick_statistics
+    lateness = psn_metric_family(
+        "sacn_sender_tick_lateness_seconds", "histogram", "How late the sACN sending loop started each tick"
+    )
+    cumulative, running = [], 0
+    for count in ticks.lateness_counts[:-1]:
+        running += count
+        cumulative.append(running)
+    lateness.add_histogram({}, TICK_LATENESS_BUCKETS[:-1], cumulative, ticks.ticks, ticks.lateness_sum)
+    late_max = psn_metric_family("sacn_sender_tick_lateness_max_seconds", "gauge", "Worst sACN tick lateness so far")
+    late_max.add({}, ticks.lateness_max)
+    return [sent, errors, lateness, late_max]
+
+
+def ingest_pool_families(pool) -> list:
+    # pypsn.shm.psn_ingest_pool -> counters the ingest processes keep in their shard headers
+    packets = psn_metric_family("psn_ingest_packets_total", "counter", "PSN data packets written per ingest process")
+    parse_errors = psn_metric_family("psn_ingest_parse_errors_total", "counter", "Unparsable PSN packets per ingest process")
+    dropped = psn_metric_family("psn_ingest_dropped_trackers_total", "counter", "Trackers dropped because the shard was full")
+    rows = psn_metric_family("psn_ingest_rows", "gauge", "Tracker rows in use per ingest process")
+    for shard, stats in enumerate(pool.stats()):
+        labels = {"shard": shard}
+        packets.add(labels, stats["packets"])
+        parse_errors.add(labels, stats["parse_errors"])
+        dropped.add(labels, stats["dropped_trackers"])
+        rows.add(labels, stats["rows"])
+    return [packets, parse_errors, dropped, rows]
+
+
+def quarantine_families(quarantine) -> list:
+    # pypsn.quarantine.psn_quarantine -> rejected packets per reason
+    rejected = psn_metric_family("psn_packets_rejected_total", "counter", "Malformed PSN packets rejected by reason")
+    for reason, count in sorted(dict(quarantine.counts).items()):
+        rejected.add({"reason": reason}, count)
+    return [rejected]
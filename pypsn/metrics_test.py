@@ -0,0 +1,82 @@
+from threading import Thread
+
+import sacn
+from pypsn import psn_parse_error
+from pypsn.metrics import psn_counter, psn_metrics, psn_metric_family, quarantine_families, receive_stats_families, sacn_sender_families
+from pypsn.quarantine import psn_quarantine
+from pypsn.stats import psn_receive_stats
+from sacn.sending.sender_socket_test import SenderSocketTest
+
+
+def test_counter_sums_thread_shards():
+    counter = psn_counter()
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 40000
+
+
+def test_render_text_format():
+    metrics = psn_metrics()
+    packets = metrics.counter("psn_test_total", "Test\ncounter", ("kind",))
+    packets.labels('da"ta').inc(3)
+    metrics.register(lambda: [psn_metric_family("psn_gauge", "gauge", "A gauge").add({}, 1.5)])
+    assert metrics.render().splitlines() == [
+        "# HELP psn_test_total Test\\ncounter",
+        "# TYPE psn_test_total counter",
+        'psn_test_total{kind="da\\"ta"} 3',
+        "# HELP psn_gauge A gauge",
+        "# TYPE psn_gauge gauge",
+        "psn_gauge 1.5",
+    ]
+
+
+def test_receive_stats_families():
+    stats = psn_receive_stats()
+    stats.record("10.0.0.1", 100, 0, 2_000, 30_000)
+    stats.record_frame("10.0.0.1", 1, 2)
+    stats.record("10.0.0.1", 100, 0, 2_000, 3_000)
+    stats.record_parse_error("10.0.0.1")
+    text = "\n".join(
+        f"{name} {labels} {value}" for family in receive_stats_families(stats) for name, labels, value in family.samples
+    )
+    assert "psn_packets_received_total {'source': '10.0.0.1'} 2" in text
+    assert "psn_parse_errors_total {'source': '10.0.0.1'} 1" in text
+    assert "psn_receive_stage_seconds_bucket {'stage': 'parse', 'le': '5e-06'} 2" in text
+    assert "psn_receive_stage_seconds_bucket {'stage': 'callback', 'le': '5e-06'} 1" in text
+    assert "psn_receive_stage_seconds_count {'stage': 'callback'} 2" in text
+
+
+def test_sacn_sender_families():
+    sender = sacn.sACNsender(socket=SenderSocketTest())
+    sender.activate_output(2)
+    sender._sender_handler.send_out(sender[2], 0)
+    sender.tick_statistics.record(0.003)
+    sender[2].send_errors["10.0.0.9"] = 3
+    sent, errors, lateness, late_max = sacn_sender_families(sender)
+    assert sent.samples == [("sacn_packets_sent_total", {"universe": 2}, 1)]
+    assert errors.samples == [("sacn_send_errors_total", {"universe": 2, "destination": "10.0.0.9"}, 3)]
+    buckets = {labels["le"]: value for name, labels, value in lateness.samples if name.endswith("_bucket")}
+    assert buckets["0.002"] == 0
+    assert buckets["0.005"] == 1
+    assert buckets["+Inf"] == 1
+    assert late_max.samples[0][2] == 0.003
+
+
+def test_quarantine_families():
+    quarantine = psn_quarantine()
+    quarantine.reject("10.0.0.1", b"\x00", psn_parse_error("truncated"))
+    quarantine.reject("10.0.0.1", b"\x00", psn_parse_error("truncated"))
+    quarantine.reject("10.0.0.1", b"\x00", psn_parse_error("missing_header"))
+    (family,) = quarantine_families(quarantine)
+    assert family.samples == [
+        ("psn_packets_rejected_total", {"reason": "missing_header"}, 1),
+        ("psn_packets_rejected_total", {"reason": "truncated"}, 2),
+    ]
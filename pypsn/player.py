@@ -0,0 +1,234 @@
+#!/bin/env python3
+
+# Reader and replayer for recordings written by pypsn.recorder.
+
+import mmap
+import os
+import socket
+import time
+from bisect import bisect_left
+from threading import Thread, Event
+
+from pypsn import logger, parse_psn_packet, psn_tracker_field
+from pypsn.quarantine import psn_quarantine
+from pypsn.recorder import (
+    PSN_REC_MAGIC,
+    CHUNK_TAG,
+    INDEX_TAG,
+    TRAILER_TAG,
+    file_header,
+    block_header,
+    record_header,
+    index_header,
+    index_entry,
+    trailer,
+)
+
+
+class psn_recording:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        # checked before mapping: mmap refuses empty files
+        if os.fstat(self._file.fileno()).st_size < file_header.size:
+            self._file.close()
+            raise ValueError(f"{path} is too short to be a PSN recording")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        magic, self.version, _, self.wall_start_ns, self.monotonic_start_ns = file_header.unpack_from(self._view, 0)
+        if magic != PSN_REC_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a PSN recording")
+        self._ip_cache = {}
+        # one (first timestamp, last timestamp, offset) entry per chunk, in file order
+        self.index = self._read_index_chain() or self._scan_blocks()
+        self._last_ts = [entry[1] for entry in self.index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mmap is None:
+            return
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # payload views are still referenced, the map goes away with them
+        self._file.close()
+        self._mmap = None
+
+    def _read_index_chain(self):
+        size = len(self._view)
+        if size < file_header.size + trailer.size:
+            return []
+        tag, offset = trailer.unpack_from(self._view, size - trailer.size)
+        if tag != TRAILER_TAG:
+            return []
+        index = []
+        while offset:
+            tag, count, _ = block_header.unpack_from(self._view, offset)
+            if tag != INDEX_TAG:
+                return []
+            body = offset + block_header.size
+            previous, = index_header.unpack_from(self._view, body)
+            entries = [
+                index_entry.unpack_from(self._view, body + index_header.size + i * index_entry.size)
+                for i in range(count)
+            ]
+            index[:0] = entries
+            offset = previous
+        return index
+
+    def _scan_blocks(self):
+        # no trailer (the recorder did not stop cleanly): walk the block headers instead
+        index = []
+        size = len(self._view)
+        offset = file_header.size
+        while offset + block_header.size <= size:
+            tag, count, length = block_header.unpack_from(self._view, offset)
+            end = offset + block_header.size + length
+            if end > size or tag not in (CHUNK_TAG, INDEX_TAG):
+                break  # truncated or trailing garbage
+            if tag == CHUNK_TAG and count:
+                first = record_header.unpack_from(self._view, offset + block_header.size)[0]
+                last = self._last_timestamp(offset + block_header.size, count)
+                index.append((first, last, offset))
+            offset = end
+        return index
+
+    def _last_timestamp(self, offset, count):
+        timestamp = 0
+        for _ in range(count):
+            timestamp, length, _, _ = record_header.unpack_from(self._view, offset)
+            offset += record_header.size + length
+        return timestamp
+
+    @property
+    def start_ns(self) -> int:
+        return self.index[0][0] if self.index else self.monotonic_start_ns
+
+    @property
+    def end_ns(self) -> int:
+        return self.index[-1][1] if self.index else self.monotonic_start_ns
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_wall_time(self, timestamp: int) -> float:
+        return (self.wall_start_ns + timestamp - self.monotonic_start_ns) / 1e9
+
+    def seek(self, show_time: float) -> int:
+        # index of the first chunk that can hold packets at or after show_time seconds
+        return bisect_left(self._last_ts, self.start_ns + int(show_time * 1e9))
+
+    def _ip(self, packed: bytes) -> str:
+        ip = self._ip_cache.get(packed)
+        if ip is None:
+            ip = self._ip_cache[packed] = socket.inet_ntoa(packed)
+        return ip
+
+    def packets(self, start: float = None, end: float = None):
+        # yields (timestamp ns, source ip, interface ip, payload) where payload is a
+        # memoryview into the mapped file, valid until the recording is closed
+        start_ns = None if start is None else self.start_ns + int(start * 1e9)
+        end_ns = None if end is None else self.start_ns + int(end * 1e9)
+        view = self._view
+        for chunk in range(0 if start is None else self.seek(start), len(self.index)):
+            first, _, offset = self.index[chunk]
+            if end_ns is not None and first > end_ns:
+                return
+            _, count, _ = block_header.unpack_from(view, offset)
+            offset += block_header.size
+            for _ in range(count):
+                timestamp, length, src, iface = record_header.unpack_from(view, offset)
+                offset += record_header.size
+                if end_ns is not None and timestamp > end_ns:
+                    return
+                if start_ns is None or timestamp >= start_ns:
+                    yield timestamp, self._ip(src), self._ip(iface), view[offset : offset + length]
+                offset += length
+
+    def __iter__(self):
+        return self.packets()
+
+
+def get_replay_socket(if_ip=None, ttl=1):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if if_ip is not None:
+        sock.setsockopt(socket.SOL_IP, socket.IP_MULTICAST_IF, socket.inet_aton(if_ip))
+    return sock
+
+
+class psn_player(Thread):
+    # Drop-in for pypsn.receiver that plays a recording instead of listening on the network.
+    # speed is a multiplier of the recorded timing, None or 0 replays as fast as possible.
+    # With a socket, datagrams are sent to (mcast_grp, mcast_port) instead of being parsed.
+    def __init__(
+        self,
+        recording: "psn_recording",
+        callback=None,
+        speed: float = 1.0,
+        start: float = None,
+        end: float = None,
+        sock=None,
+        mcast_grp="236.10.10.10",
+        mcast_port=56565,
+        fields=psn_tracker_field.ALL,
+        quarantine=None,
+    ):
+        Thread.__init__(self, name="psn player")
+        self.recording = recording
+        self.callback = callback
+        self.speed = speed
+        self.start_time = start
+        self.end_time = end
+        self.socket = sock
+        self.destination = (mcast_grp, mcast_port)
+        self.fields = fields  # tracker fields to decode, see pypsn.psn_tracker_field
+        self.quarantine = quarantine if quarantine is not None else psn_quarantine()
+        self.packets_played = 0
+        self._stop_event = Event()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        first_ts = None
+        started = time.perf_counter()
+        for timestamp, src_ip, _, payload in self.recording.packets(self.start_time, self.end_time):
+            if self._stop_event.is_set():
+                break
+            if self.speed:
+                if first_ts is None:
+                    first_ts = timestamp
+                delay = (timestamp - first_ts) / 1e9 / self.speed - (time.perf_counter() - started)
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            if self.socket is not None:
+                self.socket.sendto(payload, self.destination)
+            if self.callback is not None:
+                try:
+                    psn_data = parse_psn_packet(bytes(payload), src_ip, self.fields)
+                except Exception as e:
+                    self.quarantine.reject(src_ip, payload, e)
+                    psn_data = None
+                try:
+                    self.callback(psn_data)
+                except Exception as e:
+                    # like pypsn.receiver: a failing callback must not end the replay
+                    logger.error("Error handling PSN packet from %s: %s", src_ip, e, exc_info=True,
+                                 extra={"key": ("handler_error", src_ip)})
+            self.packets_played += 1
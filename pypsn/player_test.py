@@ -0,0 +1,123 @@
+import socket
+from struct import pack
+
+import pytest
+
+import pypsn
+from pypsn.player import psn_recording, psn_player
+from pypsn.recorder import psn_recorder, trailer
+
+
+def chunk(chunk_id, data, has_subchunks=False):
+    return pack("<HH", chunk_id, len(data) | (0x8000 if has_subchunks else 0)) + data
+
+
+def data_packet(frame_id, x):
+    header = chunk(pypsn.psn_data_chunk.PSN_DATA_PACKET_HEADER, pack("<QBBBB", 1000, 2, 3, frame_id, 1))
+    pos = chunk(pypsn.psn_tracker_chunk.PSN_DATA_TRACKER_POS, pack("<fff", x, 2.0, 3.0))
+    tracker = chunk(7, pos, True)
+    trackers = chunk(pypsn.psn_data_chunk.PSN_DATA_TRACKER_LIST, tracker, True)
+    return chunk(pypsn.psn_v2_chunk.PSN_DATA_PACKET, header + trackers, True)
+
+
+def make_recording(path, count=50, step_ns=10_000_000, **kwargs):
+    recorder = psn_recorder(path, **kwargs)
+    recorder.start()
+    for i in range(count):
+        recorder.record(data_packet(i % 256, float(i)), "10.0.0.1", "192.168.0.134", timestamp=1_000_000_000 + i * step_ns)
+    recorder.stop()
+
+
+def test_iterate_packets(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path, chunk_size=200, chunks_per_index=3)
+    with psn_recording(path) as recording:
+        assert len(recording.index) > 3
+        packets = [(t, src, iface, bytes(p)) for t, src, iface, p in recording]
+        assert len(packets) == 50
+        assert packets[0] == (1_000_000_000, "10.0.0.1", "192.168.0.134", data_packet(0, 0.0))
+        assert recording.duration == 0.49
+        del packets
+
+
+def test_seek(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path, chunk_size=200, chunks_per_index=3)
+    with psn_recording(path) as recording:
+        # 0.105s into the show: the first packet is the one recorded at 0.11s
+        timestamps = [t for t, _, _, _ in recording.packets(start=0.105, end=0.2)]
+        assert timestamps[0] == 1_110_000_000
+        assert timestamps[-1] == 1_200_000_000
+        assert len(timestamps) == 10
+        assert list(recording.packets(start=10)) == []
+
+
+def test_index_without_trailer(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path, chunk_size=200, chunks_per_index=3)
+    with psn_recording(path) as recording:
+        expected = recording.index
+    # simulate a recorder that never stopped cleanly
+    with open(path, "r+b") as f:
+        f.seek(-trailer.size, 2)
+        f.truncate()
+    with psn_recording(path) as recording:
+        assert recording.index == expected
+        assert sum(1 for _ in recording) == 50
+
+
+def test_replay_into_callback(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path)
+    received = []
+    with psn_recording(path) as recording:
+        player = psn_player(recording, received.append, speed=None)
+        player.start()
+        player.join()
+    assert player.packets_played == 50
+    assert isinstance(received[3], pypsn.psn_data_packet)
+    assert received[3].info.frame_id == 3
+    assert received[3].trackers[0].id == 7
+    assert received[3].trackers[0].src_ip == "10.0.0.1"
+    assert tuple(received[3].trackers[0].pos) == (3.0, 2.0, 3.0)
+
+
+def test_replay_to_socket(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path, count=5)
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.settimeout(2)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    with psn_recording(path) as recording:
+        player = psn_player(recording, speed=100, sock=sender, mcast_grp="127.0.0.1", mcast_port=sink.getsockname()[1])
+        player.start()
+        player.join()
+    assert [sink.recv(1500) for _ in range(5)] == [data_packet(i, float(i)) for i in range(5)]
+    sender.close()
+    sink.close()
+
+
+def test_replay_survives_failing_callback(tmp_path, caplog):
+    path = str(tmp_path / "show.psnrec")
+    make_recording(path, count=5)
+    received = []
+
+    def callback(packet):
+        if packet.info.frame_id == 1:
+            raise RuntimeError("broken monitor")
+        received.append(packet)
+
+    with psn_recording(path) as recording:
+        player = psn_player(recording, callback, speed=None)
+        player.start()
+        player.join()
+    assert [packet.info.frame_id for packet in received] == [0, 2, 3, 4]
+    assert "broken monitor" in caplog.text
+
+
+def test_empty_recording_is_rejected(tmp_path):
+    path = tmp_path / "empty.psnrec"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        psn_recording(str(path))
@@ -0,0 +1,91 @@
+#!/bin/env python3
+
+# Rejected packet bookkeeping for the receive path. Malformed datagrams are counted by
+# the psn_parse_error reason and the last few are kept, truncated, in a ring buffer so
+# a misbehaving server can be diagnosed without capturing traffic.
+#
+# Worker processes (pypsn.workers, pypsn.shm) cannot reach the parent's quarantine, they
+# build the sample themselves and send it over their queue as a psn_rejected.
+
+import time
+from collections import deque
+from threading import Lock
+
+
+def reject_sample(src_ip: str, data: bytes, error: Exception, max_bytes: int = 256) -> tuple:
+    # (time, src_ip, reason, detail, size, data); errors other than psn_parse_error are
+    # parser bugs, counted as "internal"
+    reason = getattr(error, "reason", "internal")
+    return (time.time(), src_ip, reason, str(error), len(data), bytes(data[:max_bytes]))
+
+
+class psn_rejected:
+    # a rejected packet on its way from a worker process to the parent's quarantine
+    def __init__(self, sample: tuple):
+        self.sample = sample
+
+    @property
+    def src_ip(self) -> str:
+        return self.sample[1]
+
+    @property
+    def reason(self) -> str:
+        return self.sample[2]
+
+    @property
+    def detail(self) -> str:
+        return self.sample[3]
+
+
+class psn_quarantine_forwarder:
+    # stands in for psn_quarantine in a worker process: send is called with a psn_rejected
+    def __init__(self, send, max_bytes: int = 256):
+        self.send = send
+        self.max_bytes = max_bytes
+
+    def reject(self, src_ip: str, data: bytes, error: Exception) -> str:
+        sample = reject_sample(src_ip, data, error, self.max_bytes)
+        self.send(psn_rejected(sample))
+        return sample[2]
+
+
+class psn_quarantine:
+    def __init__(self, capacity: int = 32, max_bytes: int = 256):
+        self.capacity = capacity
+        self.max_bytes = max_bytes  # bytes kept per sample
+        self.total = 0
+        self.counts = {}  # reason -> rejected packets
+        self.samples = deque(maxlen=capacity)  # (time, src_ip, reason, detail, size, data)
+        self._lock = Lock()
+
+    def reject(self, src_ip: str, data: bytes, error: Exception) -> str:
+        sample = reject_sample(src_ip, data, error, self.max_bytes)
+        self.add(sample)
+        return sample[2]
+
+    def add(self, sample: tuple):
+        # records a sample built by reject_sample, e.g. one a worker process sent over
+        reason = sample[2]
+        sample = sample[:5] + (sample[5][: self.max_bytes],)
+        with self._lock:
+            self.total += 1
+            self.counts[reason] = self.counts.get(reason, 0) + 1
+            self.samples.append(sample)
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+            self.counts = {}
+            self.samples.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, samples, total = dict(self.counts), list(self.samples), self.total
+        return {
+            "total": total,
+            "reasons": counts,
+            "samples": [
+                {"time": t, "src_ip": src_ip, "reason": reason, "detail": detail, "size": size, "data": data.hex()}
+                for t, src_ip, reason, detail, size, data in samples
+            ],
+        }
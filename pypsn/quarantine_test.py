@@ -0,0 +1,95 @@
+import random
+import socket
+import struct
+import time
+
+import pytest
+
+import pypsn
+from pypsn.generator import encode_chunk, encode_data_packet, encode_header, psn_server_stream
+from pypsn.quarantine import psn_quarantine
+
+
+def reason(buffer):
+    with pytest.raises(pypsn.psn_parse_error) as error:
+        pypsn.parse_psn_packet(buffer, "10.0.0.1")
+    return error.value.reason
+
+
+def test_rejects_by_reason():
+    packet = encode_data_packet([pypsn.psn_tracker(1, pos=pypsn.psn_vector3(1, 2, 3))], frame_id=1)
+    assert reason(b"\x55") == "truncated"
+    assert reason(packet[:-3]) == "truncated"
+    assert reason(struct.pack("<HH", pypsn.psn_v1_chunk.PSN_V1_DATA_PACKET, 0)) == "unsupported_version"
+    assert reason(struct.pack("<HH", 0x1234, 0)) == "unknown_packet"
+
+    tracker_list = encode_chunk(pypsn.psn_data_chunk.PSN_DATA_TRACKER_LIST, encode_chunk(1, b"", True), True)
+    assert reason(encode_chunk(pypsn.psn_v2_chunk.PSN_DATA_PACKET, tracker_list, True)) == "missing_header"
+    assert reason(encode_chunk(pypsn.psn_v2_chunk.PSN_INFO_PACKET, encode_chunk(1, b"name"), True)) == "missing_header"
+
+    short_header = encode_chunk(pypsn.psn_data_chunk.PSN_DATA_PACKET_HEADER, encode_header(1)[:8])
+    assert reason(encode_chunk(pypsn.psn_v2_chunk.PSN_DATA_PACKET, short_header + tracker_list, True)) == "bad_length"
+    header = encode_chunk(pypsn.psn_data_chunk.PSN_DATA_PACKET_HEADER, encode_header(1))
+    short_pos = encode_chunk(1, encode_chunk(pypsn.psn_tracker_chunk.PSN_DATA_TRACKER_POS, b"\x00" * 8), True)
+    body = header + encode_chunk(pypsn.psn_data_chunk.PSN_DATA_TRACKER_LIST, short_pos, True)
+    assert reason(encode_chunk(pypsn.psn_v2_chunk.PSN_DATA_PACKET, body, True)) == "bad_length"
+    # a sub-chunk the mask skips is still bounds checked, but its content is not
+    skipped = pypsn.parse_psn_packet(encode_chunk(pypsn.psn_v2_chunk.PSN_DATA_PACKET, body, True), "10.0.0.1", pypsn.psn_tracker_field.STATUS)
+    assert [tracker.id for tracker in skipped.trackers] == [1]
+
+
+def test_mangled_packets_only_raise_parse_errors():
+    stream = psn_server_stream(20)
+    packets = stream.info_packets(0.0) + stream.data_packets(1.0)
+    rng = random.Random(4)
+    for _ in range(2000):
+        packet = bytearray(rng.choice(packets))
+        if rng.random() < 0.5:
+            del packet[rng.randrange(len(packet)) :]
+        for _ in range(rng.randrange(1, 4)):
+            if packet:
+                packet[rng.randrange(len(packet))] = rng.randrange(256)
+        try:
+            pypsn.parse_psn_packet(bytes(packet), "10.0.0.1")
+        except pypsn.psn_parse_error:
+            pass
+
+
+def test_quarantine_keeps_counts_and_a_bounded_sample():
+    quarantine = psn_quarantine(capacity=2, max_bytes=4)
+    for n in range(3):
+        quarantine.reject("10.0.0.%d" % n, b"\x01\x02\x03\x04\x05", pypsn.psn_parse_error("truncated", "test"))
+    quarantine.reject("10.0.0.9", b"", KeyError("bug"))
+    snapshot = quarantine.snapshot()
+    assert snapshot["total"] == 4
+    assert snapshot["reasons"] == {"truncated": 3, "internal": 1}
+    assert [sample["src_ip"] for sample in snapshot["samples"]] == ["10.0.0.2", "10.0.0.9"]
+    assert snapshot["samples"][0]["data"] == "01020304" and snapshot["samples"][0]["size"] == 5
+    quarantine.reset()
+    assert quarantine.snapshot() == {"total": 0, "reasons": {}, "samples": []}
+
+
+def test_receiver_survives_bad_packets_and_callback_errors():
+    port = 56612
+    received = []
+
+    def callback(packet):
+        received.append(packet)
+        if packet is not None and packet.info.frame_id == 1:
+            raise RuntimeError("callback bug")
+
+    receiver = pypsn.receiver(callback, "0.0.0.0", mcast_port=port, timeout=0.1)
+    receiver.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for packet in (b"\x55\x67\xff\x7f", encode_data_packet([], frame_id=1), encode_data_packet([], frame_id=2)):
+            sender.sendto(packet, ("236.10.10.10", port))
+        deadline = time.monotonic() + 2
+        while len(received) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sender.close()
+        receiver.stop()
+    assert received[0] is None
+    assert [packet.info.frame_id for packet in received[1:]] == [1, 2]
+    assert receiver.quarantine.counts == {"truncated": 1}
@@ -0,0 +1,211 @@
+#!/bin/env python3
+
+# Append-only recorder for raw PSN datagrams.
+#
+# File layout (all integers little endian):
+#
+#   file header   magic, version, flags, wall clock start (ns), monotonic start (ns)
+#   block*        tag, entry count, body length, body
+#   trailer       tag, offset of the last index block (only present after a clean stop)
+#
+# A "PSNC" chunk block holds `count` length-prefixed records. Every record is a
+# record header (monotonic timestamp in ns, payload length, source ip, interface ip)
+# followed by the raw datagram. A "PSNI" index block starts with the offset of the
+# previous index block (0 for the first) followed by one entry per chunk written
+# since that block: first timestamp, last timestamp and file offset of the chunk.
+# If the process dies before the trailer is written, every block can still be
+# found by walking the block headers from the start of the file.
+
+import logging
+import os
+import socket
+import time
+from queue import SimpleQueue, Empty
+from struct import Struct
+from threading import Thread
+
+logger = logging.getLogger("pypsn.recorder")
+
+PSN_REC_MAGIC = b"PSNREC\r\n"
+PSN_REC_VERSION = 1
+
+CHUNK_TAG = b"PSNC"
+INDEX_TAG = b"PSNI"
+TRAILER_TAG = b"PSNT"
+
+file_header = Struct("<8sHHQQ")
+block_header = Struct("<4sII")
+record_header = Struct("<QH4s4s")
+index_header = Struct("<Q")
+index_entry = Struct("<QQQ")
+trailer = Struct("<4sQ")
+
+_STOP = object()
+
+
+class psn_recorder(Thread):
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = 64 * 1024,
+        chunks_per_index: int = 16,
+        flush_interval: float = 1.0,
+    ):
+        Thread.__init__(self, name="psn recorder", daemon=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunks_per_index = chunks_per_index
+        self.flush_interval = flush_interval
+        self.records_written = 0
+        self.bytes_written = 0
+        self.chunks_written = 0
+        self.write_errors = 0
+        self.failed = False  # set by the first write error, the recording stops there
+        # SimpleQueue.put never blocks, so the receive thread only pays for one append
+        self._queue = SimpleQueue()
+        self._file = None
+        self._chunk = bytearray()
+        self._chunk_count = 0
+        self._chunk_first_ts = 0
+        self._chunk_last_ts = 0
+        self._pending_index = []
+        self._last_index_offset = 0
+        self._ip_cache = {}
+
+    def record(self, data, src_ip: str, interface: str = "0.0.0.0", timestamp: int = None):
+        # Called on the receive thread: take the timestamp and hand off, nothing else
+        if self.failed:
+            return  # nothing would drain the queue into the file any more
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        self._queue.put((timestamp, data, src_ip, interface))
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self):
+        self._queue.put(_STOP)
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "wb", buffering=1024 * 1024)
+            self._file.write(
+                file_header.pack(PSN_REC_MAGIC, PSN_REC_VERSION, 0, time.time_ns(), time.monotonic_ns())
+            )
+        except OSError as e:
+            self._fail(e)
+        try:
+            running = True
+            while running:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except Empty:
+                    # receive side is idle, push the partial chunk out so a crash loses little
+                    self._write_chunk()
+                    self._flush()
+                    continue
+                # drain everything that queued up while we were busy writing
+                while True:
+                    if item is _STOP:
+                        running = False
+                        break
+                    if not self.failed:
+                        self._append(*item)
+                    try:
+                        item = self._queue.get_nowait()
+                    except Empty:
+                        break
+        finally:
+            self._close_file()
+
+    def _fail(self, error: OSError):
+        # a failed write leaves the file without a consistent end, so stop recording
+        # instead of appending blocks behind it; the blocks before it can still be read
+        logger.error("Recorder write error, recording stopped: %s", error)
+        self.write_errors += 1
+        self.failed = True
+
+    def _flush(self):
+        if self.failed:
+            return
+        try:
+            self._file.flush()
+        except OSError as e:
+            self._fail(e)
+
+    def _pack_ip(self, ip: str) -> bytes:
+        packed = self._ip_cache.get(ip)
+        if packed is None:
+            try:
+                packed = socket.inet_aton(ip)
+            except (OSError, TypeError):
+                packed = b"\x00\x00\x00\x00"
+            self._ip_cache[ip] = packed
+        return packed
+
+    def _append(self, timestamp, data, src_ip, interface):
+        if not self._chunk_count:
+            self._chunk_first_ts = timestamp
+        self._chunk_last_ts = timestamp
+        self._chunk += record_header.pack(
+            timestamp, len(data), self._pack_ip(src_ip), self._pack_ip(interface)
+        )
+        self._chunk += data
+        self._chunk_count += 1
+        if len(self._chunk) >= self.chunk_size:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if not self._chunk_count or self.failed:
+            return
+        try:
+            offset = self._file.tell()
+            self._file.write(block_header.pack(CHUNK_TAG, self._chunk_count, len(self._chunk)))
+            self._file.write(self._chunk)
+        except OSError as e:
+            self._fail(e)
+        else:
+            self._pending_index.append((self._chunk_first_ts, self._chunk_last_ts, offset))
+            self.records_written += self._chunk_count
+            self.bytes_written += len(self._chunk)
+            self.chunks_written += 1
+        self._chunk = bytearray()
+        self._chunk_count = 0
+        if len(self._pending_index) >= self.chunks_per_index:
+            self._write_index()
+
+    def _write_index(self):
+        if not self._pending_index or self.failed:
+            return
+        body = bytearray(index_header.pack(self._last_index_offset))
+        for entry in self._pending_index:
+            body += index_entry.pack(*entry)
+        try:
+            offset = self._file.tell()
+            self._file.write(block_header.pack(INDEX_TAG, len(self._pending_index), len(body)))
+            self._file.write(body)
+            self._file.flush()
+        except OSError as e:
+            self._fail(e)
+            return
+        self._last_index_offset = offset
+        self._pending_index = []
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._write_chunk()
+            self._write_index()
+            if self._last_index_offset and not self.failed:
+                self._file.write(trailer.pack(TRAILER_TAG, self._last_index_offset))
+            self._file.close()
+        except OSError as e:
+            logger.error("Recorder close error: %s", e)
+        self._file = None
@@ -0,0 +1,125 @@
+import socket
+
+from pypsn.recorder import (
+    psn_recorder,
+    file_header,
+    block_header,
+    record_header,
+    index_header,
+    index_entry,
+    trailer,
+    PSN_REC_MAGIC,
+    CHUNK_TAG,
+    INDEX_TAG,
+    TRAILER_TAG,
+)
+
+
+def read_blocks(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    magic = file_header.unpack_from(raw, 0)[0]
+    assert magic == PSN_REC_MAGIC
+    offset = file_header.size
+    blocks = []
+    while offset + block_header.size <= len(raw):
+        tag, count, length = block_header.unpack_from(raw, offset)
+        if tag == TRAILER_TAG:
+            break
+        body = raw[offset + block_header.size : offset + block_header.size + length]
+        blocks.append((offset, tag, count, body))
+        offset += block_header.size + length
+    return raw, blocks
+
+
+def read_records(body, count):
+    records = []
+    offset = 0
+    for _ in range(count):
+        timestamp, length, src, iface = record_header.unpack_from(body, offset)
+        offset += record_header.size
+        records.append((timestamp, socket.inet_ntoa(src), socket.inet_ntoa(iface), body[offset : offset + length]))
+        offset += length
+    assert offset == len(body)
+    return records
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    recorder = psn_recorder(path)
+    recorder.start()
+    recorder.record(b"first", "10.0.0.1", "192.168.0.134", timestamp=100)
+    recorder.record(b"second", "10.0.0.2", timestamp=200)
+    recorder.record(b"", "10.0.0.1", timestamp=300)
+    recorder.stop()
+
+    raw, blocks = read_blocks(path)
+    assert [b[1] for b in blocks] == [CHUNK_TAG, INDEX_TAG]
+    records = read_records(blocks[0][3], blocks[0][2])
+    assert records == [
+        (100, "10.0.0.1", "192.168.0.134", b"first"),
+        (200, "10.0.0.2", "0.0.0.0", b"second"),
+        (300, "10.0.0.1", "0.0.0.0", b""),
+    ]
+    assert recorder.records_written == 3
+
+    # the trailer points at the last index block, which covers the only chunk
+    tag, last_index = trailer.unpack_from(raw, len(raw) - trailer.size)
+    assert tag == TRAILER_TAG
+    assert last_index == blocks[1][0]
+    previous, = index_header.unpack_from(blocks[1][3], 0)
+    assert previous == 0
+    assert index_entry.unpack_from(blocks[1][3], index_header.size) == (100, 300, blocks[0][0])
+
+
+def test_chunks_and_index_blocks(tmp_path):
+    path = str(tmp_path / "show.psnrec")
+    recorder = psn_recorder(path, chunk_size=256, chunks_per_index=4)
+    recorder.start()
+    payload = bytes(range(100))
+    for i in range(100):
+        recorder.record(payload, "10.0.0.1", timestamp=i)
+    recorder.stop()
+
+    raw, blocks = read_blocks(path)
+    chunks = [b for b in blocks if b[1] == CHUNK_TAG]
+    indexes = [b for b in blocks if b[1] == INDEX_TAG]
+    assert len(chunks) > 4
+    assert len(indexes) == (len(chunks) + 3) // 4
+
+    timestamps = [r[0] for c in chunks for r in read_records(c[3], c[2])]
+    assert timestamps == list(range(100))
+
+    # index blocks are chained back to front and together cover every chunk
+    covered = []
+    previous = indexes[-1][0]
+    blocks_by_offset = {b[0]: b for b in blocks}
+    while previous:
+        _, _, count, body = blocks_by_offset[previous]
+        entries = [index_entry.unpack_from(body, index_header.size + i * index_entry.size) for i in range(count)]
+        covered = [e[2] for e in entries] + covered
+        previous, = index_header.unpack_from(body, 0)
+    assert covered == [c[0] for c in chunks]
+
+
+class full_disk:
+    def tell(self):
+        return 0
+
+    def write(self, data):
+        raise OSError(28, "No space left on device")
+
+    def flush(self):
+        pass
+
+
+def test_index_write_error_stops_recording():
+    recorder = psn_recorder("unused.psnrec")
+    recorder._file = full_disk()
+    recorder._pending_index = [(1, 2, file_header.size)]
+    recorder._write_index()
+    assert recorder.failed
+    assert recorder.write_errors == 1
+    # the writer thread no longer appends, so record must not queue into the void
+    recorder.record(b"late", "10.0.0.1")
+    assert recorder.pending == 0
@@ -0,0 +1,243 @@
+#!/bin/env python3
+
+# Maps PSN tracker positions to pan/tilt of moving heads and sends them as sACN.
+#
+# Fixture positions and orientations are in the PSN coordinate frame. In the fixture's
+# own frame the yoke turns around +z (pan 0 points along +x) and tilt is the angle
+# between the beam and +z. Orientation is given as x, y, z euler angles in degrees,
+# applied in z-y-x order. Every PSN frame all fixtures are solved in one NumPy pass.
+#
+# In sync mode the sender's own loop is off and the bridge sends every frame. A started
+# bridge resends the last frame while no PSN frames arrive, so the fixtures do not hit
+# the E1.31 data loss timeout (2.5 s) when the PSN server stops.
+
+import json
+import time
+from threading import Event, Lock, Thread
+from typing import List
+
+import numpy as np
+
+from pypsn import psn_data_packet
+from sacn import sACNsender
+
+
+class psn_fixture:
+    def __init__(
+        self,
+        universe: int,
+        address: int,
+        position,
+        orientation=(0.0, 0.0, 0.0),
+        pan_range=(-270.0, 270.0),
+        tilt_range=(-135.0, 135.0),
+        fine: bool = True,
+        tracker=None,
+    ):
+        if not 1 <= address <= (509 if fine else 511):
+            raise ValueError(f"address {address} does not leave room for pan/tilt channels")
+        self.universe = universe
+        self.address = address  # 1-based DMX address of the pan channel
+        self.position = tuple(position)
+        self.orientation = tuple(orientation)
+        self.pan_range = tuple(pan_range)
+        self.tilt_range = tuple(tilt_range)
+        self.fine = fine  # 16-bit: pan, pan fine, tilt, tilt fine; 8-bit: pan, tilt
+        self.tracker = tracker  # tracker id (any source) or "<src_ip>_<id>" key
+
+
+def rotation_matrices(orientations) -> np.ndarray:
+    # (N, 3) euler angles in degrees -> (N, 3, 3) matrices R = Rz @ Ry @ Rx
+    rx, ry, rz = np.radians(np.asarray(orientations, dtype=np.float64)).T
+    cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+    r = np.empty((len(cx), 3, 3))
+    r[:, 0, 0] = cz * cy
+    r[:, 0, 1] = cz * sy * sx - sz * cx
+    r[:, 0, 2] = cz * sy * cx + sz * sx
+    r[:, 1, 0] = sz * cy
+    r[:, 1, 1] = sz * sy * sx + cz * cx
+    r[:, 1, 2] = sz * sy * cx - cz * sx
+    r[:, 2, 0] = -sy
+    r[:, 2, 1] = cy * sx
+    r[:, 2, 2] = cy * cx
+    return r
+
+
+def load_patch(path: str) -> List["psn_fixture"]:
+    with open(path, "r") as f:
+        patch = json.load(f)
+    return [psn_fixture(**fixture) for fixture in patch["fixtures"]]
+
+
+class psn_sacn_bridge:
+    def __init__(self, fixtures: List["psn_fixture"], sender: "sACNsender", sync: bool = True, keepalive: float = 1.0):
+        self.fixtures = list(fixtures)
+        self.sender = sender
+        self.sync = sync
+        self.keepalive = keepalive  # seconds without a frame before the last one is resent (sync mode)
+        self.frames_sent = 0
+        self.keepalives_sent = 0
+        # the PSN thread and the keepalive thread share the outputs' sequence numbers
+        self._send_lock = Lock()
+        self._last_send = time.monotonic()
+        self._stop_event = Event()
+        self._keepalive_thread = None
+        n = len(self.fixtures)
+
+        self.positions = np.array([f.position for f in self.fixtures], dtype=np.float64).reshape(n, 3)
+        # world -> fixture frame is the transpose of the fixture's orientation
+        self.to_local = rotation_matrices(np.array([f.orientation for f in self.fixtures]).reshape(n, 3)).transpose(0, 2, 1)
+        pan_range = np.array([f.pan_range for f in self.fixtures], dtype=np.float64).reshape(n, 2)
+        tilt_range = np.array([f.tilt_range for f in self.fixtures], dtype=np.float64).reshape(n, 2)
+        self.pan_min, self.pan_span = pan_range[:, 0], pan_range[:, 1] - pan_range[:, 0]
+        self.tilt_min, self.tilt_span = tilt_range[:, 0], tilt_range[:, 1] - tilt_range[:, 0]
+
+        # one row of 512 slots per universe, written through flat channel indexes
+        self.universes = sorted({f.universe for f in self.fixtures})
+        self.frame = np.zeros((len(self.universes), 512), dtype=np.uint8)
+        row_of = {u: i for i, u in enumerate(self.universes)}
+        base = np.array([row_of[f.universe] * 512 + f.address - 1 for f in self.fixtures], dtype=np.intp)
+        fine = np.array([f.fine for f in self.fixtures], dtype=bool)
+        self._fine_base, self._coarse_base = base[fine], base[~fine]
+        self._fine, self._coarse = np.flatnonzero(fine), np.flatnonzero(~fine)
+
+        # tracker key -> row in self.targets, only for trackers some fixture follows
+        self._tracker_rows = {}
+        self.fixture_tracker = np.full(n, -1, dtype=np.intp)
+        self.targets = np.zeros((0, 3), dtype=np.float64)
+        self.target_valid = np.zeros(0, dtype=bool)
+        for i, fixture in enumerate(self.fixtures):
+            if fixture.tracker is not None:
+                self.assign(i, fixture.tracker)
+
+        self._frames = {}
+        # the outputs send straight from self.frame, render() writes into it in place
+        sender.bind_frame(self.frame, self.universes)
+        if sync:
+            # one synced flush per PSN frame instead of the sender's own loop
+            sender.manual_flush = True
+
+    def start(self) -> None:
+        # the sender's own loop refreshes the outputs unless they are flushed manually
+        if self.sync and self.keepalive and self._keepalive_thread is None:
+            self._stop_event.clear()
+            self._keepalive_thread = Thread(target=self._keepalive_loop, name="psn sacn keepalive", daemon=True)
+            self._keepalive_thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+
+    def _keepalive_loop(self):
+        while True:
+            delay = self._last_send + self.keepalive - time.monotonic()
+            if delay > 0:
+                if self._stop_event.wait(delay):
+                    return
+                continue
+            if self._stop_event.is_set():
+                return
+            self.refresh()
+
+    def refresh(self) -> None:
+        # resends the current frame as it is
+        with self._send_lock:
+            self.sender.update_frame(flush=True)
+            self._last_send = time.monotonic()
+            self.keepalives_sent += 1
+
+    def assign(self, fixture_index: int, tracker) -> None:
+        self.fixtures[fixture_index].tracker = tracker
+        if tracker is None:
+            self.fixture_tracker[fixture_index] = -1
+            return
+        row = self._tracker_rows.get(tracker)
+        if row is None:
+            row = self._tracker_rows[tracker] = len(self.targets)
+            self.targets = np.vstack((self.targets, np.zeros((1, 3))))
+            self.target_valid = np.append(self.target_valid, False)
+        self.fixture_tracker[fixture_index] = row
+
+    def update_trackers(self, trackers) -> None:
+        rows = self._tracker_rows
+        for tracker in trackers:
+            if tracker.pos is None:
+                continue
+            for key in (tracker.id, f"{tracker.src_ip}_{tracker.id}"):
+                row = rows.get(key)
+                if row is not None:
+                    self.targets[row] = (tracker.pos.x, tracker.pos.y, tracker.pos.z)
+                    self.target_valid[row] = True
+
+    def solve(self):
+        # returns pan and tilt in degrees for every fixture; fixtures without a
+        # valid tracker keep NaN and leave their channels untouched
+        n = len(self.fixtures)
+        pan = np.full(n, np.nan)
+        tilt = np.full(n, np.nan)
+        rows = self.fixture_tracker
+        active = rows >= 0
+        active[active] = self.target_valid[rows[active]]
+        if not active.any():
+            return pan, tilt
+        d = self.targets[rows[active]] - self.positions[active]
+        local = np.einsum("nij,nj->ni", self.to_local[active], d)
+        p = np.degrees(np.arctan2(local[:, 1], local[:, 0]))
+        t = np.degrees(np.arctan2(np.hypot(local[:, 0], local[:, 1]), local[:, 2]))
+        # the mirrored solution (pan + 180, -tilt) reaches the same point; use it when
+        # the direct one falls outside the tilt range, then wrap pan into its range
+        pan_min, pan_span = self.pan_min[active], self.pan_span[active]
+        tilt_min, tilt_span = self.tilt_min[active], self.tilt_span[active]
+        mirror = (t > tilt_min + tilt_span) | (t < tilt_min)
+        p = np.where(mirror, p + 180.0, p)
+        t = np.where(mirror, -t, t)
+        p = np.where(p > pan_min + pan_span, p - 360.0, p)
+        p = np.where(p < pan_min, p + 360.0, p)
+        pan[active] = p
+        tilt[active] = t
+        return pan, tilt
+
+    def render(self) -> np.ndarray:
+        pan, tilt = self.solve()
+        valid = ~np.isnan(pan)
+        u_pan = np.clip((np.nan_to_num(pan) - self.pan_min) / self.pan_span, 0.0, 1.0)
+        u_tilt = np.clip((np.nan_to_num(tilt) - self.tilt_min) / self.tilt_span, 0.0, 1.0)
+        flat = self.frame.reshape(-1)
+
+        sel = valid[self._fine]
+        if sel.any():
+            idx, base = self._fine[sel], self._fine_base[sel]
+            v_pan = np.rint(u_pan[idx] * 65535).astype(np.uint16)
+            v_tilt = np.rint(u_tilt[idx] * 65535).astype(np.uint16)
+            flat[base] = v_pan >> 8
+            flat[base + 1] = v_pan & 0xFF
+            flat[base + 2] = v_tilt >> 8
+            flat[base + 3] = v_tilt & 0xFF
+
+        sel = valid[self._coarse]
+        if sel.any():
+            idx, base = self._coarse[sel], self._coarse_base[sel]
+            flat[base] = np.rint(u_pan[idx] * 255)
+            flat[base + 1] = np.rint(u_tilt[idx] * 255)
+        return self.frame
+
+    def send(self) -> None:
+        with self._send_lock:
+            self.render()
+            self.sender.update_frame(flush=self.sync)
+            self._last_send = time.monotonic()
+            self.frames_sent += 1
+
+    def on_psn_data(self, data) -> None:
+        # feed every received packet; a frame is sent once all of its packets arrived
+        if not isinstance(data, psn_data_packet):
+            return
+        info = data.info
+        self.update_trackers(data.trackers)
+        frame_id, seen = self._frames.get(info.src_ip, (None, 0))
+        seen = seen + 1 if frame_id == info.frame_id else 1
+        self._frames[info.src_ip] = (info.frame_id, seen)
+        if seen >= max(info.packet_count, 1):
+            self.send()
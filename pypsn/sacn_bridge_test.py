@@ -0,0 +1,110 @@
+import time
+
+import numpy as np
+import pytest
+
+import pypsn
+import sacn
+from pypsn.sacn_bridge import psn_fixture, psn_sacn_bridge
+from sacn.messages.data_packet import calculate_multicast_addr
+from sacn.sending.sender_socket_test import SenderSocketTest
+
+
+def tracker_packet(src_ip, positions, frame_id=1, packet_count=1):
+    info = pypsn.psn_info(0, 2, 0, frame_id, packet_count, src_ip)
+    trackers = [
+        pypsn.psn_tracker(tracker_id, pos=pypsn.psn_vector3(*pos), src_ip=src_ip)
+        for tracker_id, pos in positions.items()
+    ]
+    return pypsn.psn_data_packet(info, trackers)
+
+
+def get_bridge(fixtures):
+    socket = SenderSocketTest()
+    sender = sacn.sACNsender(socket=socket)
+    socket._listener = sender._sender_handler
+    return psn_sacn_bridge(fixtures, sender), sender, socket
+
+
+def test_pan_tilt():
+    fixtures = [
+        psn_fixture(1, 1, (0, 0, 0), tracker=1),
+        psn_fixture(1, 5, (0, 0, 0), tracker=2),
+        psn_fixture(1, 9, (0, 0, 0), orientation=(0, 0, 90), tracker=2),
+        psn_fixture(2, 1, (0, 0, 0), tracker=3),
+        psn_fixture(2, 5, (0, 0, 0)),
+    ]
+    bridge, _, _ = get_bridge(fixtures)
+    bridge.update_trackers(tracker_packet("10.0.0.1", {1: (1, 0, 0), 2: (0, 1, 0), 3: (0, 0, 5)}).trackers)
+    pan, tilt = bridge.solve()
+    assert pan[:4] == pytest.approx([0, 90, 0, 0], abs=1e-9)
+    assert tilt[:4] == pytest.approx([90, 90, 90, 0], abs=1e-9)
+    # unassigned fixtures are left alone
+    assert np.isnan(pan[4])
+
+
+def test_mirrored_solution_stays_in_range():
+    fixture = psn_fixture(1, 1, (0, 0, 0), pan_range=(-270, 270), tilt_range=(-100, 100), tracker=1)
+    bridge, _, _ = get_bridge([fixture])
+    # 120 degrees away from +z is only reachable by panning around and tilting negative
+    bridge.update_trackers(tracker_packet("10.0.0.1", {1: (np.sin(np.radians(120)), 0, np.cos(np.radians(120)))}).trackers)
+    pan, tilt = bridge.solve()
+    assert pan[0] == pytest.approx(180)
+    assert tilt[0] == pytest.approx(-120)
+
+
+def test_dmx_values():
+    fixtures = [
+        psn_fixture(1, 1, (0, 0, 0), tracker="10.0.0.1_1"),
+        psn_fixture(1, 11, (0, 0, 0), fine=False, tracker=1),
+    ]
+    bridge, _, _ = get_bridge(fixtures)
+    bridge.update_trackers(tracker_packet("10.0.0.1", {1: (1, 0, 0)}).trackers)
+    frame = bridge.render()
+    pan16 = round(0.5 * 65535)
+    tilt16 = round((90 + 135) / 270 * 65535)
+    assert tuple(frame[0, 0:4]) == (pan16 >> 8, pan16 & 0xFF, tilt16 >> 8, tilt16 & 0xFF)
+    assert tuple(frame[0, 10:12]) == (round(0.5 * 255), round((90 + 135) / 270 * 255))
+    # the same tracker id from another server only moves the fixture patched to "any source"
+    bridge.update_trackers(tracker_packet("10.0.0.2", {1: (0, 1, 0)}).trackers)
+    frame = bridge.render()
+    assert tuple(frame[0, 0:4]) == (pan16 >> 8, pan16 & 0xFF, tilt16 >> 8, tilt16 & 0xFF)
+    assert frame[0, 10] == round((90 + 270) / 540 * 255)
+
+
+def test_sends_synced_frame_when_frame_complete():
+    bridge, sender, socket = get_bridge([psn_fixture(3, 1, (0, 0, 0), tracker=1)])
+    assert sender.manual_flush is True
+    assert sender.get_active_outputs() == (3,)
+
+    bridge.on_psn_data(tracker_packet("10.0.0.1", {1: (1, 0, 0)}, frame_id=7, packet_count=2))
+    assert bridge.frames_sent == 0
+    bridge.on_psn_data(tracker_packet("10.0.0.1", {}, frame_id=7, packet_count=2))
+    assert bridge.frames_sent == 1
+    assert socket.send_unicast_called[0].universe == 3
+    assert socket.send_unicast_called[0].dmxData[:4] == tuple(bridge.frame[0, :4])
+    assert socket.send_multicast_called[1] == calculate_multicast_addr(63999)
+
+    # info packets are ignored
+    bridge.on_psn_data(pypsn.psn_info_packet(pypsn.psn_info(0, 2, 0, 8, 1, "10.0.0.1"), b"server", []))
+    assert bridge.frames_sent == 1
+
+
+def test_keepalive_while_psn_is_silent():
+    socket = SenderSocketTest()
+    sender = sacn.sACNsender(socket=socket)
+    socket._listener = sender._sender_handler
+    bridge = psn_sacn_bridge([psn_fixture(3, 1, (0, 0, 0), tracker=1)], sender, keepalive=0.05)
+    bridge.on_psn_data(tracker_packet("10.0.0.1", {1: (1, 0, 0)}))
+    bridge.start()
+    try:
+        time.sleep(0.3)
+    finally:
+        bridge.stop()
+    assert bridge.frames_sent == 1
+    assert bridge.keepalives_sent >= 3
+    # the last frame is resent as it was
+    assert socket.send_unicast_called[0].dmxData[:4] == tuple(bridge.frame[0, :4])
+    sent = bridge.keepalives_sent
+    time.sleep(0.1)
+    assert bridge.keepalives_sent == sent
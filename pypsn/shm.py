@@ -0,0 +1,414 @@
+#!/bin/env python3
+
+# Multi-process PSN ingestion into a shared-memory tracker table.
+#
+# Each ingest process owns one shard of the table and is the only writer of its rows,
+# so writers never coordinate. Readers (the web process) never block writers: every
+# row carries a sequence number that is odd while the row is being written, seqlock
+# style, and a reader retries or skips a row whose sequence moved while it was read.
+#
+# Table layout (all integers little endian):
+#
+#   table header   magic, version, shard count, rows per shard, row size (32 bytes)
+#   shard header*  used rows, packets, parse errors, dropped trackers (32 bytes each)
+#   row*           sequence, tracker id, field mask, source ip, frame id, monotonic
+#                  and wall clock last seen, tracker timestamp, status, then x/y/z of
+#                  pos, speed, ori, accel and trgtpos
+#
+# Rows are handed out in arrival order and never move, so a reader only scans the
+# used rows of each shard and only decodes the rows whose sequence changed.
+
+import socket
+import time
+import zlib
+from multiprocessing import shared_memory
+from queue import Empty, Full
+from struct import Struct
+from threading import Thread
+
+from pypsn import logger, psn_data_packet, psn_info, psn_info_packet, psn_tracker, psn_tracker_field, psn_vector3, receiver
+from pypsn.logs import setup_child_logging
+from pypsn.quarantine import psn_quarantine, psn_quarantine_forwarder, psn_rejected
+
+PSN_SHM_MAGIC = b"PSNSHM\0\0"
+PSN_SHM_VERSION = 1
+
+table_header = Struct("<8sHHII12x")
+shard_header = Struct("<IIQQQ")  # used rows, reserved, packets, parse errors, dropped trackers
+row_seq = Struct("<I")
+row_body = Struct("<HH4sIddQf15f")
+ROW_SIZE = row_seq.size + row_body.size
+SHARD_HEADER_SIZE = 32
+
+FIELD_VECTORS = ("pos", "speed", "ori", "accel", "trgtpos")
+
+# frame id distances (modulo 256) that count as the same or an older frame when deduplicating
+OLD_FRAMES = frozenset([0, *range(128, 256)])
+# seconds after which a tracker's last frame id is no longer compared against, e.g. its source restarted
+DEDUP_RESET_S = 1.0
+
+
+def field_vectors(fields) -> tuple:
+    # (row mask bit, name) of the vectors selected by a psn_tracker_field mask
+    return tuple((bit, name) for bit, name in enumerate(FIELD_VECTORS) if fields & psn_tracker_field[name.upper()])
+
+
+class psn_source_shard:
+    # accepts the sources hashed to shard `index` of `count`; the hash only depends on
+    # the address so every process agrees on it
+    def __init__(self, index: int, count: int):
+        self.index = index
+        self.count = count
+        self._cache = {}
+
+    def __call__(self, src_ip: str) -> bool:
+        accepted = self._cache.get(src_ip)
+        if accepted is None:
+            accepted = self._cache[src_ip] = source_shard(src_ip, self.count) == self.index
+        return accepted
+
+
+def source_shard(src_ip: str, count: int) -> int:
+    try:
+        key = socket.inet_aton(src_ip)
+    except OSError:
+        key = src_ip.encode()
+    return zlib.crc32(key) % count
+
+
+class psn_shm_table:
+    def __init__(self, shm: "shared_memory.SharedMemory", owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        magic, version, self.shards, self.rows_per_shard, row_size = table_header.unpack_from(shm.buf, 0)
+        if magic != PSN_SHM_MAGIC or version != PSN_SHM_VERSION or row_size != ROW_SIZE:
+            raise ValueError(f"{shm.name} is not a PSN tracker table")
+        self.rows_offset = table_header.size + self.shards * SHARD_HEADER_SIZE
+
+    @classmethod
+    def create(cls, shards: int, rows_per_shard: int = 4096, name: str = None) -> "psn_shm_table":
+        size = table_header.size + shards * SHARD_HEADER_SIZE + shards * rows_per_shard * ROW_SIZE
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        table_header.pack_into(shm.buf, 0, PSN_SHM_MAGIC, PSN_SHM_VERSION, shards, rows_per_shard, ROW_SIZE)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "psn_shm_table":
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def shard_offset(self, shard: int) -> int:
+        return table_header.size + shard * SHARD_HEADER_SIZE
+
+    def row_offset(self, shard: int, row: int) -> int:
+        return self.rows_offset + (shard * self.rows_per_shard + row) * ROW_SIZE
+
+    def shard_stats(self, shard: int) -> dict:
+        used, _, packets, parse_errors, dropped = shard_header.unpack_from(self.shm.buf, self.shard_offset(shard))
+        return {"rows": used, "packets": packets, "parse_errors": parse_errors, "dropped_trackers": dropped}
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class psn_shm_writer:
+    # the single writer of one shard, lives in an ingest process; only the vectors in
+    # fields are written, the others read back as None
+    def __init__(self, table: "psn_shm_table", shard: int, fields=psn_tracker_field.ALL):
+        self.table = table
+        self.shard = shard
+        self.vectors = field_vectors(fields)
+        self.rows = {}  # (src_ip, tracker id) -> row
+        self.packets = 0
+        self.parse_errors = 0
+        self.dropped = 0
+        self._seqs = []
+
+    def write_packet(self, packet: "psn_data_packet"):
+        buf = self.table.shm.buf
+        info = packet.info
+        frame_id = info.frame_id if info is not None else 0
+        now, wall = time.monotonic(), time.time()
+        for tracker in packet.trackers:
+            key = (tracker.src_ip, tracker.id)
+            row = self.rows.get(key)
+            if row is None:
+                if len(self.rows) >= self.table.rows_per_shard:
+                    self.dropped += 1
+                    continue
+                row = self.rows[key] = len(self.rows)
+                self._seqs.append(0)
+            mask = 0
+            values = [0.0] * 15
+            for bit, name in self.vectors:
+                vector = getattr(tracker, name)
+                if vector is not None:
+                    mask |= 1 << bit
+                    values[bit * 3 : bit * 3 + 3] = (vector.x, vector.y, vector.z)
+            offset = self.table.row_offset(self.shard, row)
+            seq = self._seqs[row] + 1
+            row_seq.pack_into(buf, offset, seq & 0xFFFFFFFF)  # odd: row is being written
+            row_body.pack_into(
+                buf,
+                offset + row_seq.size,
+                tracker.id,
+                mask,
+                socket.inet_aton(tracker.src_ip or "0.0.0.0"),
+                frame_id,
+                now,
+                wall,
+                tracker.timestamp or 0,
+                tracker.status or 0.0,
+                *values,
+            )
+            self._seqs[row] = seq + 1
+            row_seq.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF)
+        self.packets += 1
+        self._write_header()
+
+    def count_parse_error(self):
+        self.parse_errors += 1
+        self._write_header()
+
+    def _write_header(self):
+        shard_header.pack_into(
+            self.table.shm.buf,
+            self.table.shard_offset(self.shard),
+            len(self.rows),
+            0,
+            self.packets,
+            self.parse_errors,
+            self.dropped,
+        )
+
+
+class psn_shm_reader:
+    # decodes the rows that changed since the last poll; one reader per thread. With dedup
+    # a tracker is handed out once per frame, for ingest interfaces that share a multicast
+    # group and so write the same trackers into their own shards
+    def __init__(self, table: "psn_shm_table", max_retries: int = 4, fields=psn_tracker_field.ALL, dedup: bool = False):
+        self.table = table
+        self.max_retries = max_retries
+        self.vectors = field_vectors(fields)
+        self.dedup = dedup
+        self.duplicates = 0
+        self._delivered = {}  # (src_ip, tracker id) -> (frame id, monotonic time) last handed out
+        self._seen = [[] for _ in range(table.shards)]  # last decoded sequence per row
+
+    def _sequences(self, shard: int, used: int) -> list:
+        start = self.table.row_offset(shard, 0)
+        with self.table.shm.buf[start : start + used * ROW_SIZE] as rows, rows.cast("I") as words:
+            return words[:: ROW_SIZE // 4].tolist()
+
+    def poll(self) -> list:
+        # returns one psn_data_packet per source and frame holding the changed trackers
+        buf = self.table.shm.buf
+        packets = {}
+        now = time.monotonic()
+        for shard in range(self.table.shards):
+            used = shard_header.unpack_from(buf, self.table.shard_offset(shard))[0]
+            seen = self._seen[shard]
+            if len(seen) < used:
+                seen.extend([0] * (used - len(seen)))
+            if not used:
+                continue
+            sequences = self._sequences(shard, used)
+            for row, seq in enumerate(sequences):
+                if seq == seen[row]:
+                    continue
+                decoded = self._read_row(shard, row, seq)
+                if decoded is None:
+                    continue  # caught mid-write too often, picked up on the next poll
+                seq, tracker, frame_id = decoded
+                seen[row] = seq
+                if self.dedup:
+                    # the same frame or an older one (8 bit frame ids, so modulo 256) from a
+                    # lagging shard; a tracker that was quiet for a while starts over
+                    key = (tracker.src_ip, tracker.id)
+                    last = self._delivered.get(key)
+                    if last is not None and now - last[1] < DEDUP_RESET_S and (frame_id - last[0]) & 0xFF in OLD_FRAMES:
+                        self.duplicates += 1
+                        continue
+                    self._delivered[key] = (frame_id, now)
+                packet = packets.get((tracker.src_ip, frame_id))
+                if packet is None:
+                    info = psn_info(0, 2, 0, frame_id, 1, tracker.src_ip)
+                    packet = packets[(tracker.src_ip, frame_id)] = psn_data_packet(info, [])
+                packet.trackers.append(tracker)
+        return list(packets.values())
+
+    def _read_row(self, shard: int, row: int, seq: int):
+        buf = self.table.shm.buf
+        offset = self.table.row_offset(shard, row)
+        for _ in range(self.max_retries):
+            if seq & 1 == 0:
+                body = row_body.unpack_from(buf, offset + row_seq.size)
+                if row_seq.unpack_from(buf, offset)[0] == seq:
+                    return seq, decode_row(body, self.vectors), body[3]
+            seq = row_seq.unpack_from(buf, offset)[0]
+        return None
+
+
+def decode_row(body, vectors=tuple(enumerate(FIELD_VECTORS))) -> "psn_tracker":
+    tracker_id, mask, src_ip, _, _, _, timestamp, status = body[:8]
+    tracker = psn_tracker(tracker_id, status=status, timestamp=timestamp, src_ip=socket.inet_ntoa(src_ip))
+    for bit, name in vectors:
+        if mask & (1 << bit):
+            setattr(tracker, name, psn_vector3(*body[8 + bit * 3 : 11 + bit * 3]))
+    return tracker
+
+
+def ingest_worker(table_name, shard, ip_addr, mcast_port, source_shards, info_queue, stop_event,
+                  fields=psn_tracker_field.ALL):
+    # ingest process main: receive, parse and write one shard until stop_event is set;
+    # only the tracker fields in `fields` are parsed and written
+    setup_child_logging()
+    table = psn_shm_table.attach(table_name)
+    writer = psn_shm_writer(table, shard, fields)
+
+    def callback(packet):
+        if isinstance(packet, psn_data_packet):
+            writer.write_packet(packet)
+        elif isinstance(packet, psn_info_packet):
+            try:
+                info_queue.put_nowait(packet)
+            except Full:
+                pass  # the web process is not keeping up, the next info packet follows in a second
+        else:
+            writer.count_parse_error()
+
+    def forward_rejected(rejected):
+        try:
+            info_queue.put_nowait(rejected)
+        except Full:
+            pass  # the count in the shard header still has it
+
+    accept = psn_source_shard(*source_shards) if source_shards is not None and source_shards[1] > 1 else None
+    # rejected packets go to the web process's quarantine along with the info packets
+    psn_receiver = receiver(callback, ip_addr, mcast_port, accept=accept, fields=fields,
+                            quarantine=psn_quarantine_forwarder(forward_rejected))
+    receiver_thread = Thread(target=psn_receiver.run, name=f"psn-ingest-{shard}")
+    receiver_thread.start()
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    psn_receiver.running = False
+    if psn_receiver.socket is not None:
+        psn_receiver.socket.close()
+    receiver_thread.join()
+    table.close()
+
+
+class psn_ingest_pool:
+    # one ingest process per interface and source shard, all writing into one table
+    def __init__(self, interfaces=("0.0.0.0",), processes: int = 1, mcast_port: int = 56565, rows_per_shard: int = 4096,
+                 fields=psn_tracker_field.ALL):
+        import multiprocessing
+
+        # fork keeps the caller's main module (the monitor, which starts receivers and servers
+        # at import) from being imported again in every worker; the workers replace the
+        # inherited logging handlers first thing, see setup_child_logging
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.interfaces = list(interfaces)
+        self.processes = max(1, int(processes))
+        self.mcast_port = mcast_port
+        self.fields = fields
+        self.table = psn_shm_table.create(len(self.interfaces) * self.processes, rows_per_shard)
+        self.info_queue = self.context.Queue(maxsize=1024)
+        self.stop_event = self.context.Event()
+        self.workers = []
+
+    def start(self):
+        shard = 0
+        for ip_addr in self.interfaces:
+            for index in range(self.processes):
+                worker = self.context.Process(
+                    target=ingest_worker,
+                    args=(self.table.name, shard, ip_addr, self.mcast_port, (index, self.processes), self.info_queue, self.stop_event,
+                          self.fields),
+                    name=f"psn-ingest-{shard}",
+                    daemon=True,
+                )
+                worker.start()
+                self.workers.append(worker)
+                shard += 1
+
+    def stats(self) -> list:
+        return [self.table.shard_stats(shard) for shard in range(self.table.shards)]
+
+    def stop(self, timeout: float = 5.0):
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        self.info_queue.close()
+        self.table.close()
+
+
+class psn_ingest_receiver(Thread):
+    # drop-in for pypsn.receiver: parsing happens in the ingest processes, this thread
+    # only polls the table and hands changed trackers and info packets to the callback
+    def __init__(
+        self,
+        callback,
+        interfaces=("0.0.0.0",),
+        processes: int = 1,
+        mcast_port: int = 56565,
+        rows_per_shard: int = 4096,
+        poll_interval: float = 0.02,
+        fields=psn_tracker_field.ALL,
+        quarantine=None,
+    ):
+        Thread.__init__(self, name="psn-ingest-poller")
+        self.callback = callback
+        self.quarantine = quarantine if quarantine is not None else psn_quarantine()  # rejected packets by reason
+        self.poll_interval = poll_interval
+        self.pool = psn_ingest_pool(interfaces, processes, mcast_port, rows_per_shard, fields)
+        self.reader = psn_shm_reader(self.pool.table, fields=fields, dedup=len(self.pool.interfaces) > 1)
+        self.running = True
+
+    def start(self):
+        self.pool.start()
+        Thread.start(self)
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join()
+        self.pool.stop()
+
+    def handle(self, packet):
+        if isinstance(packet, psn_rejected):
+            # the ingest process logged it already
+            self.quarantine.add(packet.sample)
+            return
+        try:
+            self.callback(packet)
+        except Exception as e:
+            # like pypsn.receiver: a failing callback must not stop the polling, the ingest
+            # processes would keep filling the table for nobody
+            src_ip = packet.info.src_ip if packet.info is not None else None
+            logger.error("Error handling PSN packet from %s: %s", src_ip, e, exc_info=True,
+                         extra={"key": ("handler_error", src_ip)})
+
+    def run(self):
+        info_queue = self.pool.info_queue
+        while self.running:
+            started = time.monotonic()
+            while True:
+                try:
+                    self.handle(info_queue.get_nowait())
+                except Empty:
+                    break
+            for packet in self.reader.poll():
+                self.handle(packet)
+            time.sleep(max(0.0, self.poll_interval - (time.monotonic() - started)))
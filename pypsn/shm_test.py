@@ -0,0 +1,146 @@
+import multiprocessing
+
+import pytest
+
+from pypsn import parse_psn_packet, psn_data_packet, psn_info, psn_parse_error, psn_tracker, psn_tracker_field, psn_vector3
+from pypsn.quarantine import psn_quarantine, psn_quarantine_forwarder
+from pypsn.shm import ROW_SIZE, psn_ingest_receiver, psn_shm_reader, psn_shm_table, psn_shm_writer, psn_source_shard, row_seq
+
+
+def data_packet(src_ip, frame_id, trackers):
+    info = psn_info(0, 2, 0, frame_id, 1, src_ip)
+    return psn_data_packet(info, [psn_tracker(i, pos=psn_vector3(x, 2, 3), src_ip=src_ip, status=0.5) for i, x in trackers])
+
+
+@pytest.fixture
+def table():
+    table = psn_shm_table.create(2, rows_per_shard=4)
+    yield table
+    table.close()
+
+
+def test_reader_sees_only_changed_rows(table):
+    writer = psn_shm_writer(table, 1)
+    reader = psn_shm_reader(table)
+    writer.write_packet(data_packet("10.0.0.1", 5, [(1, 1.0), (2, 2.0)]))
+
+    packets = reader.poll()
+    assert len(packets) == 1
+    assert packets[0].info.src_ip == "10.0.0.1"
+    assert packets[0].info.frame_id == 5
+    trackers = {t.id: t for t in packets[0].trackers}
+    assert trackers[2].pos == psn_vector3(2, 2, 3)
+    assert trackers[2].status == 0.5
+    assert trackers[2].speed is None
+    assert reader.poll() == []
+
+    writer.write_packet(data_packet("10.0.0.1", 6, [(2, 4.0)]))
+    (packet,) = reader.poll()
+    assert [t.id for t in packet.trackers] == [2]
+    assert packet.trackers[0].pos.x == 4.0
+    assert table.shard_stats(1) == {"rows": 2, "packets": 2, "parse_errors": 0, "dropped_trackers": 0}
+
+
+def test_only_selected_fields_are_written(table):
+    writer = psn_shm_writer(table, 0, fields=psn_tracker_field.SPEED | psn_tracker_field.STATUS)
+    reader = psn_shm_reader(table, fields=psn_tracker_field.SPEED | psn_tracker_field.STATUS)
+    packet = data_packet("10.0.0.1", 1, [(1, 1.0)])
+    packet.trackers[0].speed = psn_vector3(4, 5, 6)
+    writer.write_packet(packet)
+    (tracker,) = reader.poll()[0].trackers
+    assert tracker.pos is None
+    assert tracker.speed == psn_vector3(4, 5, 6)
+
+
+def test_dedup_across_shards(table):
+    # two interfaces on one multicast group write the same trackers into their shards
+    writers = [psn_shm_writer(table, 0), psn_shm_writer(table, 1)]
+    reader = psn_shm_reader(table, dedup=True)
+    writers[0].write_packet(data_packet("10.0.0.1", 5, [(1, 1.0), (2, 2.0)]))
+    writers[1].write_packet(data_packet("10.0.0.1", 5, [(1, 1.0)]))
+    (packet,) = reader.poll()
+    assert sorted(t.id for t in packet.trackers) == [1, 2]
+    writers[1].write_packet(data_packet("10.0.0.1", 5, [(2, 2.0)]))  # the late copy
+    assert reader.poll() == []
+    writers[1].write_packet(data_packet("10.0.0.1", 6, [(2, 3.0)]))
+    writers[0].write_packet(data_packet("10.0.0.1", 6, [(2, 3.0)]))
+    (packet,) = reader.poll()
+    assert [t.id for t in packet.trackers] == [2]
+    assert reader.duplicates == 3
+    # a lagging shard does not hand out an older frame after a newer one, also across the wrap
+    for frame_id in (120, 240, 3):
+        writers[0].write_packet(data_packet("10.0.0.1", frame_id, [(1, 1.0)]))
+        assert reader.poll()[0].info.frame_id == frame_id
+    writers[1].write_packet(data_packet("10.0.0.1", 240, [(1, 1.0)]))
+    assert reader.poll() == []
+    assert reader.duplicates == 4
+
+
+def test_full_shard_drops_new_trackers(table):
+    writer = psn_shm_writer(table, 0)
+    writer.write_packet(data_packet("10.0.0.1", 1, [(i, 0.0) for i in range(6)]))
+    assert table.shard_stats(0)["rows"] == 4
+    assert table.shard_stats(0)["dropped_trackers"] == 2
+
+
+def test_row_being_written_is_skipped(table):
+    writer = psn_shm_writer(table, 0)
+    reader = psn_shm_reader(table)
+    writer.write_packet(data_packet("10.0.0.1", 1, [(1, 1.0)]))
+    offset = table.row_offset(0, 0)
+    row_seq.pack_into(table.shm.buf, offset, 3)  # as if the writer stopped halfway
+    assert reader.poll() == []
+    row_seq.pack_into(table.shm.buf, offset, 4)
+    assert len(reader.poll()) == 1
+    assert ROW_SIZE % 8 == 0
+
+
+def test_source_shards_partition_sources():
+    shards = [psn_source_shard(i, 3) for i in range(3)]
+    for n in range(50):
+        src_ip = f"10.0.0.{n}"
+        assert sum(shard(src_ip) for shard in shards) == 1
+
+
+def write_from_process(name):
+    table = psn_shm_table.attach(name)
+    writer = psn_shm_writer(table, 0)
+    for frame_id in range(100):
+        writer.write_packet(data_packet("10.0.0.9", frame_id, [(1, float(frame_id))]))
+    table.close()
+
+
+def test_table_is_shared_between_processes(table):
+    process = multiprocessing.get_context("fork").Process(target=write_from_process, args=(table.name,))
+    process.start()
+    process.join(10)
+    (packet,) = psn_shm_reader(table).poll()
+    assert packet.trackers[0].pos.x == 99.0
+    assert table.shard_stats(0)["packets"] == 100
+
+
+def test_failing_callback_is_logged(caplog):
+    def callback(packet):
+        raise RuntimeError("broken monitor")
+
+    ingest = psn_ingest_receiver(callback, rows_per_shard=4)
+    try:
+        ingest.handle(data_packet("10.0.0.1", 1, [(1, 1.0)]))
+    finally:
+        ingest.pool.stop()
+    assert "broken monitor" in caplog.text
+
+
+def test_rejected_packets_reach_the_quarantine():
+    quarantine = psn_quarantine()
+    ingest = psn_ingest_receiver(lambda packet: None, rows_per_shard=4, quarantine=quarantine)
+    try:
+        # what an ingest process's receiver does with a malformed datagram, minus the queue
+        forwarder = psn_quarantine_forwarder(ingest.handle)
+        with pytest.raises(psn_parse_error) as error:
+            parse_psn_packet(b"\x55", "10.0.0.1")
+        assert forwarder.reject("10.0.0.1", b"\x55", error.value) == "truncated"
+    finally:
+        ingest.pool.stop()
+    assert quarantine.counts == {"truncated": 1}
+    assert quarantine.snapshot()["samples"][0]["src_ip"] == "10.0.0.1"
@@ -0,0 +1,158 @@
+#!/bin/env python3
+
+# Shared tracker/system state between the receive thread, the cleaner and web readers.
+#
+# Writers (receiver and cleaner) serialize on a short mutex and publish every change
+# by bumping a sequence counter around it, seqlock style: odd while a write is in
+# progress, even otherwise. Each changed key is appended to a journal. Readers never
+# take the mutex: a psn_state_view remembers the generation it has seen and only
+# re-reads the keys journaled since, retrying if a write overlapped, so refreshing a
+# snapshot costs O(changed keys). Entries are immutable (value, last_seen, stale)
+# tuples, values must not be mutated after being put.
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# readers give up on lock-free reads after this many overlapping writes and take the lock
+MAX_READ_RETRIES = 8
+
+
+class psn_state_table:
+    def __init__(self, journal_size: int = 65536):
+        self.journal_size = journal_size
+        self._entries = {}  # key -> (value, last_seen, stale)
+        self._active = OrderedDict()  # active keys, least recently seen first
+        self._journal = []  # changed keys, the key at index i changed in generation _journal_base + i + 1
+        self._journal_base = 0
+        self._seq = 0
+        self._lock = Lock()
+        self.generation = 0
+
+    def _begin(self):
+        self._lock.acquire()
+        self._seq += 1
+
+    def _end(self):
+        self._seq += 1
+        self._lock.release()
+
+    def _changed(self, key):
+        self.generation += 1
+        self._journal.append(key)
+        if len(self._journal) > self.journal_size:
+            half = len(self._journal) // 2
+            self._journal = self._journal[half:]
+            self._journal_base += half
+
+    def put(self, key, value, now: float = None):
+        self.put_many(((key, value),), now)
+
+    def put_many(self, items, now: float = None):
+        now = time.monotonic() if now is None else now
+        self._begin()
+        try:
+            for key, value in items:
+                self._entries[key] = (value, now, False)
+                self._active[key] = None
+                self._active.move_to_end(key)
+                self._changed(key)
+        finally:
+            self._end()
+
+    def expire(self, max_age: float, now: float = None) -> list:
+        # marks entries not seen for max_age seconds as stale, oldest first, so the
+        # work is proportional to the number of entries that expire
+        now = time.monotonic() if now is None else now
+        expired = []
+        self._begin()
+        try:
+            for key in self._active:
+                value, last_seen, _ = self._entries[key]
+                if now - last_seen <= max_age:
+                    break
+                expired.append(key)
+            for key in expired:
+                value, last_seen, _ = self._entries[key]
+                self._entries[key] = (value, last_seen, True)
+                del self._active[key]
+                self._changed(key)
+        finally:
+            self._end()
+        return expired
+
+    def forget(self, key):
+        self._begin()
+        try:
+            if self._entries.pop(key, None) is not None:
+                self._active.pop(key, None)
+                self._changed(key)
+        finally:
+            self._end()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        return default if entry is None else entry[0]
+
+    def last_seen(self, key):
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    @property
+    def stale_count(self) -> int:
+        return len(self._entries) - len(self._active)
+
+    def _read_changes(self, since: int):
+        # (generation, changed keys or None for "everything", {key: entry}) as of one generation
+        for attempt in range(MAX_READ_RETRIES + 1):
+            locked = attempt == MAX_READ_RETRIES
+            if locked:
+                self._lock.acquire()
+            try:
+                seq = self._seq
+                if seq & 1 and not locked:
+                    time.sleep(0)
+                    continue
+                generation = self.generation
+                journal, base = self._journal, self._journal_base
+                if since < base:
+                    keys = None
+                    entries = dict(self._entries)
+                else:
+                    keys = set(journal[since - base : generation - base])
+                    entries = {key: self._entries.get(key) for key in keys}
+                if locked or self._seq == seq:
+                    return generation, keys, entries
+            finally:
+                if locked:
+                    self._lock.release()
+
+
+class psn_state_view:
+    # a reader's copy of a table, split into active and stale; not thread safe, readers
+    # on several threads share one view under a lock (a view per thread copies the table once each)
+    def __init__(self, table: "psn_state_table"):
+        self.table = table
+        self.generation = -1
+        self.active = {}
+        self.stale = {}
+
+    def refresh(self) -> set:
+        # brings the view up to date and returns the keys that changed (all keys after a resync)
+        generation, keys, entries = self.table._read_changes(self.generation)
+        if keys is None:
+            self.active, self.stale = {}, {}
+            keys = set(entries)
+        self.generation = generation
+        active, stale = self.active, self.stale
+        for key in keys:
+            entry = entries.get(key)
+            active.pop(key, None)
+            stale.pop(key, None)
+            if entry is not None:
+                (stale if entry[2] else active)[key] = entry[0]
+        return keys
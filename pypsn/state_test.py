@@ -0,0 +1,72 @@
+from threading import Thread
+
+from pypsn.state import psn_state_table, psn_state_view
+
+
+def test_view_tracks_puts_and_expiry():
+    table = psn_state_table()
+    view = psn_state_view(table)
+    table.put_many([("a", {"n": 1}), ("b", {"n": 1})], now=0.0)
+    assert view.refresh() == {"a", "b"}
+    assert view.active == {"a": {"n": 1}, "b": {"n": 1}}
+
+    table.put("a", {"n": 2}, now=5.0)
+    assert table.expire(3.0, now=6.0) == ["b"]
+    assert view.refresh() == {"a", "b"}
+    assert view.active == {"a": {"n": 2}}
+    assert view.stale == {"b": {"n": 1}}
+    assert (table.active_count, table.stale_count) == (1, 1)
+
+    # an update brings a stale entry back, nothing else is re-read
+    table.put("b", {"n": 3}, now=7.0)
+    assert view.refresh() == {"b"}
+    assert view.active == {"a": {"n": 2}, "b": {"n": 3}}
+    assert view.stale == {}
+    assert view.refresh() == set()
+
+    table.forget("a")
+    view.refresh()
+    assert view.active == {"b": {"n": 3}}
+
+
+def test_expire_only_walks_expired_entries():
+    table = psn_state_table()
+    for i in range(100):
+        table.put(i, i, now=float(i))
+    assert table.expire(10.0, now=100.0) == list(range(90))
+    assert table.expire(10.0, now=100.0) == []
+    table.put(0, 0, now=100.0)
+    assert table.expire(5.0, now=101.0) == list(range(90, 96))
+
+
+def test_view_resyncs_after_journal_wraps():
+    table = psn_state_table(journal_size=8)
+    view = psn_state_view(table)
+    table.put("a", 0)
+    view.refresh()
+    for i in range(50):
+        table.put(i % 20, i)
+    assert len(view.refresh()) == 21
+    assert view.active[19] == 39
+    assert view.active["a"] == 0
+
+
+def test_concurrent_writer_and_reader():
+    table = psn_state_table(journal_size=64)
+    view = psn_state_view(table)
+    done = []
+
+    def write():
+        for i in range(20000):
+            # both keys always change together, a consistent snapshot never sees them differ
+            table.put_many([("x", i), ("y", i)])
+        done.append(True)
+
+    writer = Thread(target=write)
+    writer.start()
+    while not done:
+        view.refresh()
+        assert view.active.get("x") == view.active.get("y")
+    writer.join()
+    view.refresh()
+    assert view.active == {"x": 19999, "y": 19999}
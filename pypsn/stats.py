@@ -0,0 +1,205 @@
+#!/bin/env python3
+
+# Receive path instrumentation: per-stage latency histograms and per-source rates.
+# Everything here is written by the receive thread only and read by whoever wants
+# a snapshot, so recording is a handful of integer operations and no locks.
+
+import socket
+import sys
+import time
+from struct import Struct
+
+# SO_TIMESTAMPNS is missing from the socket module on most builds; 35 is the Linux value
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+SCM_TIMESTAMPNS = getattr(socket, "SCM_TIMESTAMPNS", SO_TIMESTAMPNS)
+_timespec = Struct("@ll")
+
+RECEIVE_STAGES = ("socket", "parse", "callback", "total")
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class psn_histogram:
+    # HDR-style log-linear buckets: exact below 2**sub_bucket_bits, then every power of
+    # two is split into 2**(sub_bucket_bits - 1) buckets (~6% relative error with 4 bits)
+    def __init__(self, sub_bucket_bits: int = 4, max_value_bits: int = 40):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.half = self.sub_buckets >> 1
+        self.counts = [0] * (self.sub_buckets + (max_value_bits - sub_bucket_bits) * self.half)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def bucket(self, value: int) -> int:
+        if value < self.sub_buckets:
+            return value if value > 0 else 0
+        shift = value.bit_length() - self.sub_bucket_bits
+        return min(self.sub_buckets + (shift - 1) * self.half + (value >> shift) - self.half, len(self.counts) - 1)
+
+    def bucket_bounds(self, index: int):
+        if index < self.sub_buckets:
+            return index, index
+        j = index - self.sub_buckets
+        shift = j // self.half + 1
+        m = j % self.half + self.half
+        return m << shift, ((m + 1) << shift) - 1
+
+    def record(self, value: int):
+        self.counts[self.bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        target = self.count * p / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(self.bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def cumulative(self, value: int) -> int:
+        # samples in buckets up to and including the one holding value
+        return sum(self.counts[: self.bucket(value) + 1])
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "min": self.min or 0,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0,
+            "percentiles": {str(p): self.percentile(p) for p in PERCENTILES},
+        }
+
+
+class psn_source_stats:
+    def __init__(self, now: float):
+        self.packets = 0
+        self.bytes = 0
+        self.packets_per_second = 0.0
+        self.bytes_per_second = 0.0
+        self.parse_errors = 0
+        self.frames = 0
+        self.frames_incomplete = 0  # data frames that moved on before all their packets arrived
+        self._frame_id = None
+        self._frame_seen = 0
+        self._frame_expected = 0
+        self._window_start = now
+        self._window_packets = 0
+        self._window_bytes = 0
+
+    def record(self, size: int, now: float, window: float):
+        self.packets += 1
+        self.bytes += size
+        self._window_packets += 1
+        self._window_bytes += size
+        elapsed = now - self._window_start
+        if elapsed >= window:
+            self.packets_per_second = self._window_packets / elapsed
+            self.bytes_per_second = self._window_bytes / elapsed
+            self._window_start = now
+            self._window_packets = 0
+            self._window_bytes = 0
+
+    def record_frame(self, frame_id: int, packet_count: int):
+        if frame_id != self._frame_id:
+            if self._frame_id is not None and self._frame_seen < self._frame_expected:
+                self.frames_incomplete += 1
+            self.frames += 1
+            self._frame_id = frame_id
+            self._frame_seen = 0
+            self._frame_expected = packet_count
+        self._frame_seen += 1
+
+    def snapshot(self, now: float, window: float) -> dict:
+        # a source that went quiet has no fresh window, report it as idle
+        idle = now - self._window_start > 2 * window
+        return {
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "parse_errors": self.parse_errors,
+            "frames": self.frames,
+            "frames_incomplete": self.frames_incomplete,
+            "packets_per_second": 0.0 if idle else round(self.packets_per_second, 1),
+            "bytes_per_second": 0.0 if idle else round(self.bytes_per_second, 1),
+        }
+
+
+class psn_receive_stats:
+    def __init__(self, rate_window: float = 1.0):
+        self.rate_window = rate_window
+        self.stages = {stage: psn_histogram() for stage in RECEIVE_STAGES}
+        self.sources = {}
+        self.kernel_timestamps = False
+
+    def record(self, src_ip: str, size: int, received_ns: int, parsed_ns: int, done_ns: int, socket_ns: int = None):
+        # received/parsed/done are perf_counter_ns() readings; socket_ns is how long the
+        # datagram waited between the kernel timestamp and recvmsg() returning
+        stages = self.stages
+        if socket_ns is not None and socket_ns >= 0:
+            stages["socket"].record(socket_ns)
+        stages["parse"].record(parsed_ns - received_ns)
+        stages["callback"].record(done_ns - parsed_ns)
+        stages["total"].record(done_ns - received_ns + (socket_ns if socket_ns and socket_ns > 0 else 0))
+        now = done_ns / 1e9
+        source = self.sources.get(src_ip)
+        if source is None:
+            source = self.sources[src_ip] = psn_source_stats(now)
+        source.record(size, now, self.rate_window)
+
+    # both are called right after record() for the same packet, so the source exists
+    def record_parse_error(self, src_ip: str):
+        self.sources[src_ip].parse_errors += 1
+
+    def record_frame(self, src_ip: str, frame_id: int, packet_count: int):
+        self.sources[src_ip].record_frame(frame_id, packet_count)
+
+    def reset(self):
+        for histogram in self.stages.values():
+            histogram.reset()
+
+    def snapshot(self) -> dict:
+        now = time.perf_counter_ns() / 1e9
+        return {
+            "unit": "ns",
+            "kernel_timestamps": self.kernel_timestamps,
+            "stages": {stage: histogram.snapshot() for stage, histogram in self.stages.items()},
+            "sources": {ip: source.snapshot(now, self.rate_window) for ip, source in list(self.sources.items())},
+        }
+
+
+def enable_kernel_timestamps(sock) -> bool:
+    if SO_TIMESTAMPNS is None or not hasattr(sock, "recvmsg"):
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    except OSError:
+        return False
+    return True
+
+
+_ancillary_size = socket.CMSG_SPACE(_timespec.size) if hasattr(socket, "CMSG_SPACE") else 0
+
+
+def recv_timestamped(sock, bufsize: int = 1500):
+    # returns (data, addr, kernel receive time in ns since the epoch or None)
+    data, ancdata, _, addr = sock.recvmsg(bufsize, _ancillary_size)
+    for level, kind, cmsg in ancdata:
+        if level == socket.SOL_SOCKET and kind == SCM_TIMESTAMPNS and len(cmsg) >= _timespec.size:
+            seconds, nanoseconds = _timespec.unpack_from(cmsg)
+            return data, addr, seconds * 1_000_000_000 + nanoseconds
+    return data, addr, None
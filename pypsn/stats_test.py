@@ -0,0 +1,84 @@
+import socket
+
+import pytest
+
+from pypsn.stats import enable_kernel_timestamps, psn_histogram, psn_receive_stats, recv_timestamped
+
+
+def test_histogram_buckets_are_contiguous():
+    histogram = psn_histogram()
+    previous_high = -1
+    for index in range(len(histogram.counts) - 1):
+        low, high = histogram.bucket_bounds(index)
+        assert low == previous_high + 1
+        assert histogram.bucket(low) == index
+        assert histogram.bucket(high) == index
+        previous_high = high
+
+
+def test_histogram_percentiles():
+    histogram = psn_histogram()
+    for value in range(1, 10001):
+        histogram.record(value * 1000)
+    assert histogram.count == 10000
+    assert histogram.min == 1000
+    assert histogram.max == 10_000_000
+    assert histogram.percentile(50) == pytest.approx(5_000_000, rel=0.07)
+    assert histogram.percentile(99) == pytest.approx(9_900_000, rel=0.07)
+    assert histogram.percentile(100) == 10_000_000
+    histogram.reset()
+    assert histogram.snapshot()["count"] == 0
+
+
+def test_receive_stats_stages_and_rates():
+    stats = psn_receive_stats(rate_window=1.0)
+    start = 1_000_000_000_000
+    for i in range(61):
+        t = start + i * 50_000_000  # 20 packets per second
+        stats.record("10.0.0.1", 100, t, t + 2_000, t + 5_000, socket_ns=1_000)
+    stages = stats.stages
+    assert stages["socket"].count == 61
+    assert stages["parse"].max == 2_000
+    assert stages["callback"].max == 3_000
+    assert stages["total"].max == 6_000
+    source = stats.sources["10.0.0.1"]
+    assert source.packets == 61
+    assert source.bytes == 6100
+    assert source.packets_per_second == pytest.approx(20)
+    assert source.bytes_per_second == pytest.approx(2000)
+
+    # without a kernel timestamp the socket stage is skipped
+    stats.record("10.0.0.2", 100, start, start + 1, start + 2)
+    assert stages["socket"].count == 61
+    assert stages["total"].count == 62
+
+
+def test_recv_timestamped():
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        rx.bind(("127.0.0.1", 0))
+        rx.settimeout(2)
+        enabled = enable_kernel_timestamps(rx)
+        tx.sendto(b"PSN", rx.getsockname())
+        data, addr, kernel_ns = recv_timestamped(rx)
+        assert data == b"PSN"
+        assert addr[0] == "127.0.0.1"
+        assert (kernel_ns is not None) == enabled
+    finally:
+        rx.close()
+        tx.close()
+
+
+def test_incomplete_frames_and_parse_errors():
+    stats = psn_receive_stats()
+    for frame_id, packets in ((1, 2), (2, 1), (3, 2)):
+        for _ in range(packets):
+            stats.record("10.0.0.1", 100, 0, 1, 2)
+            stats.record_frame("10.0.0.1", frame_id, 2)
+    stats.record("10.0.0.1", 3, 0, 1, 2)
+    stats.record_parse_error("10.0.0.1")
+    source = stats.sources["10.0.0.1"]
+    assert source.frames == 3
+    assert source.frames_incomplete == 1
+    assert source.parse_errors == 1
@@ -0,0 +1,202 @@
+#!/bin/env python3
+
+# SO_REUSEPORT receive sharding: N worker processes each bind their own socket to the
+# PSN port and parse what they receive, a merge thread in the parent hands the parsed
+# packets to the callback.
+#
+# For unicast PSN the kernel spreads datagrams over the reuseport sockets by a hash of
+# the source address and port, so every source sticks to one worker. Linux delivers
+# multicast to every socket of the group instead, so with a multicast group each worker
+# also drops the sources that do not hash to it before parsing. Either way a source is
+# handled by a single worker per interface and a queue preserves its order. When several
+# interfaces join the same group, each of them receives every datagram; the merge stage
+# then drops the copies by source, frame id and trackers.
+
+import socket
+import time
+from queue import Empty
+from threading import Thread
+
+from pypsn import logger, parse_psn_packet, psn_tracker, psn_tracker_field
+from pypsn.logs import setup_child_logging
+from pypsn.quarantine import psn_quarantine, psn_rejected, reject_sample
+from pypsn.shm import psn_source_shard
+
+PSN_MCAST_GRP = "236.10.10.10"
+# packet keys remembered per source to drop the copies of other interfaces
+DEDUP_WINDOW = 64
+
+
+def get_reuseport_socket(ip_addr="0.0.0.0", mcast_port=56565, mcast_grp=PSN_MCAST_GRP, rcvbuf=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    if rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    if mcast_grp:
+        sock.bind((mcast_grp, mcast_port))
+        sock.setsockopt(socket.SOL_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(mcast_grp) + socket.inet_aton(ip_addr))
+    else:
+        sock.bind((ip_addr, mcast_port))
+    return sock
+
+
+def worker_main(worker, index, count, ip_addr, mcast_port, mcast_grp, out_queue, stop_event, batch_size, batch_interval, rcvbuf,
+                fields=psn_tracker_field.ALL):
+    # worker process: receive and parse, send (worker, [(src_ip, packet), ...]) batches;
+    # a packet that fails to parse is sent as a psn_rejected for the parent's quarantine
+    setup_child_logging()
+    sock = get_reuseport_socket(ip_addr, mcast_port, mcast_grp, rcvbuf)
+    sock.settimeout(batch_interval)
+    accept = psn_source_shard(index, count) if mcast_grp and count > 1 else None
+    out_queue.put((worker, None))  # bound and ready
+    batch = []
+    flushed = time.monotonic()
+    try:
+        while not stop_event.is_set():
+            try:
+                data, addr = sock.recvfrom(1500)
+            except socket.timeout:
+                pass
+            else:
+                if accept is None or accept(addr[0]):
+                    try:
+                        packet = parse_psn_packet(data, addr[0], fields)
+                    except Exception as e:
+                        packet = psn_rejected(reject_sample(addr[0], data, e))
+                    batch.append((addr[0], packet))
+            if batch and (len(batch) >= batch_size or time.monotonic() - flushed >= batch_interval):
+                out_queue.put((worker, batch))
+                batch = []
+                flushed = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+class psn_worker_pool(Thread):
+    # drop-in for pypsn.receiver; start() spawns the workers, the thread is the merge stage
+    def __init__(
+        self,
+        callback,
+        interfaces=("0.0.0.0",),
+        workers: int = 2,
+        mcast_port: int = 56565,
+        mcast_grp: str = PSN_MCAST_GRP,
+        batch_size: int = 32,
+        batch_interval: float = 0.002,
+        rcvbuf: int = None,
+        fields=psn_tracker_field.ALL,
+        quarantine=None,
+    ):
+        import multiprocessing
+
+        Thread.__init__(self, name="psn-worker-merge")
+        self.callback = callback
+        self.quarantine = quarantine if quarantine is not None else psn_quarantine()  # rejected packets by reason
+        self.interfaces = list(interfaces)
+        self.workers = max(1, int(workers))
+        self.mcast_port = mcast_port
+        self.mcast_grp = mcast_grp
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.rcvbuf = rcvbuf
+        self.fields = fields
+        # fork like psn_ingest_pool: spawn would import the caller's main module again in every worker
+        self.context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+        self.queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.processes = []
+        self.running = True
+        self.packets = 0
+        self.parse_errors = 0
+        self.duplicates = 0  # packets dropped because another interface delivered them already
+        self.migrations = 0  # times a source showed up on a different worker of an interface
+        self.per_worker = [0] * (len(self.interfaces) * self.workers)
+        self._ready = 0
+        self._owner = {}  # (src_ip, interface index) -> worker that delivered it
+        # only interfaces sharing a multicast group see the same datagrams
+        self._dedup = bool(mcast_grp) and len(self.interfaces) > 1
+        self._recent = {}  # src_ip -> recently delivered packet keys, oldest first
+
+    @property
+    def ready(self) -> bool:
+        return self._ready >= len(self.processes) > 0
+
+    def start(self):
+        worker = 0
+        for ip_addr in self.interfaces:
+            for index in range(self.workers):
+                process = self.context.Process(
+                    target=worker_main,
+                    args=(worker, index, self.workers, ip_addr, self.mcast_port, self.mcast_grp, self.queue, self.stop_event,
+                          self.batch_size, self.batch_interval, self.rcvbuf, self.fields),
+                    name=f"psn-worker-{worker}",
+                    daemon=True,
+                )
+                process.start()
+                self.processes.append(process)
+                worker += 1
+        Thread.start(self)
+
+    def stop(self, timeout: float = 5.0):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.running = False
+        if self.is_alive():
+            self.join()
+        self.queue.close()
+
+    def run(self):
+        while self.running:
+            try:
+                worker, batch = self.queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if batch is None:
+                self._ready += 1
+                continue
+            self.per_worker[worker] += len(batch)
+            self.merge(worker, batch)
+
+    def merge(self, worker: int, batch):
+        owner, recent = self._owner, self._recent
+        interface = worker // self.workers
+        for src_ip, packet in batch:
+            if packet is None or isinstance(packet, psn_rejected):
+                self.parse_errors += 1
+                if packet is not None:
+                    self.quarantine.add(packet.sample)
+                    logger.warning("Rejected PSN packet from %s: %s", src_ip, packet.detail,
+                                   extra={"key": ("parse_error", src_ip, packet.reason)})
+                continue
+            if owner.get((src_ip, interface), worker) != worker:
+                self.migrations += 1
+            owner[(src_ip, interface)] = worker
+            if self._dedup:
+                # a frame can span several packets, the trackers tell them apart
+                key = (type(packet), packet.info.frame_id, tuple(tracker_key(tracker) for tracker in packet.trackers))
+                seen = recent.setdefault(src_ip, {})
+                if key in seen:
+                    self.duplicates += 1
+                    continue
+                seen[key] = None
+                if len(seen) > DEDUP_WINDOW:
+                    del seen[next(iter(seen))]
+            self.packets += 1
+            try:
+                self.callback(packet)
+            except Exception as e:
+                # like pypsn.receiver: a failing callback must not end the merge thread, the
+                # workers would keep queueing batches that nothing drains
+                logger.error("Error handling PSN packet from %s: %s", src_ip, e, exc_info=True,
+                             extra={"key": ("handler_error", src_ip)})
+
+
+def tracker_key(tracker):
+    # data packets carry psn_tracker, info packets psn_tracker_info
+    return tracker.id if isinstance(tracker, psn_tracker) else tracker.tracker_id
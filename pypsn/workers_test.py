@@ -0,0 +1,116 @@
+import socket
+import time
+
+import pypsn
+from pypsn.generator import encode_data_packet
+from pypsn.workers import psn_worker_pool
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_merge_preserves_per_source_order():
+    port = free_port()
+    received = []
+    pool = psn_worker_pool(received.append, ["127.0.0.1"], workers=3, mcast_port=port, mcast_grp=None)
+    pool.start()
+    try:
+        assert wait_for(lambda: pool.ready)
+        senders = []
+        for host in ("127.0.0.2", "127.0.0.3", "127.0.0.4"):
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sender.bind((host, 0))
+            senders.append(sender)
+        for frame_id in range(50):
+            for sender in senders:
+                tracker = pypsn.psn_tracker(1, pos=pypsn.psn_vector3(frame_id, 0, 0))
+                sender.sendto(encode_data_packet([tracker], frame_id), ("127.0.0.1", port))
+            time.sleep(0.0005)
+        for sender in senders:
+            sender.close()
+        assert wait_for(lambda: len(received) == 150)
+    finally:
+        pool.stop()
+    for host in ("127.0.0.2", "127.0.0.3", "127.0.0.4"):
+        frames = [packet.info.frame_id for packet in received if packet.info.src_ip == host]
+        assert frames == list(range(50))
+    assert sum(pool.per_worker) == 150
+    assert pool.duplicates == 0
+
+
+def test_merge_keeps_restarted_sources():
+    received = []
+    pool = psn_worker_pool(received.append)
+
+    def packet(src_ip, frame_id):
+        return src_ip, pypsn.psn_data_packet(pypsn.psn_info(0, 2, 3, frame_id, 1, src_ip), [])
+
+    # a source that restarts its frame ids is delivered as is, each source stays on one worker anyway
+    pool.merge(0, [packet("10.0.0.1", 200), packet("10.0.0.1", 201), packet("10.0.0.1", 0)])
+    pool.merge(1, [packet("10.0.0.1", 1), packet("10.0.0.2", 9), (("10.0.0.2"), None)])
+    assert [p.info.frame_id for p in received] == [200, 201, 0, 1, 9]
+    assert pool.migrations == 1
+    assert pool.parse_errors == 1
+
+
+def test_merge_drops_copies_of_other_interfaces():
+    received = []
+    pool = psn_worker_pool(received.append, ["10.0.0.1", "10.0.1.1"], workers=2)
+
+    def packet(frame_id, *tracker_ids):
+        trackers = [pypsn.psn_tracker(tracker_id) for tracker_id in tracker_ids]
+        return "10.0.0.9", pypsn.psn_data_packet(pypsn.psn_info(0, 2, 3, frame_id, 2, "10.0.0.9"), trackers)
+
+    # workers 0 and 2 handle the source on the two interfaces; a frame spans two packets
+    pool.merge(0, [packet(5, 1, 2), packet(5, 3)])
+    pool.merge(2, [packet(5, 1, 2), packet(5, 3), packet(6, 1, 2)])
+    pool.merge(0, [packet(6, 1, 2)])
+    assert [(p.info.frame_id, len(p.trackers)) for p in received] == [(5, 2), (5, 1), (6, 2)]
+    assert pool.duplicates == 3
+    assert pool.migrations == 0
+
+
+def test_merge_survives_failing_callback(caplog):
+    received = []
+
+    def callback(packet):
+        if packet.info.frame_id == 1:
+            raise RuntimeError("broken monitor")
+        received.append(packet)
+
+    pool = psn_worker_pool(callback)
+    packets = [("10.0.0.1", pypsn.psn_data_packet(pypsn.psn_info(0, 2, 3, frame_id, 1, "10.0.0.1"), []))
+               for frame_id in range(3)]
+    pool.merge(0, packets)
+    assert [p.info.frame_id for p in received] == [0, 2]
+    assert "broken monitor" in caplog.text
+
+
+def test_rejected_packets_reach_the_quarantine():
+    port = free_port()
+    quarantine = pypsn.psn_quarantine()
+    pool = psn_worker_pool(lambda packet: None, ["127.0.0.1"], workers=2, mcast_port=port, mcast_grp=None,
+                           quarantine=quarantine)
+    pool.start()
+    try:
+        assert wait_for(lambda: pool.ready)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            sender.sendto(b"\x55" * 600, ("127.0.0.1", port))
+        assert wait_for(lambda: quarantine.total == 1)
+    finally:
+        pool.stop()
+    assert pool.parse_errors == 1
+    assert quarantine.counts == {"truncated": 1}
+    sample = quarantine.snapshot()["samples"][0]
+    assert sample["src_ip"] == "127.0.0.1"
+    assert sample["size"] == 600 and len(sample["data"]) == 2 * quarantine.max_bytes
@@ -0,0 +1,62 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Callable, Optional
+
+THREAD_NAME = 'sACN asyncio event loop thread'
+
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+
+def get_shared_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns an event loop that runs forever on a daemon thread. It is started on first use and shared by all
+    asyncio sockets that were not given a loop, so any number of senders and receivers costs one thread.
+    The loop is running when this returns, so run_on_loop always hands calls over to its thread.
+    """
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None or _shared_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            running = threading.Event()
+            # the first callback of the loop runs once run_forever is under way
+            loop.call_soon(running.set)
+            thread = threading.Thread(target=loop.run_forever, name=THREAD_NAME, daemon=True)
+            thread.start()
+            running.wait()
+            _shared_loop = loop
+        return _shared_loop
+
+
+def run_on_loop(loop: asyncio.AbstractEventLoop, function: Callable, timeout: float = 5.0):
+    """
+    Calls the function on the thread of the loop and returns its result. Calls it directly when already on that
+    thread or when the loop is not running, so this never deadlocks.
+    :param timeout: seconds to wait for the loop to get to the call
+    """
+    if not loop.is_running() or is_loop_thread(loop):
+        return function()
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def call():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(function())
+            except BaseException as e:
+                future.set_exception(e)
+
+    loop.call_soon_threadsafe(call)
+    return future.result(timeout)
+
+
+def is_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    """
+    :return: True, if the caller runs on the thread of the loop
+    """
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
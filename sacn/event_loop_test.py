@@ -0,0 +1,18 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import threading
+
+import sacn.event_loop
+from sacn.event_loop import THREAD_NAME, get_shared_event_loop, run_on_loop
+
+
+def test_shared_loop_is_running_on_return(monkeypatch):
+    monkeypatch.setattr(sacn.event_loop, '_shared_loop', None)
+    loop = get_shared_event_loop()
+    try:
+        assert loop.is_running()
+        # calls right after the start already go to the loop thread, not the caller's
+        assert run_on_loop(loop, lambda: threading.current_thread().name) == THREAD_NAME
+        assert get_shared_event_loop() is loop
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
@@ -137,6 +137,18 @@ class DataPacket(RootLayer):
         self.length = 126 + len(self._dmxData)
 
     def getBytes(self) -> tuple:
+        rtrnList = self._getHeaderList()
+        rtrnList.extend(self._dmxData)
+        return tuple(rtrnList)
+
+    def getHeaderBytes(self) -> bytes:
+        """
+        The packet without the DMX data: everything up to and including the start code (126 bytes). Together with
+        512 bytes of DMX data from somewhere else, e.g. a frame buffer, this makes a complete packet.
+        """
+        return bytes(self._getHeaderList())
+
+    def _getHeaderList(self) -> list:
         rtrnList = super().getBytes()
         # Flags and Length Framing Layer:-------
         rtrnList.extend(make_flagsandlength(self.length - 38))
@@ -177,8 +189,7 @@ class DataPacket(RootLayer):
         rtrnList.extend(int_to_bytes(lengthDmxData))
         # DMX data:-----------------------------
         rtrnList.append(self._dmxStartCode)  # DMX Start Code
-        rtrnList.extend(self._dmxData)
-        return tuple(rtrnList)
+        return rtrnList
 
     @staticmethod
     def make_data_packet(raw_data) -> 'DataPacket':
@@ -82,6 +82,14 @@ def test_sequence_increment():
     assert built_packet.sequence == 0
 
 
+def test_header_bytes():
+    packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=62000, dmxData=tuple(range(0, 20)),
+                        dmxStartCode=0xDD)
+    header = packet.getHeaderBytes()
+    assert len(header) == 126
+    assert header == bytes(packet.getBytes()[:126])
+
+
 def test_parse_data_packet():
     # Use the example present in the E1.31 spec in appendix B
     raw_data = [
@@ -12,6 +12,9 @@ from sacn.messages.root_layer import \
     byte_tuple_to_int, \
     make_flagsandlength
 
+# universe discovery packets are sent to the multicast address of this universe (239.255.250.214)
+E131_DISCOVERY_UNIVERSE = 64214
+
 
 class UniverseDiscoveryPacket(RootLayer):
     def __init__(self, cid: tuple, sourceName: str, universes: tuple, page: int = 0, lastPage: int = 0):
@@ -0,0 +1,253 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+"""
+Maps the pixels of an image onto the DMX slots of LED fixtures. The layout is resolved once into a table of image
+and DMX positions, so every frame is a single gather through a lookup table with gamma and brightness.
+This module needs numpy, unlike the rest of this library it is therefore not imported by sacn itself.
+"""
+
+import threading
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from sacn.sender import sACNsender, check_universe
+
+# image channel of each color letter. W is taken from a fourth image channel, or else the common part of R, G and B
+COLOR_CHANNELS = {'R': 0, 'G': 1, 'B': 2, 'W': 3}
+
+
+class PixelFixture:
+    """
+    Base class of the fixture layouts. The pixels of a fixture are patched from slot 1 of start_universe on and
+    continue in the next universe when pixels_per_universe is reached.
+    """
+
+    def __init__(self, start_universe: int, order: str = 'RGB', pixels_per_universe: int = None):
+        """
+        :param order: the color of each channel of a pixel, e.g. 'GRB' or 'RGBW'
+        :param pixels_per_universe: Default: as many as fit into 512 slots, i.e. 170 for RGB and 128 for RGBW
+        """
+        check_universe(start_universe)
+        if not order or any(color not in COLOR_CHANNELS for color in order.upper()):
+            raise ValueError(f'order must be made of the letters R, G, B and W! It was "{order}"')
+        self.start_universe: int = start_universe
+        self.order: str = order.upper()
+        if pixels_per_universe is None:
+            pixels_per_universe = 512 // len(self.order)
+        if not 1 <= pixels_per_universe * len(self.order) <= 512:
+            raise ValueError(f'{pixels_per_universe} pixels with {len(self.order)} channels do not fit into a universe')
+        self.pixels_per_universe: int = pixels_per_universe
+
+    def pixel_coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the image row and column of every pixel, in patch order
+        """
+        raise NotImplementedError
+
+    def universe_count(self) -> int:
+        pixels = len(self.pixel_coordinates()[0])
+        return (pixels + self.pixels_per_universe - 1) // self.pixels_per_universe
+
+
+class PixelStrip(PixelFixture):
+    """
+    A line of pixels, starting at column x and row y of the image and going step_x columns and step_y rows per pixel.
+    """
+
+    def __init__(self, start_universe: int, pixels: int, x: int, y: int, step_x: int = 1, step_y: int = 0,
+                 order: str = 'RGB', pixels_per_universe: int = None):
+        super().__init__(start_universe, order, pixels_per_universe)
+        self.pixels: int = pixels
+        self.x: int = x
+        self.y: int = y
+        self.step_x: int = step_x
+        self.step_y: int = step_y
+
+    def pixel_coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        index = np.arange(self.pixels)
+        return self.y + index * self.step_y, self.x + index * self.step_x
+
+
+class PixelMatrix(PixelFixture):
+    """
+    A rectangle of width x height pixels whose top left pixel shows column x and row y of the image. The pixels are
+    patched row by row (column by column if vertical), serpentine matrices reverse every second row (column).
+    """
+
+    def __init__(self, start_universe: int, width: int, height: int, x: int = 0, y: int = 0,
+                 serpentine: bool = False, vertical: bool = False, order: str = 'RGB', pixels_per_universe: int = None):
+        super().__init__(start_universe, order, pixels_per_universe)
+        self.width: int = width
+        self.height: int = height
+        self.x: int = x
+        self.y: int = y
+        self.serpentine: bool = serpentine
+        self.vertical: bool = vertical
+
+    def pixel_coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        rows, columns = np.mgrid[0:self.height, 0:self.width]
+        if self.vertical:
+            rows, columns = rows.T, columns.T
+        if self.serpentine:
+            # every second line runs backwards
+            rows[1::2] = rows[1::2, ::-1]
+            columns[1::2] = columns[1::2, ::-1]
+        return self.y + rows.ravel(), self.x + columns.ravel()
+
+
+class PixelMapper:
+    """
+    Renders images of a fixed size into a frame with one row of 512 slots per universe (see universes). If a sender
+    is given, its outputs are bound to that frame, so send() puts an image on the wire in one call.
+    """
+
+    def __init__(self, fixtures: Sequence[PixelFixture], width: int, height: int, sender: sACNsender = None,
+                 sync: bool = True, gamma: float = 1.0, brightness: float = 1.0, keepalive: float = 1.0):
+        """
+        :param width: the width of the images in pixels
+        :param height: the height of the images in pixels
+        :param sender: the sender to drive. Its outputs for the universes of the fixtures are activated
+        :param sync: send every frame synced on the caller's thread (see sACNsender.flush),
+        otherwise the outputs are only marked as changed for the sending thread
+        :param gamma: exponent of the gamma correction, 1 for none
+        :param brightness: scales all levels, [0-1]
+        :param keepalive: with sync, a started mapper resends the last frame after this many seconds without one
+        (see start), so the fixtures do not hit the data loss timeout of 2.5 seconds when the images stop
+        :raises ValueError: if a pixel lies outside of the image or two pixels share a DMX slot
+        """
+        self.fixtures: List[PixelFixture] = list(fixtures)
+        self.width: int = width
+        self.height: int = height
+        self.sender: sACNsender = sender
+        self.sync: bool = sync
+        self.keepalive: float = keepalive
+        self.frames_sent: int = 0
+        self.keepalives_sent: int = 0
+        # the caller's thread and the keepalive thread share the sequence numbers of the outputs
+        self._send_lock: threading.Lock = threading.Lock()
+        self._last_send: float = time.monotonic()
+        self._stop_event: threading.Event = threading.Event()
+        self._keepalive_thread: threading.Thread = None
+
+        universes = set()
+        for fixture in self.fixtures:
+            universes.update(range(fixture.start_universe, fixture.start_universe + fixture.universe_count()))
+        for universe in universes:
+            check_universe(universe)
+        self.universes: List[int] = sorted(universes)
+        self.frame: np.ndarray = np.zeros((len(self.universes), 512), dtype=np.uint8)
+        row_of = {universe: row for row, universe in enumerate(self.universes)}
+
+        # resolve the layout into flat indexes: source into the (height, width, 4) image, target into the frame
+        sources, targets = [], []
+        for fixture in self.fixtures:
+            ys, xs = fixture.pixel_coordinates()
+            if len(ys) and (ys.min() < 0 or xs.min() < 0 or ys.max() >= height or xs.max() >= width):
+                raise ValueError(f'A pixel of the fixture in universe {fixture.start_universe} is outside of the '
+                                 f'{width}x{height} image!')
+            pixel = np.arange(len(ys))
+            rows = np.array([row_of[u] for u in range(fixture.start_universe,
+                                                      fixture.start_universe + fixture.universe_count())],
+                            dtype=np.intp)
+            channels = len(fixture.order)
+            slot = rows[pixel // fixture.pixels_per_universe] * 512 + (pixel % fixture.pixels_per_universe) * channels
+            for channel, color in enumerate(fixture.order):
+                sources.append((ys * width + xs) * 4 + COLOR_CHANNELS[color])
+                targets.append(slot + channel)
+        self._source: np.ndarray = np.concatenate(sources).astype(np.intp) if sources else np.zeros(0, dtype=np.intp)
+        self._target: np.ndarray = np.concatenate(targets).astype(np.intp) if targets else np.zeros(0, dtype=np.intp)
+        if len(np.unique(self._target)) != len(self._target):
+            raise ValueError('Some pixels of the fixtures share DMX slots!')
+        self._needs_white: bool = any('W' in fixture.order for fixture in self.fixtures)
+        self._rgbw: np.ndarray = np.zeros((height, width, 4), dtype=np.uint8)
+
+        self.lut: np.ndarray = np.arange(256, dtype=np.uint8)
+        self.set_lut(gamma, brightness)
+
+        if sender is not None:
+            sender.bind_frame(self.frame, self.universes)
+            if sync:
+                # one synced flush per frame instead of the sender's own loop, which would send the same outputs
+                # unsynced and with racing sequence numbers
+                sender.manual_flush = True
+
+    def start(self) -> None:
+        """
+        Starts the keepalive thread, if the frames are sent synced. Otherwise the sending thread of the sender refreshes
+        the outputs itself and nothing is started.
+        """
+        if self.sender is None or not self.sync or not self.keepalive or self._keepalive_thread is not None:
+            return
+        self._stop_event.clear()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name='sACN pixel mapper keepalive',
+                                                  daemon=True)
+        self._keepalive_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the keepalive thread. If none was started, nothing happens.
+        """
+        self._stop_event.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+
+    def _keepalive_loop(self) -> None:
+        while True:
+            delay = self._last_send + self.keepalive - time.monotonic()
+            if delay > 0:
+                if self._stop_event.wait(delay):
+                    return
+                continue
+            if self._stop_event.is_set():
+                return
+            self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Sends the current frame again, synced like send().
+        """
+        with self._send_lock:
+            self.sender.update_frame(flush=True)
+            self._last_send = time.monotonic()
+            self.keepalives_sent += 1
+
+    def set_lut(self, gamma: float = 1.0, brightness: float = 1.0) -> None:
+        """
+        Precomputes the level of every input value: 255 * brightness * (value / 255) ** gamma.
+        """
+        if not 0 <= brightness <= 1:
+            raise ValueError(f'brightness must be in range [0-1]! value was {brightness}')
+        if gamma <= 0:
+            raise ValueError(f'gamma must be greater than 0! value was {gamma}')
+        self.lut = np.rint(255 * brightness * (np.arange(256) / 255) ** gamma).astype(np.uint8)
+
+    def render(self, image) -> np.ndarray:
+        """
+        Writes the image into the frame.
+        :param image: (height, width, 3) RGB or (height, width, 4) RGBW uint8 pixels, e.g. a numpy array or
+        a PIL image
+        :return: the frame, one row of 512 slots per universe
+        """
+        image = np.asarray(image, dtype=np.uint8)
+        if image.shape[:2] != (self.height, self.width) or image.ndim != 3 or image.shape[2] not in (3, 4):
+            raise ValueError(f'The image must have the shape ({self.height}, {self.width}, 3 or 4)! '
+                             f'It was {image.shape}')
+        rgbw = self._rgbw
+        rgbw[..., :image.shape[2]] = image
+        if image.shape[2] == 3 and self._needs_white:
+            np.minimum(np.minimum(image[..., 0], image[..., 1]), image[..., 2], out=rgbw[..., 3])
+        self.frame.reshape(-1)[self._target] = self.lut[rgbw.reshape(-1)[self._source]]
+        return self.frame
+
+    def send(self, image) -> None:
+        """
+        Renders the image and sends it out with the sender given in the constructor.
+        """
+        with self._send_lock:
+            self.render(image)
+            self.sender.update_frame(flush=self.sync)
+            self._last_send = time.monotonic()
+            self.frames_sent += 1
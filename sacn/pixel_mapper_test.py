@@ -0,0 +1,146 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import sacn  # noqa: E402
+from sacn.pixel_mapper import PixelMapper, PixelMatrix, PixelStrip  # noqa: E402
+from sacn.sending.sender_socket_test import SenderSocketTest  # noqa: E402
+
+
+def make_image(width, height):
+    # every pixel holds its own coordinates, so the mapping can be read back from the frame
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[..., 0] = np.arange(width)[np.newaxis, :]
+    image[..., 1] = np.arange(height)[:, np.newaxis]
+    image[..., 2] = 200
+    return image
+
+
+def test_strip():
+    mapper = PixelMapper([PixelStrip(1, 4, x=1, y=2)], width=8, height=4)
+    assert mapper.universes == [1]
+    frame = mapper.render(make_image(8, 4))
+    assert frame.shape == (1, 512)
+    assert tuple(frame[0, 0:13]) == (1, 2, 200, 2, 2, 200, 3, 2, 200, 4, 2, 200, 0)
+
+    # vertical strip with a different color order
+    mapper = PixelMapper([PixelStrip(1, 3, x=5, y=0, step_x=0, step_y=1, order='GRB')], width=8, height=4)
+    assert tuple(mapper.render(make_image(8, 4))[0, 0:9]) == (0, 5, 200, 1, 5, 200, 2, 5, 200)
+
+
+def test_matrix_serpentine():
+    mapper = PixelMapper([PixelMatrix(1, 3, 2, serpentine=True)], width=3, height=2)
+    frame = mapper.render(make_image(3, 2))
+    columns = tuple(frame[0, 0:18:3])
+    rows = tuple(frame[0, 1:18:3])
+    assert columns == (0, 1, 2, 2, 1, 0)
+    assert rows == (0, 0, 0, 1, 1, 1)
+
+    mapper = PixelMapper([PixelMatrix(1, 2, 2, vertical=True)], width=2, height=2)
+    frame = mapper.render(make_image(2, 2))
+    assert tuple(frame[0, 0:12:3]) == (0, 0, 1, 1)
+    assert tuple(frame[0, 1:12:3]) == (0, 1, 0, 1)
+
+
+def test_universe_wrapping():
+    # 170 RGB pixels fill slots 1-510 of a universe, the 171st pixel starts the next universe
+    mapper = PixelMapper([PixelStrip(10, 200, x=0, y=0)], width=200, height=1)
+    assert mapper.universes == [10, 11]
+    image = np.zeros((1, 200, 3), dtype=np.uint8)
+    image[0, 169] = (1, 2, 3)
+    image[0, 170] = (4, 5, 6)
+    frame = mapper.render(image)
+    assert tuple(frame[0, 507:512]) == (1, 2, 3, 0, 0)
+    assert tuple(frame[1, 0:3]) == (4, 5, 6)
+
+    # RGBW fits 128 pixels, the pixels per universe can also be set explicitly
+    assert PixelStrip(1, 129, 0, 0, order='RGBW').universe_count() == 2
+    assert PixelStrip(1, 100, 0, 0, pixels_per_universe=50).universe_count() == 2
+
+
+def test_rgbw():
+    mapper = PixelMapper([PixelStrip(1, 2, x=0, y=0, order='RGBW')], width=2, height=1)
+    image = np.array([[(10, 20, 30), (255, 255, 0)]], dtype=np.uint8)
+    # without a white channel in the image, W is the common part of R, G and B
+    assert tuple(mapper.render(image)[0, 0:8]) == (10, 20, 30, 10, 255, 255, 0, 0)
+    image = np.array([[(10, 20, 30, 40), (1, 2, 3, 4)]], dtype=np.uint8)
+    assert tuple(mapper.render(image)[0, 0:8]) == (10, 20, 30, 40, 1, 2, 3, 4)
+
+
+def test_lut():
+    mapper = PixelMapper([PixelStrip(1, 1, x=0, y=0)], width=1, height=1, gamma=2.0, brightness=0.5)
+    image = np.array([[(255, 128, 0)]], dtype=np.uint8)
+    assert tuple(mapper.render(image)[0, 0:3]) == (128, 32, 0)
+    mapper.set_lut()
+    assert tuple(mapper.render(image)[0, 0:3]) == (255, 128, 0)
+    with pytest.raises(ValueError):
+        mapper.set_lut(brightness=1.5)
+    with pytest.raises(ValueError):
+        mapper.set_lut(gamma=0)
+
+
+def test_invalid_layout():
+    with pytest.raises(ValueError):  # overlapping slots
+        PixelMapper([PixelStrip(1, 4, 0, 0), PixelStrip(1, 4, 0, 1)], width=4, height=2)
+    with pytest.raises(ValueError):  # outside of the image
+        PixelMapper([PixelStrip(1, 5, 0, 0)], width=4, height=1)
+    with pytest.raises(ValueError):
+        PixelStrip(1, 4, 0, 0, order='RGX')
+    with pytest.raises(ValueError):
+        PixelStrip(1, 4, 0, 0, pixels_per_universe=171)
+    with pytest.raises(ValueError):
+        PixelMapper([PixelMatrix(1, 2, 2)], width=2, height=2).render(np.zeros((2, 3, 3), dtype=np.uint8))
+
+
+def test_send():
+    socket = SenderSocketTest()
+    sender = sacn.sACNsender(socket=socket)
+    mapper = PixelMapper([PixelMatrix(1, 10, 20), PixelMatrix(3, 10, 20, y=20)], width=10, height=40, sender=sender)
+    assert mapper.universes == [1, 2, 3, 4]
+    assert sender.get_active_outputs() == (1, 2, 3, 4)
+
+    image = make_image(10, 40)
+    mapper.send(image)
+    assert mapper.frames_sent == 1
+    assert sender[3].dmx_data[0:3] == (0, 20, 200)
+    assert socket.send_multicast_called[0].syncAddr == 63999  # sync packet
+
+    assert sender.manual_flush is True
+
+    # without sync the frames are left to the sending thread
+    sender = sacn.sACNsender(socket=socket)
+    mapper = PixelMapper([PixelMatrix(1, 10, 20)], width=10, height=20, sender=sender, sync=False)
+    assert sender.manual_flush is False
+    image = make_image(10, 20)
+    image[0, 0] = (7, 8, 9)
+    mapper.send(image)
+    assert sender[1].dmx_data[0:3] == (7, 8, 9)
+    assert sender[1]._changed
+
+
+def test_keepalive():
+    socket = SenderSocketTest()
+    sender = sacn.sACNsender(socket=socket)
+    mapper = PixelMapper([PixelMatrix(1, 10, 20)], width=10, height=20, sender=sender, keepalive=0.05)
+    mapper.send(make_image(10, 20))
+    mapper.start()
+    try:
+        time.sleep(0.3)
+    finally:
+        mapper.stop()
+    assert mapper.frames_sent == 1
+    assert mapper.keepalives_sent >= 3
+    assert socket.send_multicast_called[0].syncAddr == 63999  # synced like send()
+    sent = mapper.keepalives_sent
+    time.sleep(0.1)
+    assert mapper.keepalives_sent == sent
+
+    # without sync the sending thread refreshes the outputs, no keepalive thread is needed
+    mapper = PixelMapper([PixelMatrix(1, 10, 20)], width=10, height=20, sender=sacn.sACNsender(socket=socket),
+                         sync=False, keepalive=0.05)
+    mapper.start()
+    assert mapper._keepalive_thread is None
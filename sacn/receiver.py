@@ -1,15 +1,19 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
 from sacn.messages.data_packet import DataPacket, calculate_multicast_addr
+from sacn.messages.universe_discovery import E131_DISCOVERY_UNIVERSE
 from sacn.receiving.receiver_handler import ReceiverHandler, ReceiverHandlerListener
+from sacn.receiving.multicast_subscriptions import MulticastSubscriptions
 from sacn.receiving.receiver_socket_base import ReceiverSocketBase
-from typing import Tuple
+from sacn.receiving.source_directory import DiscoveredSource
+from typing import Iterable, List, Optional, Set, Tuple
 
-LISTEN_ON_OPTIONS = ('availability', 'universe')
+LISTEN_ON_OPTIONS = ('availability', 'universe', 'universe_diff', 'discovery')
 
 
 class sACNreceiver(ReceiverHandlerListener):
-    def __init__(self, bind_address: str = '0.0.0.0', bind_port: int = 5568, socket: ReceiverSocketBase = None):
+    def __init__(self, bind_address: str = '0.0.0.0', bind_port: int = 5568, socket: ReceiverSocketBase = None,
+                 auto_join: bool = False, interfaces: Iterable[str] = None):
         """
         Make a receiver for sACN data. Do not forget to start and add callbacks for receiving messages!
         :param bind_address: if you are on a Windows system and want to use multicast provide a valid interface
@@ -18,10 +22,25 @@ class sACNreceiver(ReceiverHandlerListener):
         Only use when you know what you are doing!
         :param socket: Provide a special socket implementation if necessary. Must be derived from ReceiverSocketBase,
         only use if the default socket implementation of this library is not sufficient.
+        :param auto_join: if True, registering a 'universe' or 'universe_diff' listener joins the multicast group of
+        the universe and removing the last listener of a universe leaves it again. Do not call join_multicast for
+        these universes yourself then.
+        :param interfaces: IP-Addresses of the interfaces on which the managed multicast groups (auto_join and
+        join_discovered) are joined. Default: only the bind address
         """
 
         self._callbacks: dict = {}
         self._handler: ReceiverHandler = ReceiverHandler(bind_address, bind_port, self, socket)
+        self._autoJoin: bool = auto_join
+        # reference counted group memberships. Use 'with receiver.subscriptions.batch():' when (un)registering many
+        # universes, the memberships are then changed in one pass at the end
+        self.subscriptions: MulticastSubscriptions = MulticastSubscriptions(self._handler.socket, interfaces)
+        self._discoveryJoined: bool = False
+        # universes to join when a source announces them (None: all), set by join_discovered
+        self._discoveryWanted: Optional[Set[int]] = None
+        self._discoveryFollow: bool = False
+        # universes that hold a subscription because of discovery
+        self._discoveredGroups: Set[int] = set()
 
     def on_availability_change(self, universe: int, changed: str) -> None:
         callbacks = []
@@ -44,11 +63,21 @@ class sACNreceiver(ReceiverHandlerListener):
         for callback in callbacks:
             callback(packet)
 
+    def on_dmx_data_diff(self, universe: int, changed: List[Tuple[int, int]], data) -> None:
+        for callback in self._callbacks.get((LISTEN_ON_OPTIONS[2], universe), []):
+            callback(universe=universe, changed=changed, data=data)
+
+    def on_source_change(self, source: DiscoveredSource, changed: str) -> None:
+        for callback in self._callbacks.get(LISTEN_ON_OPTIONS[3], []):
+            callback(source=source, changed=changed)
+        if self._discoveryFollow:
+            self._sync_discovered_groups()
+
     def listen_on(self, trigger: str, **kwargs) -> callable:
         """
         This is a simple decorator for registering a callback for an event. You can also use 'register_listener'.
         A list with all possible options is available via LISTEN_ON_OPTIONS.
-        :param trigger: Currently supported options: 'availability', 'universe'
+        :param trigger: Currently supported options: 'availability', 'universe', 'universe_diff', 'discovery'
         """
         def decorator(f):
             self.register_listener(trigger, f, **kwargs)
@@ -60,8 +89,13 @@ class sACNreceiver(ReceiverHandlerListener):
         Register a listener for the given trigger. Raises an TypeError when the trigger is not a valid one.
         To get a list with all valid triggers, use LISTEN_ON_OPTIONS.
         :param trigger: the trigger on which the given callback should be used.
-        Currently supported: 'availability', 'universe'
-        :param func: the callback. The parameters depend on the trigger. See README for more information
+        Currently supported: 'availability', 'universe', 'universe_diff', 'discovery'
+        :param func: the callback. The parameters depend on the trigger. See README for more information.
+        'universe_diff' callbacks are called with universe, changed and data: changed is a list of (start, stop)
+        slot ranges (0-based, stop exclusive) that differ from the last frame and data is a read-only buffer
+        with the 512 slots (a numpy array if numpy is installed). The first frame is reported as changed entirely.
+        'discovery' callbacks are called with source and changed: source is a DiscoveredSource with the universes it
+        announced and changed is one of 'available', 'update' and 'timeout'. Registering one joins the discovery group.
         """
         if trigger in LISTEN_ON_OPTIONS:
             if trigger == LISTEN_ON_OPTIONS[1]:  # if the trigger is universe, use the universe from args as key
@@ -70,6 +104,16 @@ class sACNreceiver(ReceiverHandlerListener):
                     self._callbacks[universe].append(func)
                 except KeyError:
                     self._callbacks[universe] = [func]
+                if self._autoJoin:
+                    self.subscriptions.add(universe)
+            if trigger == LISTEN_ON_OPTIONS[2]:  # diff callbacks are kept apart from the packet callbacks
+                universe = kwargs[LISTEN_ON_OPTIONS[1]]
+                self._callbacks.setdefault((trigger, universe), []).append(func)
+                self._handler.enable_diff(universe)
+                if self._autoJoin:
+                    self.subscriptions.add(universe)
+            if trigger == LISTEN_ON_OPTIONS[3]:
+                self.join_discovery()
             try:
                 self._callbacks[trigger].append(func)
             except KeyError:
@@ -84,39 +128,97 @@ class sACNreceiver(ReceiverHandlerListener):
         this remove function needs to be called only once.
         :param func: the callback
         """
-        for _trigger, listeners in self._callbacks.items():
-            while True:
-                try:
-                    listeners.remove(func)
-                except ValueError:
-                    break
+        with self.subscriptions.batch():
+            for trigger, listeners in self._callbacks.items():
+                while True:
+                    try:
+                        listeners.remove(func)
+                    except ValueError:
+                        break
+                    universe = self._universe_of_key(trigger)
+                    if self._autoJoin and universe is not None:
+                        self.subscriptions.remove(universe)
 
     def remove_listener_from_universe(self, universe: int) -> None:
         """
-        Removes all listeners from the given universe. This does only have effect on the 'universe' listening trigger.
-        If no function was registered for this universe, nothing happens.
+        Removes all listeners from the given universe. This does only have effect on the 'universe' and
+        'universe_diff' listening triggers. If no function was registered for this universe, nothing happens.
         :param universe: the universe to clear
         """
-        self._callbacks.pop(universe, None)
+        removed = self._callbacks.pop(universe, []) + self._callbacks.pop((LISTEN_ON_OPTIONS[2], universe), [])
+        self._handler.disable_diff(universe)
+        if self._autoJoin:
+            with self.subscriptions.batch():
+                for _ in removed:
+                    self.subscriptions.remove(universe)
 
-    def join_multicast(self, universe: int) -> None:
+    @staticmethod
+    def _universe_of_key(key) -> Optional[int]:
+        # 'universe' listeners are stored with the universe as key, 'universe_diff' ones with (trigger, universe)
+        if isinstance(key, int):
+            return key
+        if isinstance(key, tuple):
+            return key[1]
+        return None
+
+    def join_multicast(self, universe: int, interface: str = None) -> None:
         """
         Joins the multicast address that is used for the given universe. Note: If you are on Windows you must have given
         a bind IP-Address for this feature to function properly. On the other hand you are not allowed to set a bind
         address if you are on any other OS.
         :param universe: the universe to join the multicast group.
         The network hardware has to support the multicast feature!
+        :param interface: IP-Address of the interface to join on. Default: the bind address
         """
-        self._handler.socket.join_multicast(calculate_multicast_addr(universe))
+        self._handler.socket.join_multicast(calculate_multicast_addr(universe), interface)
 
-    def leave_multicast(self, universe: int) -> None:
+    def leave_multicast(self, universe: int, interface: str = None) -> None:
         """
         Try to leave the multicast group with the specified universe. This does not throw any exception if the group
         could not be leaved.
         :param universe: the universe to leave the multicast group.
         The network hardware has to support the multicast feature!
+        :param interface: IP-Address of the interface to leave on. Default: the bind address
+        """
+        self._handler.socket.leave_multicast(calculate_multicast_addr(universe), interface)
+
+    def join_discovery(self) -> None:
+        """
+        Joins the multicast group of the universe discovery packets, so the sources on the network are tracked
+        (see get_discovered_sources). Joining twice has no effect.
+        """
+        if not self._discoveryJoined:
+            self.subscriptions.add(E131_DISCOVERY_UNIVERSE)
+            self._discoveryJoined = True
+
+    def join_discovered(self, universes: Iterable[int] = None) -> None:
+        """
+        Joins and leaves universe multicast groups on demand: a group is joined as soon as a source announces the
+        universe via universe discovery and left when no source announces it any more.
+        :param universes: only these universes are joined. If None, every announced universe is joined
+        """
+        self._discoveryWanted = None if universes is None else set(universes)
+        self._discoveryFollow = True
+        self.join_discovery()
+        self._sync_discovered_groups()
+
+    def _sync_discovered_groups(self) -> None:
+        announced = self._handler.sources.get_universes()
+        if self._discoveryWanted is not None:
+            announced &= self._discoveryWanted
+        with self.subscriptions.batch():
+            for universe in announced - self._discoveredGroups:
+                self.subscriptions.add(universe)
+            for universe in self._discoveredGroups - announced:
+                self.subscriptions.remove(universe)
+        self._discoveredGroups = announced
+
+    def get_discovered_sources(self) -> Tuple[DiscoveredSource]:
+        """
+        Get all sources that announced their universes via universe discovery and did not time out.
+        :return: a tuple with a DiscoveredSource per source, with its CID, name and universes
         """
-        self._handler.socket.leave_multicast(calculate_multicast_addr(universe))
+        return self._handler.sources.get_sources()
 
     def start(self) -> None:
         """
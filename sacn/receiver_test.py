@@ -3,6 +3,7 @@
 import pytest
 import sacn
 from sacn.messages.data_packet import DataPacket
+from sacn.messages.universe_discovery import UniverseDiscoveryPacket
 from sacn.receiving.receiver_socket_test import ReceiverSocketTest
 
 
@@ -219,3 +220,70 @@ def test_stop_destructor():
     assert socket.stop_called is False
     receiver.__del__()
     assert socket.stop_called is True
+
+
+def test_listen_on_dmx_data_diff():
+    receiver, socket = get_receiver()
+    calls = []
+
+    @receiver.listen_on('universe_diff', universe=1)
+    def callback_diff(universe, changed, data):
+        calls.append((universe, changed, bytes(data[0:4])))
+
+    def send(sequence, dmxData):
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1, dmxData=dmxData, sequence=sequence)
+        socket.call_on_data(bytes(packet.getBytes()), 0)
+
+    send(0, (1, 2, 3))
+    send(1, (1, 2, 3))  # unchanged data is not reported
+    send(2, (1, 5, 3, 7))
+    assert calls == [(1, [(0, 512)], b'\x01\x02\x03\x00'), (1, [(1, 2), (3, 4)], b'\x01\x05\x03\x07')]
+
+    receiver.remove_listener_from_universe(1)
+    send(3, (9,))
+    assert len(calls) == 2
+
+
+def test_listen_on_discovery():
+    receiver, socket = get_receiver()
+    calls = []
+
+    @receiver.listen_on('discovery')
+    def callback_discovery(source, changed):
+        calls.append((source.sourceName, source.universes, changed))
+
+    assert socket.join_multicast_called == '239.255.250.214'
+    receiver.join_discovered(universes=(1, 2))
+    packet = UniverseDiscoveryPacket(tuple(range(0, 16)), 'Test', (1, 3))
+    socket.call_on_data(bytes(packet.getBytes()), 0)
+    assert calls == [('Test', (1, 3), 'available')]
+    assert socket.join_multicast_called == '239.255.0.1'
+    assert receiver.get_discovered_sources()[0].universes == (1, 3)
+
+    socket.call_on_periodic_callback(100)
+    assert calls[-1] == ('Test', (1, 3), 'timeout')
+    assert socket.leave_multicast_called == '239.255.0.1'
+    assert receiver.get_discovered_sources() == ()
+
+
+def test_auto_join():
+    socket = ReceiverSocketTest()
+    receiver = sacn.sACNreceiver(socket=socket, auto_join=True, interfaces=['10.0.0.1'])
+
+    def callback(packet):
+        pass
+
+    def callback_diff(universe, changed, data):
+        pass
+
+    with receiver.subscriptions.batch():
+        for universe in range(1, 4):
+            receiver.register_listener('universe', callback, universe=universe)
+    receiver.register_listener('universe_diff', callback_diff, universe=1)
+    assert socket.joined == [(f'239.255.0.{universe}', '10.0.0.1') for universe in range(1, 4)]
+
+    receiver.remove_listener(callback)  # universe 1 keeps its diff listener
+    assert socket.left == [('239.255.0.2', '10.0.0.1'), ('239.255.0.3', '10.0.0.1')]
+    receiver.remove_listener_from_universe(1)
+    assert socket.left[-1] == ('239.255.0.1', '10.0.0.1')
+    assert receiver.subscriptions.get_joined() == set()
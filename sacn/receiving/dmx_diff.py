@@ -0,0 +1,55 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the diff falls back to a plain python compare of bytes
+    np = None
+
+DMX_SLOTS = 512
+
+
+def make_frame(dmx_data):
+    """
+    Converts the DMX data of a packet into a read-only frame buffer of 512 slots.
+    :param dmx_data: the slot values, e.g. DataPacket.dmxData
+    :return: a read-only uint8 numpy array, or a memoryview of bytes if numpy is not installed
+    """
+    if np is not None:
+        frame = np.array(dmx_data, dtype=np.uint8)
+        frame.setflags(write=False)
+        return frame
+    return memoryview(bytes(dmx_data))
+
+
+def changed_ranges(previous, current) -> List[Tuple[int, int]]:
+    """
+    Compares two frames made by make_frame and returns the slots that differ, grouped into ranges.
+    :param previous: the last frame of the universe or None, if there was none. Then the whole frame counts as changed
+    :param current: the new frame
+    :return: a list of (start, stop) tuples with 0-based slot indices, stop is exclusive like in a slice
+    """
+    if previous is None:
+        return [(0, len(current))]
+    if np is not None:
+        changed = np.flatnonzero(previous != current)
+        if len(changed) == 0:
+            return []
+        # a new range starts wherever the changed indices are not consecutive
+        breaks = np.flatnonzero(np.diff(changed) != 1) + 1
+        starts = changed[np.concatenate(([0], breaks))]
+        stops = changed[np.concatenate((breaks - 1, [len(changed) - 1]))] + 1
+        return list(zip(starts.tolist(), stops.tolist()))
+    ranges = []
+    start: Optional[int] = None
+    for slot, (old, new) in enumerate(zip(previous, current)):
+        if old != new:
+            if start is None:
+                start = slot
+        elif start is not None:
+            ranges.append((start, slot))
+            start = None
+    if start is not None:
+        ranges.append((start, len(current)))
+    return ranges
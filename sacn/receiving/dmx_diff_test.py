@@ -0,0 +1,31 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import pytest
+from sacn.receiving import dmx_diff
+
+
+@pytest.fixture(params=['numpy', 'bytes'])
+def backend(request, monkeypatch):
+    if request.param == 'bytes':
+        monkeypatch.setattr(dmx_diff, 'np', None)
+    elif dmx_diff.np is None:
+        pytest.skip('numpy is not installed')
+    return request.param
+
+
+def test_changed_ranges(backend):
+    previous = dmx_diff.make_frame([0] * 512)
+    assert dmx_diff.changed_ranges(None, previous) == [(0, 512)]
+    assert dmx_diff.changed_ranges(previous, dmx_diff.make_frame([0] * 512)) == []
+
+    data = [0] * 512
+    for slot in (0, 1, 2, 10, 300, 301, 511):
+        data[slot] = 255
+    assert dmx_diff.changed_ranges(previous, dmx_diff.make_frame(data)) == [(0, 3), (10, 11), (300, 302), (511, 512)]
+
+
+def test_frame_is_read_only(backend):
+    frame = dmx_diff.make_frame(range(0, 256))
+    assert frame[255] == 255
+    with pytest.raises((TypeError, ValueError)):
+        frame[0] = 1
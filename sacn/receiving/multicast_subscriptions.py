@@ -0,0 +1,82 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import contextlib
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+from sacn.messages.data_packet import calculate_multicast_addr
+from sacn.receiving.receiver_socket_base import ReceiverSocketBase
+
+
+class MulticastSubscriptions:
+    """
+    Reference counted multicast group memberships of a receiver socket. A universe is joined with its first reference
+    and left with its last one, on every given interface. Changes made inside batch() are coalesced and applied
+    in one pass when the outermost batch ends, so a group that is left and joined again is not touched at all.
+    """
+
+    def __init__(self, socket: ReceiverSocketBase, interfaces: Iterable[str] = None):
+        """
+        :param interfaces: IP-Addresses of the interfaces to join the groups on.
+        If None, the bind address of the socket is used.
+        """
+        self._logger: logging.Logger = logging.getLogger('sacn')
+        self._socket: ReceiverSocketBase = socket
+        self.interfaces: List[Optional[str]] = [None] if interfaces is None else list(interfaces)
+        self._references: Dict[int, int] = {}
+        # universes whose groups are currently joined on the socket, per interface
+        self._joined: Dict[Optional[str], Set[int]] = {interface: set() for interface in self.interfaces}
+        self._batchDepth: int = 0
+
+    def add(self, universe: int) -> None:
+        self._references[universe] = self._references.get(universe, 0) + 1
+        self.flush()
+
+    def remove(self, universe: int) -> None:
+        """
+        Drops a reference to the universe. Removing a universe without references has no effect.
+        """
+        count = self._references.get(universe, 0) - 1
+        if count > 0:
+            self._references[universe] = count
+        else:
+            self._references.pop(universe, None)
+        self.flush()
+
+    @contextlib.contextmanager
+    def batch(self):
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Applies the membership changes since the last flush, unless a batch is open.
+        Leaves come first, so memberships are released before new ones are taken.
+        """
+        if self._batchDepth > 0:
+            return
+        wanted = set(self._references.keys())
+        for interface in self.interfaces:
+            joined = self._joined.setdefault(interface, set())
+            for universe in sorted(joined - wanted):
+                self._socket.leave_multicast(calculate_multicast_addr(universe), interface)
+                joined.discard(universe)
+            for universe in sorted(wanted - joined):
+                try:
+                    self._socket.join_multicast(calculate_multicast_addr(universe), interface)
+                except OSError as e:  # e.g. the OS limit of memberships per socket is reached
+                    # not recorded as joined, so the next flush tries again
+                    self._logger.error(f'Could not join the multicast group of universe {universe} '
+                                       f'on interface {interface}: {e}')
+                else:
+                    joined.add(universe)
+
+    def get_joined(self) -> Set[int]:
+        """
+        :return: the universes whose group the socket is a member of, on at least one interface
+        """
+        return set().union(*self._joined.values())
@@ -0,0 +1,59 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+from sacn.receiving.multicast_subscriptions import MulticastSubscriptions
+from sacn.receiving.receiver_socket_test import ReceiverSocketTest
+
+
+def test_reference_counting():
+    socket = ReceiverSocketTest()
+    subscriptions = MulticastSubscriptions(socket)
+    subscriptions.add(1)
+    subscriptions.add(1)
+    assert socket.joined == [('239.255.0.1', None)]
+    subscriptions.remove(1)
+    assert socket.left == []
+    subscriptions.remove(1)
+    assert socket.left == [('239.255.0.1', None)]
+    subscriptions.remove(1)  # no references left, nothing happens
+    assert len(socket.left) == 1
+    assert subscriptions.get_joined() == set()
+
+
+def test_batch_on_multiple_interfaces():
+    socket = ReceiverSocketTest()
+    subscriptions = MulticastSubscriptions(socket, ['10.0.0.1', '10.0.1.1'])
+    subscriptions.add(1)
+    socket.joined.clear()
+    with subscriptions.batch():
+        for universe in (3, 2):
+            subscriptions.add(universe)
+        subscriptions.remove(1)
+        subscriptions.add(1)  # left and joined again within the batch: untouched
+        assert socket.joined == []
+    assert socket.left == []
+    assert socket.joined == [('239.255.0.2', '10.0.0.1'), ('239.255.0.3', '10.0.0.1'),
+                             ('239.255.0.2', '10.0.1.1'), ('239.255.0.3', '10.0.1.1')]
+
+
+def test_join_errors_are_logged(caplog):
+    class FullSocket(ReceiverSocketTest):
+        def join_multicast(self, multicast_addr: str, interface: str = None) -> None:
+            if multicast_addr == '239.255.0.2':
+                raise OSError('No buffer space available')
+            super().join_multicast(multicast_addr, interface)
+
+    socket = FullSocket()
+    subscriptions = MulticastSubscriptions(socket)
+    with subscriptions.batch():
+        for universe in (1, 2, 3):
+            subscriptions.add(universe)
+    assert socket.joined == [('239.255.0.1', None), ('239.255.0.3', None)]
+    assert 'universe 2' in caplog.text
+    assert subscriptions.get_joined() == {1, 3}
+
+    # the failed join is tried again with the next change, the joined groups are left alone
+    socket.joined.clear()
+    subscriptions.add(4)
+    assert socket.joined == [('239.255.0.4', None)]
+    assert caplog.text.count('universe 2') == 2
+    assert subscriptions.get_joined() == {1, 3, 4}
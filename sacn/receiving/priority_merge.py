@@ -0,0 +1,104 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+from typing import Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the merge falls back to a plain python loop over the slots
+    np = None
+
+DMX_START_CODE_LEVELS = 0x00
+DMX_START_CODE_PER_ADDRESS_PRIORITY = 0xDD
+DMX_SLOTS = 512
+
+
+class PriorityMerge:
+    """
+    Merges the level data of all sources of one universe slot by slot. Every slot is taken from the sources with the
+    highest priority for it, equal priorities are merged highest takes precedence. The priority of a slot is the
+    per-address priority (start code 0xDD) of the source, or its packet priority if it sends none.
+    A per-address priority of 0 means that the source does not drive the slot.
+    Levels and priorities are kept as 512 byte strings per source (by CID).
+    """
+
+    def __init__(self, timeout: float):
+        """
+        :param timeout: seconds after which the data of a source is dropped, if nothing new arrived
+        """
+        self.timeout: float = timeout
+        self._levels: Dict[tuple, bytes] = {}
+        self._packetPriorities: Dict[tuple, int] = {}
+        self._addressPriorities: Dict[tuple, bytes] = {}
+        self._lastLevels: Dict[tuple, float] = {}
+        self._lastAddressPriorities: Dict[tuple, float] = {}
+        self._lastSequence: Dict[tuple, int] = {}
+
+    def is_legal_sequence(self, cid: tuple, sequence: int) -> bool:
+        """
+        Like ReceiverHandler.is_legal_sequence, but per source: the sources of a universe count independently.
+        Level and per-address priority packets share the sequence of a source.
+        """
+        last = self._lastSequence.get(cid)
+        if last is not None and -20 < sequence - last <= 0:
+            return False
+        self._lastSequence[cid] = sequence
+        return True
+
+    def set_levels(self, cid: tuple, levels: bytes, priority: int, current_time: float) -> None:
+        self._levels[cid] = levels
+        self._packetPriorities[cid] = priority
+        self._lastLevels[cid] = current_time
+
+    def set_address_priorities(self, cid: tuple, priorities: bytes, current_time: float) -> None:
+        self._addressPriorities[cid] = priorities
+        self._lastAddressPriorities[cid] = current_time
+
+    def remove_source(self, cid: tuple) -> None:
+        for store in (self._levels, self._packetPriorities, self._addressPriorities,
+                      self._lastLevels, self._lastAddressPriorities, self._lastSequence):
+            store.pop(cid, None)
+
+    def has_sources(self) -> bool:
+        return bool(self._levels)
+
+    def expire(self, current_time: float) -> None:
+        for cid, last_time in list(self._lastLevels.items()):
+            if abs(current_time - last_time) > self.timeout:
+                self.remove_source(cid)
+        # a source that stopped sending per-address priorities falls back to its packet priority
+        for cid, last_time in list(self._lastAddressPriorities.items()):
+            if abs(current_time - last_time) > self.timeout:
+                del self._addressPriorities[cid]
+                del self._lastAddressPriorities[cid]
+
+    def slot_priorities(self, cid: tuple) -> bytes:
+        try:
+            return self._addressPriorities[cid]
+        except KeyError:
+            return bytes((self._packetPriorities[cid],)) * DMX_SLOTS
+
+    def merge(self) -> Optional[bytes]:
+        """
+        :return: the merged 512 slots, or None if no source sent levels
+        """
+        cids = list(self._levels.keys())
+        if not cids:
+            return None
+        if len(cids) == 1 and cids[0] not in self._addressPriorities:
+            return self._levels[cids[0]]
+        levels = [self._levels[cid] for cid in cids]
+        priorities = [self.slot_priorities(cid) for cid in cids]
+        if np is not None:
+            levels = np.frombuffer(b''.join(levels), dtype=np.uint8).reshape(len(cids), DMX_SLOTS)
+            priorities = np.frombuffer(b''.join(priorities), dtype=np.uint8).reshape(len(cids), DMX_SLOTS)
+            best = priorities.max(axis=0)
+            merged = np.where(priorities == best, levels, 0).max(axis=0)
+            merged[best == 0] = 0
+            return merged.astype(np.uint8).tobytes()
+        merged = bytearray(DMX_SLOTS)
+        for slot in range(0, DMX_SLOTS):
+            best = max(priority[slot] for priority in priorities)
+            if best > 0:
+                merged[slot] = max(level[slot] for level, priority in zip(levels, priorities)
+                                   if priority[slot] == best)
+        return bytes(merged)
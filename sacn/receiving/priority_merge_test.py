@@ -0,0 +1,51 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import pytest
+from sacn.receiving import priority_merge
+from sacn.receiving.priority_merge import PriorityMerge
+
+A = tuple(range(0, 16))
+B = tuple(range(1, 17))
+
+
+def frame(*values) -> bytes:
+    return bytes(values) + bytes(512 - len(values))
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(priority_merge, 'np', None)
+    elif priority_merge.np is None:
+        pytest.skip('numpy is not installed')
+    return request.param
+
+
+def test_merge_per_slot(backend):
+    merge = PriorityMerge(timeout=2.5)
+    assert merge.merge() is None
+    merge.set_levels(A, frame(10, 20, 30, 40), 100, 0)
+    merge.set_levels(B, frame(50, 5, 60, 70), 100, 0)
+    # equal packet priorities: highest takes precedence
+    assert merge.merge() == frame(50, 20, 60, 70)
+    # B only drives slots 1 and 2, slot 1 with the higher priority; slot 4 is driven by nobody
+    merge.set_address_priorities(B, frame(0, 150, 100), 0)
+    merge.set_address_priorities(A, frame(100, 100, 100), 0)
+    assert merge.merge() == frame(10, 5, 60, 0)
+
+
+def test_expire_and_sequence():
+    merge = PriorityMerge(timeout=2.5)
+    merge.set_levels(A, frame(10), 100, 0)
+    merge.set_address_priorities(A, frame(0), 0)
+    merge.set_levels(B, frame(20), 50, 2)
+    assert merge.merge() == frame(20)
+    merge.expire(3)  # A timed out, B is left
+    assert merge.merge() == frame(20)
+    merge.remove_source(B)
+    assert not merge.has_sources()
+
+    assert merge.is_legal_sequence(A, 10)
+    assert not merge.is_legal_sequence(A, 10)
+    assert merge.is_legal_sequence(B, 5)  # sources have their own sequence
+    assert merge.is_legal_sequence(A, 11)
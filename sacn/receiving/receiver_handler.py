@@ -1,12 +1,20 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
-from typing import Dict, List
+import heapq
+import itertools
+from typing import Dict, List, Set, Tuple
 
 from sacn.messages.data_packet import DataPacket
+from sacn.messages.universe_discovery import UniverseDiscoveryPacket
+from sacn.receiving.dmx_diff import changed_ranges, make_frame
+from sacn.receiving.priority_merge import PriorityMerge, DMX_START_CODE_PER_ADDRESS_PRIORITY
 from sacn.receiving.receiver_socket_base import ReceiverSocketBase, ReceiverSocketListener
 from sacn.receiving.receiver_socket_udp import ReceiverSocketUDP
+from sacn.receiving.source_directory import DiscoveredSource, SourceDirectory
 
 E131_NETWORK_DATA_LOSS_TIMEOUT_ms = 2500
+# the universe timeouts are checked at most this often (seconds), no matter how often the socket calls back
+TIMEOUT_CHECK_INTERVAL = 0.1
 
 
 class ReceiverHandlerListener:
@@ -20,6 +28,12 @@ class ReceiverHandlerListener:
     def on_dmx_data_change(self, packet: DataPacket) -> None:
         raise NotImplementedError
 
+    def on_dmx_data_diff(self, universe: int, changed: List[Tuple[int, int]], data) -> None:
+        raise NotImplementedError
+
+    def on_source_change(self, source: DiscoveredSource, changed: str) -> None:
+        raise NotImplementedError
+
 
 class ReceiverHandler(ReceiverSocketListener):
     def __init__(self, bind_address: str, bind_port: int, listener: ReceiverHandlerListener, socket: ReceiverSocketBase = None):
@@ -32,6 +46,8 @@ class ReceiverHandler(ReceiverSocketListener):
             self.socket: ReceiverSocketBase = ReceiverSocketUDP(self, bind_address, bind_port)
         else:
             self.socket: ReceiverSocketBase = socket
+            if socket._listener is None:  # sockets made before the handler existed, e.g. ReceiverSocketAsyncio
+                socket._listener = self
         self._listener: ReceiverHandlerListener = listener
         # previousData for storing the last data that was send in a universe to check if the data has changed
         self._previousData: Dict[int, tuple] = {}
@@ -43,14 +59,61 @@ class ReceiverHandler(ReceiverSocketListener):
         self._lastDataTimestamps: Dict[int, float] = {}
         # store the last sequence number of a universe here:
         self._lastSequence: Dict[int, int] = {}
+        # deadline heap for the universe timeouts with entries (deadline, token, universe). Every live universe has
+        # exactly one entry, identified by the token in _deadlineTokens; refreshing a universe does not touch the heap,
+        # its entry is pushed back when it comes due and the universe got data in the meantime (lazy deletion).
+        self._deadlines: List[Tuple[float, int, int]] = []
+        self._deadlineTokens: Dict[int, int] = {}
+        self._tokens = itertools.count()
+        self._lastTimeoutCheck: float = float('-inf')
+        # universes in diff mode and their last frame as buffer (see dmx_diff), to report the changed slot ranges
+        self._diffUniverses: Set[int] = set()
+        self._previousFrames: Dict[int, object] = {}
+        # universes on which a source sent per-address priorities (start code 0xDD): their level data is merged
+        # from all sources slot by slot instead of taking the packets of the source with the highest priority
+        self._merges: Dict[int, PriorityMerge] = {}
+        # the last level data per source of the universes that are not merged yet: (dmxData, priority, time) by CID.
+        # A universe that switches to merging starts with these, so the other sources are not blacked out meanwhile
+        self._sourceLevels: Dict[int, Dict[tuple, tuple]] = {}
+        # the sources and their universes, as announced by universe discovery packets
+        self.sources: SourceDirectory = SourceDirectory()
 
     def on_data(self, data: bytes, current_time: float) -> None:
         try:
             tmp_packet = DataPacket.make_data_packet(data)
-        except TypeError:  # try to make a DataPacket. If it fails just ignore it
+        except TypeError:  # try to make a DataPacket. If it fails try a discovery packet, otherwise ignore it
+            self.on_discovery_data(data, current_time)
             return
 
+        merge = self._merges.get(tmp_packet.universe)
+        if merge is not None and tmp_packet.option_StreamTerminated:
+            # only this source ends, the universe goes on with the others
+            merge.remove_source(tmp_packet.cid)
+            if merge.has_sources():
+                self.fire_merged_callbacks_universe(tmp_packet, merge)
+                return
+            del self._merges[tmp_packet.universe]
+            merge = None
         self.check_for_stream_terminated_and_refresh_timestamp(tmp_packet, current_time)
+        if tmp_packet.dmxStartCode == DMX_START_CODE_PER_ADDRESS_PRIORITY:
+            # per-address priorities are no level data, they switch the universe to merging
+            if tmp_packet.option_StreamTerminated:
+                return
+            if merge is None:
+                merge = self._merges[tmp_packet.universe] = PriorityMerge(E131_NETWORK_DATA_LOSS_TIMEOUT_ms / 1000)
+                for cid, (levels, priority, last_time) in self._sourceLevels.pop(tmp_packet.universe, {}).items():
+                    merge.set_levels(cid, bytes(levels), priority, last_time)
+            if merge.is_legal_sequence(tmp_packet.cid, tmp_packet.sequence):
+                merge.set_address_priorities(tmp_packet.cid, bytes(tmp_packet.dmxData), current_time)
+                self.fire_merged_callbacks_universe(tmp_packet, merge, current_time)
+            return
+        if merge is not None:
+            if merge.is_legal_sequence(tmp_packet.cid, tmp_packet.sequence):
+                merge.set_levels(tmp_packet.cid, bytes(tmp_packet.dmxData), tmp_packet.priority, current_time)
+                self.fire_merged_callbacks_universe(tmp_packet, merge, current_time)
+            return
+        self._sourceLevels.setdefault(tmp_packet.universe, {})[tmp_packet.cid] = \
+            (tmp_packet.dmxData, tmp_packet.priority, current_time)
         self.refresh_priorities(tmp_packet, current_time)
         if not self.is_legal_priority(tmp_packet):
             return
@@ -58,12 +121,52 @@ class ReceiverHandler(ReceiverSocketListener):
             return
         self.fire_callbacks_universe(tmp_packet)
 
+    def fire_merged_callbacks_universe(self, packet: DataPacket, merge: PriorityMerge, current_time: float = None):
+        if current_time is not None:
+            merge.expire(current_time)
+        merged = merge.merge()
+        if merged is None:  # only priorities so far, wait for the levels
+            return
+        # the listeners get the packet that caused the change, carrying the merged levels. The values are valid bytes
+        # already, so they are set without the per slot validation of the dmxData setter
+        packet.dmxStartCode = 0x00
+        packet._dmxData = tuple(merged)
+        self.fire_callbacks_universe(packet)
+
+    def on_discovery_data(self, data: bytes, current_time: float) -> None:
+        try:
+            packet = UniverseDiscoveryPacket.make_universe_discovery_packet(data)
+        except (TypeError, ValueError):
+            return
+        changed = self.sources.update(packet, current_time)
+        if changed is not None:
+            self._listener.on_source_change(self.sources.get_source(packet.cid), changed)
+
     def on_periodic_callback(self, current_time: float) -> None:
-        # check all DataTimestamps for timeouts
-        for key, value in list(self._lastDataTimestamps.items()):
-            #  this is converted to list, because the length of the dict changes
-            if check_timeout(current_time, value):
-                self.fire_timeout_callback_and_delete(key)
+        # runs at a fixed cadence and only looks at the universes whose deadline passed
+        # (a clock that jumped backwards counts as due, like the timeout check itself)
+        if self._lastTimeoutCheck <= current_time < self._lastTimeoutCheck + TIMEOUT_CHECK_INTERVAL:
+            return
+        self._lastTimeoutCheck = current_time
+        for source in self.sources.expire(current_time):
+            self._listener.on_source_change(source, 'timeout')
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= current_time:
+            _, token, universe = heapq.heappop(deadlines)
+            if self._deadlineTokens.get(universe) != token:
+                continue  # the universe was removed (and maybe added again) since this entry was pushed
+            last_time = self._lastDataTimestamps[universe]
+            if check_timeout(current_time, last_time):
+                self.fire_timeout_callback_and_delete(universe)
+            else:
+                # data arrived since the entry was pushed: move the deadline, at least past now
+                self.push_deadline(universe, max(last_time + E131_NETWORK_DATA_LOSS_TIMEOUT_ms / 1000,
+                                                 current_time + 0.001))
+
+    def push_deadline(self, universe: int, deadline: float) -> None:
+        token = next(self._tokens)
+        self._deadlineTokens[universe] = token
+        heapq.heappush(self._deadlines, (deadline, token, universe))
 
     def check_for_stream_terminated_and_refresh_timestamp(self, packet: DataPacket, current_time: float) -> None:
         # refresh the last timestamp on a universe, but check if its the last message of a stream
@@ -75,6 +178,7 @@ class ReceiverHandler(ReceiverSocketListener):
             if packet.universe not in self._lastDataTimestamps.keys():
                 # fire callbacks if this is the first received packet for this universe
                 self._listener.on_availability_change(universe=packet.universe, changed='available')
+                self.push_deadline(packet.universe, current_time + E131_NETWORK_DATA_LOSS_TIMEOUT_ms / 1000)
             self._lastDataTimestamps[packet.universe] = current_time
 
     def fire_timeout_callback_and_delete(self, universe: int):
@@ -84,6 +188,10 @@ class ReceiverHandler(ReceiverSocketListener):
             del self._lastDataTimestamps[universe]
         except KeyError:
             pass  # drop exception, if there was no last timestamp
+        self._merges.pop(universe, None)
+        self._sourceLevels.pop(universe, None)
+        # its heap entry is dropped lazily once it comes due
+        self._deadlineTokens.pop(universe, None)
         # delete sequence entries so that no packet out of order problems occur
         try:
             del self._lastSequence[universe]
@@ -135,13 +243,44 @@ class ReceiverHandler(ReceiverSocketListener):
     def fire_callbacks_universe(self, packet: DataPacket) -> None:
         # call the listeners for the universe but before check if the data has changed
         # check if there are listeners for the universe before proceeding
-        if packet.universe not in self._previousData.keys() or \
-           self._previousData[packet.universe] is None or \
-           self._previousData[packet.universe] != packet.dmxData:
+        if packet.universe in self._diffUniverses:
+            self.fire_diff_callbacks_universe(packet)
+            return
+        changed = packet.universe not in self._previousData.keys() or \
+            self._previousData[packet.universe] is None or \
+            self._previousData[packet.universe] != packet.dmxData
+        if changed:
             # set previous data and inherit callbacks
             self._previousData[packet.universe] = packet.dmxData
             self._listener.on_dmx_data_change(packet)
 
+    def fire_diff_callbacks_universe(self, packet: DataPacket) -> None:
+        # in diff mode the changed slot ranges replace the tuple compare as change test.
+        # A fresh buffer per frame, so the one handed to the listener stays valid after the next packet
+        frame = make_frame(packet.dmxData)
+        previous = self._previousFrames.get(packet.universe)
+        changed = changed_ranges(previous, frame)
+        if not changed:
+            return
+        self._previousFrames[packet.universe] = frame
+        # a universe that just went into diff mode gets its first frame entirely, the universe callbacks only if the
+        # data differs from what they got last
+        if previous is not None or self._previousData.get(packet.universe) != packet.dmxData:
+            self._previousData[packet.universe] = packet.dmxData
+            self._listener.on_dmx_data_change(packet)
+        self._listener.on_dmx_data_diff(packet.universe, changed, frame)
+
+    def enable_diff(self, universe: int) -> None:
+        """
+        Reports the changed slot ranges of the universe via on_dmx_data_diff from now on.
+        The first frame after enabling is reported as changed entirely.
+        """
+        self._diffUniverses.add(universe)
+
+    def disable_diff(self, universe: int) -> None:
+        self._diffUniverses.discard(universe)
+        self._previousFrames.pop(universe, None)
+
     def get_possible_universes(self) -> List[int]:
         return list(self._lastDataTimestamps.keys())
 
@@ -223,3 +223,78 @@ def test_abstract_receiver_handler_listener():
             sourceName='Test',
             universe=1
         ))
+
+
+def test_universe_timeouts_from_deadline_heap():
+    handler, listener, socket = get_handler()
+    changes = []
+    listener.on_availability_change = lambda universe, changed: changes.append((universe, changed))
+    timeout = E131_NETWORK_DATA_LOSS_TIMEOUT_ms / 1000
+    for universe in range(1, 101):
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=universe, dmxData=(1,))
+        socket.call_on_data(bytes(packet.getBytes()), 0)
+    # universe 1 keeps sending, the entry is pushed back instead of timing out
+    packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1, dmxData=(2,), sequence=1)
+    socket.call_on_data(bytes(packet.getBytes()), 2)
+    socket.call_on_periodic_callback(timeout + 0.01)
+    assert len(changes) == 100 + 99
+    assert (1, 'timeout') not in changes
+    assert len(handler._deadlines) == 1 and handler.get_possible_universes() == [1]
+    # calls within the check interval are skipped, whatever the packet rate
+    socket.call_on_periodic_callback(2 + timeout - 0.05)
+    socket.call_on_periodic_callback(2 + timeout + 0.02)
+    assert (1, 'timeout') not in changes
+    socket.call_on_periodic_callback(2 + timeout + 0.06)
+    assert changes[-1] == (1, 'timeout')
+    assert handler._deadlines == [] and handler.get_possible_universes() == []
+
+
+def test_per_address_priority_merge():
+    _, listener, socket = get_handler()
+    cid_a, cid_b = tuple(range(0, 16)), tuple(range(1, 17))
+
+    def send(cid, sequence, dmxData, dmxStartCode=0x00, current_time=0):
+        packet = DataPacket(cid=cid, sourceName='Test', universe=1, dmxData=dmxData, sequence=sequence,
+                            dmxStartCode=dmxStartCode)
+        socket.call_on_data(bytes(packet.getBytes()), current_time)
+
+    send(cid_a, 0, (10, 20, 30))
+    # per-address priorities are not taken for levels
+    send(cid_b, 0, (0, 200, 200), 0xDD)
+    assert listener.on_dmx_data_change_packet.dmxData[0:3] == (10, 20, 30)
+    send(cid_b, 1, (50, 60, 1))
+    # the merge starts with the levels a sent before: a has packet priority 100 for all slots,
+    # b drives slots 2 and 3 with 200
+    assert listener.on_dmx_data_change_packet.dmxData[0:3] == (10, 60, 1)
+    send(cid_a, 1, (10, 20, 30))
+    assert listener.on_dmx_data_change_packet.dmxData[0:3] == (10, 60, 1)
+    assert listener.on_dmx_data_change_packet.dmxStartCode == 0x00
+
+    # b terminates its stream: the universe goes on with a
+    packet = DataPacket(cid=cid_b, sourceName='Test', universe=1, sequence=2, streamTerminated=True)
+    socket.call_on_data(bytes(packet.getBytes()), 0)
+    assert listener.on_availability_change_changed == 'available'
+    assert listener.on_dmx_data_change_packet.dmxData[0:3] == (10, 20, 30)
+
+
+def test_diff_mode_change_test():
+    handler, listener, socket = get_handler()
+    diffs = []
+    listener.on_dmx_data_diff = lambda universe, changed, data: diffs.append(changed)
+
+    def send(sequence, dmxData):
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1, dmxData=dmxData, sequence=sequence)
+        socket.call_on_data(bytes(packet.getBytes()), 0)
+
+    send(0, (1, 2, 3))
+    first = listener.on_dmx_data_change_packet
+    handler.enable_diff(1)
+    # the first frame in diff mode is reported entirely, the universe listeners already have this data
+    send(1, (1, 2, 3))
+    assert diffs == [[(0, 512)]]
+    assert listener.on_dmx_data_change_packet is first
+    send(2, (1, 2, 3))
+    assert len(diffs) == 1
+    send(3, (1, 2, 4))
+    assert diffs[-1] == [(2, 3)]
+    assert listener.on_dmx_data_change_packet.dmxData[0:3] == (1, 2, 4)
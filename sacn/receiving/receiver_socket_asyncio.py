@@ -0,0 +1,139 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import asyncio
+import platform
+import socket
+import time
+from typing import Optional
+
+from sacn.event_loop import get_shared_event_loop, run_on_loop
+from sacn.receiving.receiver_socket_base import ReceiverSocketBase, ReceiverSocketListener
+
+# seconds between periodic callbacks, the same granularity as the socket timeout of ReceiverSocketUDP
+PERIODIC_INTERVAL = 0.1
+
+
+class _ReceiverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner: 'ReceiverSocketAsyncio'):
+        self._owner = owner
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self._owner.on_datagram(data)
+
+    def error_received(self, exc: Exception) -> None:
+        self._owner._logger.warning(f'sACN receive error: {exc}')
+
+
+class ReceiverSocketAsyncio(ReceiverSocketBase):
+    """
+    Implements a receiver socket on an asyncio event loop. Datagrams arrive through a DatagramProtocol and the
+    periodic callback is scheduled with loop.call_at, so no thread is needed per receiver and stop() returns at once.
+    Usage: sACNreceiver(socket=ReceiverSocketAsyncio(None, bind_address, bind_port)), the receiver sets the listener.
+    """
+
+    def __init__(self, listener: Optional[ReceiverSocketListener], bind_address: str, bind_port: int,
+                 loop: asyncio.AbstractEventLoop = None):
+        """
+        :param loop: the event loop to run on. If not given, a loop shared by all asyncio sockets is used,
+        it runs on its own daemon thread.
+        """
+        super().__init__(listener=listener)
+
+        self._bind_address: str = bind_address
+        self._bind_port: int = bind_port
+        self._enabled_flag: bool = False
+        self._started: bool = False
+        self._stopped: bool = False
+        self._loop: asyncio.AbstractEventLoop = loop if loop is not None else get_shared_event_loop()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # initialize the UDP socket
+        self._socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        except socket.error:  # Not all systems support multiple sockets on the same port and interface
+            pass
+        os_name = platform.system()
+        if os_name == "Linux":
+            self._socket.bind(("", self._bind_port))
+        else:
+            self._socket.bind((self._bind_address, self._bind_port))
+        self._socket.setblocking(False)
+        self._logger.info(f'Bind asyncio receiver socket to IP: {self._bind_address} port: {self._bind_port}')
+
+    def start(self) -> None:
+        run_on_loop(self._loop, self._start)
+
+    def _start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        self._enabled_flag = True
+        self._loop.create_task(self._open_transport())
+        self._timer = self._loop.call_at(self._loop.time() + PERIODIC_INTERVAL, self._tick)
+
+    async def _open_transport(self) -> None:
+        transport, _ = await self._loop.create_datagram_endpoint(lambda: _ReceiverProtocol(self), sock=self._socket)
+        if self._enabled_flag:
+            self._transport = transport
+        else:  # stopped while the transport was being created
+            transport.close()
+
+    def on_datagram(self, data: bytes) -> None:
+        if not self._enabled_flag:
+            return
+        try:
+            self._listener.on_data(list(data), time.time())
+        except Exception:
+            self._logger.exception('Error while handling received sACN data')
+
+    def _tick(self) -> None:
+        if not self._enabled_flag:
+            return
+        try:
+            self._listener.on_periodic_callback(time.time())
+        except Exception:
+            self._logger.exception('Error in the periodic callback of the asyncio receiver')
+        self._timer = self._loop.call_at(self._loop.time() + PERIODIC_INTERVAL, self._tick)
+
+    def stop(self) -> None:
+        """
+        Stops receiving and closes the underlying socket. If the socket was not started, nothing happens.
+        Do not reuse the socket after calling stop once.
+        """
+        if self._started and not self._stopped:
+            self._stopped = True
+            run_on_loop(self._loop, self._stop)
+
+    def _stop(self) -> None:
+        self._enabled_flag = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._transport is not None:
+            self._transport.close()  # closes the socket as well
+            self._transport = None
+        else:
+            self._socket.close()
+
+    def join_multicast(self, multicast_addr: str, interface: str = None) -> None:
+        """
+        Join a specific multicast address by string. Only IPv4.
+        :param interface: IP-Address of the interface to join on. Default: the bind address
+        """
+        self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                socket.inet_aton(multicast_addr) +
+                                socket.inet_aton(interface or self._bind_address))
+
+    def leave_multicast(self, multicast_addr: str, interface: str = None) -> None:
+        """
+        Leave a specific multicast address by string. Only IPv4.
+        :param interface: IP-Address of the interface to leave on. Default: the bind address
+        """
+        try:
+            self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP,
+                                    socket.inet_aton(multicast_addr) +
+                                    socket.inet_aton(interface or self._bind_address))
+        except socket.error:  # try to leave the multicast group for the universe
+            pass
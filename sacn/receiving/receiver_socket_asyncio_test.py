@@ -0,0 +1,31 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import time
+
+import sacn
+from sacn.receiving.receiver_socket_asyncio import ReceiverSocketAsyncio
+from sacn.sending.sender_socket_asyncio import SenderSocketAsyncio
+
+
+def test_sender_to_receiver_on_shared_loop():
+    received = []
+    receiver = sacn.sACNreceiver(socket=ReceiverSocketAsyncio(None, '127.0.0.1', 5568))
+    receiver.register_listener('universe', received.append, universe=1)
+    sender = sacn.sACNsender(socket=SenderSocketAsyncio(None, '127.0.0.1', 0, 30))
+    sender.activate_output(1)
+    sender[1].destination = '127.0.0.1'
+    sender[1].dmx_data = (1, 2, 3)
+    receiver.start()
+    sender.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sender.stop()
+        started = time.monotonic()
+        receiver.stop()
+        assert time.monotonic() - started < 0.05  # no receive timeout to wait for
+    assert received and received[0].dmxData[:3] == (1, 2, 3)
+    time.sleep(0.05)  # the transport closes the socket on the next loop iteration
+    assert receiver._handler.socket._socket.fileno() == -1
@@ -30,8 +30,8 @@ class ReceiverSocketBase:
     def stop(self) -> None:
         raise NotImplementedError
 
-    def join_multicast(self, multicast_addr: str) -> None:
+    def join_multicast(self, multicast_addr: str, interface: str = None) -> None:
         raise NotImplementedError
 
-    def leave_multicast(self, multicast_addr: str) -> None:
+    def leave_multicast(self, multicast_addr: str, interface: str = None) -> None:
         raise NotImplementedError
@@ -11,6 +11,9 @@ class ReceiverSocketTest(ReceiverSocketBase):
         self.stop_called: bool = False
         self.join_multicast_called: str = None
         self.leave_multicast_called: str = None
+        # every call as (multicast_addr, interface)
+        self.joined: list = []
+        self.left: list = []
 
     def start(self) -> None:
         self.start_called = True
@@ -18,11 +21,13 @@ class ReceiverSocketTest(ReceiverSocketBase):
     def stop(self) -> None:
         self.stop_called = True
 
-    def join_multicast(self, multicast_addr: str) -> None:
+    def join_multicast(self, multicast_addr: str, interface: str = None) -> None:
         self.join_multicast_called = multicast_addr
+        self.joined.append((multicast_addr, interface))
 
-    def leave_multicast(self, multicast_addr: str) -> None:
+    def leave_multicast(self, multicast_addr: str, interface: str = None) -> None:
         self.leave_multicast_called = multicast_addr
+        self.left.append((multicast_addr, interface))
 
     def call_on_data(self, data: bytes, current_time: float) -> None:
         self._listener.on_data(data, current_time)
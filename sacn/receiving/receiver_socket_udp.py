@@ -76,25 +76,27 @@ class ReceiverSocketUDP(ReceiverSocketBase):
         except AttributeError:
             pass
 
-    def join_multicast(self, multicast_addr: str) -> None:
+    def join_multicast(self, multicast_addr: str, interface: str = None) -> None:
         """
         Join a specific multicast address by string. Only IPv4.
+        :param interface: IP-Address of the interface to join on. Default: the bind address
         """
         # Windows: https://learn.microsoft.com/en-us/windows/win32/winsock/ipproto-ip-socket-options
         # Linux: https://man7.org/linux/man-pages/man7/ip.7.html
         self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
                                 socket.inet_aton(multicast_addr) +
-                                socket.inet_aton(self._bind_address))
+                                socket.inet_aton(interface or self._bind_address))
 
-    def leave_multicast(self, multicast_addr: str) -> None:
+    def leave_multicast(self, multicast_addr: str, interface: str = None) -> None:
         """
         Leave a specific multicast address by string. Only IPv4.
+        :param interface: IP-Address of the interface to leave on. Default: the bind address
         """
         # Windows: https://learn.microsoft.com/en-us/windows/win32/winsock/ipproto-ip-socket-options
         # Linux: https://man7.org/linux/man-pages/man7/ip.7.html
         try:
             self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP,
                                     socket.inet_aton(multicast_addr) +
-                                    socket.inet_aton(self._bind_address))
+                                    socket.inet_aton(interface or self._bind_address))
         except socket.error:  # try to leave the multicast group for the universe
             pass
@@ -0,0 +1,87 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sacn.messages.universe_discovery import UniverseDiscoveryPacket
+
+# sources send their universe list every 10 seconds (E131_UNIVERSE_DISCOVERY_INTERVAL), a source is dropped from the
+# directory when it was not heard of for two and a half intervals, like the data loss timeout does for universes
+E131_UNIVERSE_DISCOVERY_TIMEOUT_s = 25
+
+
+class DiscoveredSource(NamedTuple):
+    cid: tuple
+    sourceName: str
+    universes: Tuple[int, ...]
+    lastSeen: float
+
+
+class SourceDirectory:
+    """
+    Keeps track of the sources on the network and the universes they transmit, based on universe discovery packets.
+    The universe list of a source can span multiple pages, it is only taken over when all pages of a message arrived.
+    """
+
+    def __init__(self, timeout: float = E131_UNIVERSE_DISCOVERY_TIMEOUT_s):
+        self.timeout: float = timeout
+        self._sources: Dict[tuple, DiscoveredSource] = {}
+        # pages of the message that is currently assembled per CID: (lastPage, {page: universes}, time of the last page)
+        self._pages: Dict[tuple, Tuple[int, Dict[int, tuple], float]] = {}
+
+    def update(self, packet: UniverseDiscoveryPacket, current_time: float) -> Optional[str]:
+        """
+        Adds a page of a discovery message.
+        :return: 'available' for a new source, 'update' when the universes of a known source changed
+        and None otherwise, e.g. when the message is not complete yet
+        """
+        cid = packet.cid
+        known = self._sources.get(cid)
+        if known is not None:  # every page shows that the source is still alive
+            known = known._replace(sourceName=packet.sourceName, lastSeen=current_time)
+            self._sources[cid] = known
+
+        last_page, pages, _ = self._pages.get(cid, (packet.lastPage, {}, current_time))
+        if packet.page in pages or last_page != packet.lastPage:
+            # a new message started, drop the pages of an incomplete older one
+            last_page, pages = packet.lastPage, {}
+        pages[packet.page] = packet.universes
+        if len(pages) <= last_page:
+            self._pages[cid] = (last_page, pages, current_time)
+            return None
+        self._pages.pop(cid, None)
+
+        universes = tuple(sorted(set().union(*pages.values())))
+        self._sources[cid] = DiscoveredSource(cid, packet.sourceName, universes, current_time)
+        if known is None:
+            return 'available'
+        if known.universes != universes:
+            return 'update'
+        return None
+
+    def expire(self, current_time: float) -> List[DiscoveredSource]:
+        """
+        Removes the sources that timed out, and the pages of messages that were not completed within the timeout.
+        :return: the removed sources
+        """
+        expired = [source for source in self._sources.values()
+                   if abs(current_time - source.lastSeen) > self.timeout]
+        for source in expired:
+            del self._sources[source.cid]
+            self._pages.pop(source.cid, None)
+        # a CID that never completes a message is not in _sources, its pages go once they are as old as a source would
+        stale = [cid for cid, (_, _, last_time) in self._pages.items() if abs(current_time - last_time) > self.timeout]
+        for cid in stale:
+            del self._pages[cid]
+        return expired
+
+    def get_source(self, cid: tuple) -> Optional[DiscoveredSource]:
+        return self._sources.get(cid)
+
+    def get_sources(self) -> Tuple[DiscoveredSource, ...]:
+        return tuple(self._sources.values())
+
+    def get_universes(self) -> Set[int]:
+        """
+        :return: all universes that are transmitted by at least one known source
+        """
+        return set().union(*(source.universes for source in self._sources.values()))
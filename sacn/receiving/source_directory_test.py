@@ -0,0 +1,52 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+from sacn.messages.universe_discovery import UniverseDiscoveryPacket
+from sacn.receiving.source_directory import SourceDirectory, E131_UNIVERSE_DISCOVERY_TIMEOUT_s
+
+CID = tuple(range(0, 16))
+
+
+def test_multiple_pages():
+    directory = SourceDirectory()
+    packets = UniverseDiscoveryPacket.make_multiple_uni_disc_packets(CID, 'Test', list(range(1, 1001)))
+    assert len(packets) == 2
+    # out of order pages are assembled as well
+    assert directory.update(packets[1], 0) is None
+    assert directory.get_sources() == ()
+    assert directory.update(packets[0], 0) == 'available'
+    assert directory.get_source(CID).universes == tuple(range(1, 1001))
+    assert directory.get_universes() == set(range(1, 1001))
+
+    # an unchanged message only refreshes the source
+    for packet in packets:
+        assert directory.update(packet, 5) is None
+    assert directory.get_source(CID).lastSeen == 5
+
+    # a repeated page starts a new message, so the pages of an incomplete one are not mixed in
+    packets = UniverseDiscoveryPacket.make_multiple_uni_disc_packets(CID, 'Test', list(range(1, 600)))
+    assert directory.update(packets[0], 6) is None
+    assert directory.update(packets[0], 7) is None
+    assert directory.update(packets[1], 7) == 'update'
+    assert directory.get_universes() == set(range(1, 600))
+
+
+def test_expire():
+    directory = SourceDirectory()
+    other = tuple(range(1, 17))
+    directory.update(UniverseDiscoveryPacket(CID, 'Test', (1, 2)), 0)
+    directory.update(UniverseDiscoveryPacket(other, 'Other', (2, 3)), 10)
+    assert directory.expire(E131_UNIVERSE_DISCOVERY_TIMEOUT_s) == []
+    assert [source.cid for source in directory.expire(E131_UNIVERSE_DISCOVERY_TIMEOUT_s + 1)] == [CID]
+    assert directory.get_universes() == {2, 3}
+
+
+def test_expire_incomplete_pages():
+    directory = SourceDirectory()
+    packets = UniverseDiscoveryPacket.make_multiple_uni_disc_packets(CID, 'Test', list(range(1, 1001)))
+    # the second page never arrives
+    assert directory.update(packets[0], 0) is None
+    assert directory.expire(E131_UNIVERSE_DISCOVERY_TIMEOUT_s) == []
+    assert CID in directory._pages
+    assert directory.expire(E131_UNIVERSE_DISCOVERY_TIMEOUT_s + 1) == []
+    assert directory._pages == {}
+    assert directory.get_sources() == ()
@@ -5,13 +5,14 @@ This is a server for sending out sACN and receiving sACN data.
 http://tsp.esta.org/tsp/documents/docs/E1-31-2016.pdf
 """
 
+import copy
 import random
 import time
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
 from sacn.messages.data_packet import DataPacket
 from sacn.sending.output import Output
-from sacn.sending.sender_socket_base import SenderSocketBase, DEFAULT_PORT
+from sacn.sending.sender_socket_base import SenderSocketBase, TickStatistics, DEFAULT_PORT
 from sacn.sending.sender_handler import SenderHandler
 
 
@@ -19,7 +20,7 @@ class sACNsender:
     def __init__(self, bind_address: str = '0.0.0.0', bind_port: int = DEFAULT_PORT,
                  source_name: str = 'default source name', cid: tuple = (),
                  fps: int = 30, universeDiscovery: bool = True,
-                 sync_universe: int = 63999, socket: SenderSocketBase = None):
+                 sync_universe: int = 63999, socket: SenderSocketBase = None, interfaces: Iterable[str] = None):
         """
         Creates a sender object. A sender is used to manage multiple sACN universes and handles their sending.
         DMX data is send out every second, when no data changes. Some changes may be not send out, because the fps
@@ -36,6 +37,9 @@ class sACNsender:
         :param sync_universe: universe to send sync packets on.
         :param socket: Provide a special socket implementation if necessary. Must be derived from SenderSocketBase,
         only use if the default socket implementation of this library is not sufficient.
+        :param interfaces: IP-Addresses of the interfaces new outputs are sent on, e.g. a primary and a backup DMX
+        network. Every interface gets its own socket and each packet goes out on all of them in the same tick.
+        Can be changed per output via Output.interfaces. If not given, outputs are sent on the bound socket.
         """
         if len(cid) != 16:
             cid = tuple(int(random.random() * 255) for _ in range(0, 16))
@@ -43,6 +47,9 @@ class sACNsender:
         self._sender_handler = SenderHandler(cid, source_name, self._outputs, bind_address, bind_port, fps, socket)
         self.universeDiscovery = universeDiscovery
         self._sync_universe: int = sync_universe
+        self._interfaces: List[str] = [] if interfaces is None else list(interfaces)
+        # universes whose outputs are bound to the rows of a frame buffer, see bind_frame
+        self._frame_universes: List[int] = []
 
     @property
     def universeDiscovery(self) -> bool:
@@ -88,9 +95,76 @@ class sACNsender:
         if universe in self._outputs:
             return
         # add new sending:
-        new_output = Output(DataPacket(cid=self._sender_handler._CID, sourceName=self._sender_handler._source_name, universe=universe))
+        new_output = Output(DataPacket(cid=self._sender_handler._CID, sourceName=self._sender_handler._source_name, universe=universe),
+                            interfaces=self._interfaces)
         self._outputs[universe] = new_output
 
+    def activate_outputs(self, universes: Iterable[int]) -> None:
+        """
+        Activates many universes at once, see activate_output. All universes are checked before any is activated.
+        :param universes: the universes to activate. Already active ones are left as they are
+        """
+        universes = list(universes)
+        for universe in universes:
+            check_universe(universe)
+        # the packets only differ in the universe: copy a template instead of building and validating each one
+        template = DataPacket(cid=self._sender_handler._CID, sourceName=self._sender_handler._source_name, universe=1)
+        for universe in universes:
+            if universe in self._outputs:
+                continue
+            packet = copy.copy(template)
+            packet._universe = universe  # already checked above
+            self._outputs[universe] = Output(packet, interfaces=self._interfaces)
+
+    def bind_frame(self, frame, universes: Sequence[int]) -> None:
+        """
+        Maps a frame buffer onto outputs without copying: row i of the frame is the DMX data of universes[i].
+        The outputs are activated if necessary and read their data straight from the frame when they are sent, so
+        writing into the frame and calling update_frame is all it takes to send a new frame.
+        A frame that was bound before is unbound.
+        :param frame: a C-contiguous 2-D buffer of unsigned bytes with 512 columns, e.g. a numpy uint8 array with the
+        shape (len(universes), 512)
+        :param universes: the universe of each row, e.g. range(1, 1201)
+        :raises ValueError: if the frame does not match the universes
+        """
+        view = memoryview(frame)
+        if view.ndim != 2 or view.format != 'B' or view.shape[1] != 512 or not view.c_contiguous:
+            raise ValueError(f'The frame must be a C-contiguous 2-D buffer of bytes with 512 columns! '
+                             f'It has the shape {view.shape} and the format {view.format}')
+        universes = list(universes)
+        if len(universes) != view.shape[0]:
+            raise ValueError(f'The frame has {view.shape[0]} rows for {len(universes)} universes!')
+        self.activate_outputs(universes)
+        self.unbind_frame()
+        slots = view.cast('B')
+        for row, universe in enumerate(universes):
+            self._outputs[universe]._buffer = slots[row * 512:(row + 1) * 512]
+        self._frame_universes = universes
+
+    def unbind_frame(self) -> None:
+        """
+        Detaches the outputs from the frame bound with bind_frame. They keep the DMX data of the frame.
+        """
+        for universe in self._frame_universes:
+            output = self._outputs.get(universe)
+            if output is not None and output._buffer is not None:
+                output._packet._dmxData = tuple(output._buffer)
+                output._buffer = None
+        self._frame_universes = []
+
+    def update_frame(self, flush: bool = True) -> None:
+        """
+        Marks all universes of the bound frame as changed in one call.
+        :param flush: send them right away on the caller's thread, synced like flush(). Otherwise the sending thread
+        sends them in its next tick
+        """
+        outputs = {universe: self._outputs[universe] for universe in self._frame_universes if universe in self._outputs}
+        if flush:
+            self._sender_handler.send_out_all_universes(self._sync_universe, outputs, time.time())
+        else:
+            for output in outputs.values():
+                output._changed = True
+
     def deactivate_output(self, universe: int) -> None:
         """
         Deactivates an existing sending. Every data from the existing sending output will be lost.
@@ -133,6 +207,29 @@ class sACNsender:
         tmp_output._packet.option_StreamTerminated = False
         self._outputs[universe_to] = tmp_output
 
+    def get_packets_sent(self) -> Dict[int, int]:
+        """
+        Returns how many data packets were sent per active universe, including synced and terminating packets.
+        :return: dict: universe -> number of packets
+        """
+        return {universe: output.packets_sent for universe, output in list(self._outputs.items())}
+
+    def get_send_errors(self) -> Dict[int, Dict[str, int]]:
+        """
+        Returns how often unicast packets could not be sent, per active universe and destination.
+        Universes without errors are left out.
+        :return: dict: universe -> (destination -> number of failed packets)
+        """
+        return {universe: dict(output.send_errors) for universe, output in list(self._outputs.items())
+                if output.send_errors}
+
+    @property
+    def tick_statistics(self) -> TickStatistics:
+        """
+        Lateness statistics of the sending loop. Only the built-in UDP socket records ticks.
+        """
+        return self._sender_handler.socket.tick_statistics
+
     def __getitem__(self, item: int) -> Optional[Output]:
         try:
             return self._outputs[item]
@@ -291,3 +291,44 @@ def test_check_universe():
         check_universe(64000)
     check_universe(1)
     check_universe(63999)
+
+
+def test_activate_outputs():
+    sender = sacn.sACNsender(socket=SenderSocketTest())
+    with pytest.raises(ValueError):
+        sender.activate_outputs([1, 64000])
+    assert sender.get_active_outputs() == ()
+    sender.activate_outputs(range(1, 1201))
+    assert sender.get_active_outputs() == tuple(range(1, 1201))
+    assert sender[1200]._packet.__dict__ == DataPacket(
+        sender._sender_handler._CID, sender._sender_handler._source_name, 1200).__dict__
+
+
+def test_bind_frame():
+    numpy = pytest.importorskip('numpy')
+    socket = SenderSocketTest()
+    sender = sacn.sACNsender(socket=socket)
+    frame = numpy.zeros((3, 512), dtype=numpy.uint8)
+    with pytest.raises(ValueError):
+        sender.bind_frame(frame, [1, 2])
+    with pytest.raises(ValueError):
+        sender.bind_frame(frame[:, :256], [1, 2, 3])
+    sender.bind_frame(frame, [5, 6, 7])
+    assert sender.get_active_outputs() == (5, 6, 7)
+
+    # the outputs read the frame, writing to an output writes to the frame
+    frame[1, 0:3] = (1, 2, 3)
+    assert sender[6].dmx_data[0:3] == (1, 2, 3)
+    sender[7].dmx_data = (4, 5)
+    assert tuple(frame[2, 0:3]) == (4, 5, 0)
+
+    frame[0, 511] = 255
+    sender.update_frame()
+    assert socket.send_unicast_called[0].universe == 7
+    assert socket.send_multicast_called[0].syncAddr == 63999  # sync packet
+    sender.update_frame(flush=False)
+    assert all(sender[universe]._changed for universe in (5, 6, 7))
+
+    sender.unbind_frame()
+    frame[1, 0] = 9
+    assert sender[6].dmx_data[0:3] == (1, 2, 3)
@@ -1,5 +1,7 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
+from typing import Dict, List, Optional
+
 from sacn.messages.data_packet import DataPacket
 
 
@@ -9,23 +11,71 @@ class Output:
     """
 
     def __init__(self, packet: DataPacket, last_time_send: int = 0, destination: str = '127.0.0.1',
-                 multicast: bool = False, ttl: int = 8):
+                 multicast: bool = False, ttl: int = 8, interfaces: List[str] = None, destinations: List[str] = None):
         self._packet: DataPacket = packet
         self._last_time_send: int = last_time_send
-        self.destination: str = destination
+        # unicast receivers, the packet is serialized once and sent to all of them
+        self.destinations: List[str] = [destination] if destinations is None else list(destinations)
         self.multicast: bool = multicast
         self.ttl: int = ttl
+        # IP-Addresses of the interfaces to send on, e.g. a primary and a backup network. Empty: the bound socket
+        self.interfaces: List[str] = [] if interfaces is None else list(interfaces)
         self._changed: bool = False
+        self.packets_sent: int = 0
+        # failed unicast sends per destination, a failing destination does not stop the others
+        self.send_errors: Dict[str, int] = {}
+        # per-address priority packet (start code 0xDD), sent next to the level data if set
+        self._priority_packet: Optional[DataPacket] = None
+        self._priority_changed: bool = False
+        self._last_time_priority_send: float = 0
+        # 512 bytes of a frame buffer the DMX data is read from when sending, see sACNsender.bind_frame
+        self._buffer: Optional[memoryview] = None
+
+    @property
+    def destination(self) -> str:
+        """
+        The first unicast destination. Setting it replaces all destinations.
+        """
+        return self.destinations[0] if self.destinations else None
+
+    @destination.setter
+    def destination(self, destination: str):
+        self.destinations = [destination]
 
     @property
     def dmx_data(self) -> tuple:
+        if self._buffer is not None:
+            return tuple(self._buffer)
         return self._packet.dmxData
 
     @dmx_data.setter
     def dmx_data(self, dmx_data: tuple):
         self._packet.dmxData = dmx_data
+        if self._buffer is not None:  # a bound output writes through to its frame buffer
+            self._buffer[:] = bytes(self._packet.dmxData)
         self._changed = True
 
+    @property
+    def per_address_priority(self) -> Optional[tuple]:
+        """
+        The priority per slot, sent as start code 0xDD packets at a lower rate than the levels.
+        0 means that this source does not drive the slot, 1-200 are priorities. None disables them (default).
+        """
+        return None if self._priority_packet is None else self._priority_packet.dmxData
+
+    @per_address_priority.setter
+    def per_address_priority(self, priorities: Optional[tuple]):
+        if priorities is None:
+            self._priority_packet = None
+            return
+        if any(priority > 200 for priority in priorities):
+            raise ValueError('per address priorities must be in range [0-200]!')
+        if self._priority_packet is None:
+            self._priority_packet = DataPacket(cid=self._packet.cid, sourceName=self._packet.sourceName,
+                                               universe=self._packet.universe, dmxStartCode=0xDD)
+        self._priority_packet.dmxData = tuple(priorities)
+        self._priority_changed = True
+
     @property
     def priority(self) -> int:
         return self._packet.priority
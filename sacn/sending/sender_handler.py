@@ -1,14 +1,17 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
+import logging
 from typing import Dict
 from sacn.messages.universe_discovery import UniverseDiscoveryPacket
 from sacn.messages.sync_packet import SyncPacket
-from sacn.messages.data_packet import calculate_multicast_addr
+from sacn.messages.data_packet import DataPacket, calculate_multicast_addr
 from sacn.sending.output import Output
 from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener
 from sacn.sending.sender_socket_udp import SenderSocketUDP
 
 SEND_OUT_INTERVAL = 1
+# unchanged per-address priorities (start code 0xDD) are repeated at this lower rate (seconds)
+PER_ADDRESS_PRIORITY_INTERVAL = 1
 E131_E131_UNIVERSE_DISCOVERY_INTERVAL = 10
 
 
@@ -23,7 +26,10 @@ class SenderHandler(SenderSocketListener):
             self.socket: SenderSocketBase = SenderSocketUDP(self, bind_address, bind_port, fps)
         else:
             self.socket: SenderSocketBase = socket
+            if socket._listener is None:  # sockets made before the handler existed, e.g. SenderSocketAsyncio
+                socket._listener = self
 
+        self._logger: logging.Logger = logging.getLogger('sacn')
         self._CID = cid
         self._source_name = source_name
         self.universe_discovery: bool = True
@@ -31,6 +37,9 @@ class SenderHandler(SenderSocketListener):
         self._outputs: Dict[int, Output] = outputs
         self.manual_flush: bool = False
         self._sync_sequence = 0
+        self.sync_send_errors: int = 0
+        # outputs bound to a frame buffer are sent straight from it, if the socket can send a packet in pieces
+        self._buffers_supported: bool = type(self.socket).send_buffers is not SenderSocketBase.send_buffers
 
     def on_periodic_callback(self, current_time: float) -> None:
         # send out universe discovery packets if necessary
@@ -46,22 +55,74 @@ class SenderHandler(SenderSocketListener):
             # send out when the 1 second interval is over
             if not self.manual_flush and
             (output._changed or abs(current_time - output._last_time_send) >= SEND_OUT_INTERVAL)]
+        # per-address priorities are interleaved with the levels: right away when changed, otherwise once a second
+        [self.send_out_priorities(output, current_time) for output in list(self._outputs.values())
+            if not self.manual_flush and output._priority_packet is not None and
+            (output._priority_changed or
+             abs(current_time - output._last_time_priority_send) >= PER_ADDRESS_PRIORITY_INTERVAL)]
 
     def send_out(self, output: Output, current_time: float):
-        # 1st: Destination (check if multicast)
-        if output.multicast:
-            udp_ip = output._packet.calculate_multicast_addr()
-            self.socket.send_multicast(output._packet, udp_ip, output.ttl)
-        else:
-            udp_ip = output.destination
-            self.socket.send_unicast(output._packet, udp_ip)
-
+        self.send_packet(output, output._packet)
         output._last_time_send = current_time
+        output.packets_sent += 1
         # increase the sequence counter
         output._packet.sequence_increase()
         # the changed flag is not necessary any more
         output._changed = False
 
+    def send_out_priorities(self, output: Output, current_time: float):
+        packet = output._priority_packet
+        # follow the level packet (e.g. after move_universe) and share its sequence numbers, like E1.31 asks for
+        packet.universe = output._packet.universe
+        packet.priority = output._packet.priority
+        packet.option_PreviewData = output._packet.option_PreviewData
+        packet.sequence = output._packet.sequence
+        self.send_packet(output, packet)
+        output._last_time_priority_send = current_time
+        output.packets_sent += 1
+        output._packet.sequence_increase()
+        output._priority_changed = False
+
+    def send_packet(self, output: Output, packet: DataPacket):
+        if output._buffer is not None and packet is output._packet:
+            if self._buffers_supported:
+                self.send_buffered(output, packet)
+                return
+            # the socket needs a complete packet: take the current frame over
+            packet._dmxData = tuple(output._buffer)
+        # 1st: Destination (check if multicast)
+        # outputs routed to interfaces go out on all of them in this call, serialized once
+        if output.multicast:
+            udp_ip = packet.calculate_multicast_addr()
+            try:
+                if output.interfaces:
+                    self.socket.send_multicast(packet, udp_ip, output.ttl, output.interfaces)
+                else:
+                    self.socket.send_multicast(packet, udp_ip, output.ttl)
+            except OSError as e:
+                # the socket tried every interface before raising: a failed backup interface does not stop the
+                # primary one, and must not stop the sending loop either
+                self.count_send_errors(output, {udp_ip: e})
+        else:
+            # unicast fan-out: an unreachable destination is counted, it does not stop the others or the sending loop
+            self.count_send_errors(output, self.socket.send_unicast_many(packet, output.destinations, output.interfaces))
+
+    def send_buffered(self, output: Output, packet: DataPacket):
+        # only the header is serialized, the DMX data goes out straight from the frame buffer
+        if output.multicast:
+            destinations, ttl = [packet.calculate_multicast_addr()], output.ttl
+        else:
+            destinations, ttl = output.destinations, None
+        errors = self.socket.send_buffers((packet.getHeaderBytes(), output._buffer), destinations, ttl, output.interfaces)
+        self.count_send_errors(output, errors)
+
+    def count_send_errors(self, output: Output, errors: Dict[str, OSError]):
+        for destination, error in errors.items():
+            count = output.send_errors.get(destination, 0)
+            if count == 0:  # log only the first failure of a destination, the counter tells the rest
+                self._logger.warning(f'Could not send universe {output._packet.universe} to {destination}: {error}')
+            output.send_errors[destination] = count + 1
+
     def send_universe_discovery_packets(self):
         packets = UniverseDiscoveryPacket.make_multiple_uni_disc_packets(
             cid=self._CID, sourceName=self._source_name, universes=list(self._outputs.keys()))
@@ -76,17 +137,33 @@ class SenderHandler(SenderSocketListener):
         """
         # go through the list of outputs and send everything out
         # Note: dict may changes size during iteration (multithreading)
-        for output in list(universes.values()):
+        outputs = list(universes.values())
+        for output in outputs:
             output._packet.syncAddr = sync_universe  # temporarily set the sync universe
             self.send_out(output, current_time)
             output._packet.syncAddr = 0
+            # per-address priorities are not synced, they are interleaved at their own rate like in the sending loop
+            if output._priority_packet is not None and \
+                    (output._priority_changed or
+                     abs(current_time - output._last_time_priority_send) >= PER_ADDRESS_PRIORITY_INTERVAL):
+                self.send_out_priorities(output, current_time)
 
         sync_packet = SyncPacket(cid=self._CID, syncAddr=sync_universe, sequence=self._sync_sequence)
         # Increment sequence number for next time.
         self._sync_sequence += 1
         if self._sync_sequence > 255:
             self._sync_sequence = 0
-        self.socket.send_multicast(sync_packet, calculate_multicast_addr(sync_universe), 255)
+        # the sync packet goes out wherever the universes went
+        interfaces = sorted({interface for output in outputs for interface in output.interfaces})
+        try:
+            if not interfaces or any(not output.interfaces for output in outputs):
+                self.socket.send_multicast(sync_packet, calculate_multicast_addr(sync_universe), 255)
+            if interfaces:
+                self.socket.send_multicast(sync_packet, calculate_multicast_addr(sync_universe), 255, interfaces)
+        except OSError as e:
+            if self.sync_send_errors == 0:  # like count_send_errors: only the first failure is logged
+                self._logger.warning(f'Could not send the sync packet of universe {sync_universe}: {e}')
+            self.sync_send_errors += 1
 
     def start(self):
         self.socket.start()
@@ -1,5 +1,6 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
+import pytest
 from typing import Dict
 from sacn.messages.data_packet import DataPacket, calculate_multicast_addr
 from sacn.messages.sync_packet import SyncPacket
@@ -185,3 +186,113 @@ def test_send_out_all_universes_sequence_increment():
     for i in range(0, 300):
         handler.send_out_all_universes(sync_universe, outputs, current_time)
         assert socket.send_multicast_called[0].__dict__ == SyncPacket(cid, sync_universe, (i % 256)).__dict__
+
+
+def test_send_out_on_interfaces():
+    handler, socket, cid, source_name, outputs = get_handler()
+    outputs[1].multicast = True
+    outputs[1].interfaces = ['10.0.0.1', '10.0.1.1']
+    handler.send_out(outputs[1], 100.0)
+    assert socket.send_multicast_called[1] == calculate_multicast_addr(1)
+    assert socket.send_interfaces_called == ['10.0.0.1', '10.0.1.1']
+
+    # the sync packet is sent on the interfaces of the universes
+    handler.send_out_all_universes(63999, outputs, 100.0)
+    assert socket.send_multicast_called[0].__dict__ == SyncPacket(cid, 63999, 0).__dict__
+    assert socket.send_interfaces_called == ['10.0.0.1', '10.0.1.1']
+
+
+def test_unicast_fan_out_counts_errors():
+    class UnreachableSocket(SenderSocketTest):
+        def __init__(self):
+            super().__init__()
+            self.destinations = []
+
+        def send_unicast(self, data, destination, interfaces=None) -> None:
+            if destination == '10.0.0.2':
+                raise OSError('Network is unreachable')
+            self.destinations.append(destination)
+
+    handler, _, cid, source_name, outputs = get_handler()
+    handler.socket = socket = UnreachableSocket()
+    outputs[1].destinations = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+    for _ in range(0, 2):
+        handler.send_out(outputs[1], 100.0)
+    assert socket.destinations == ['10.0.0.1', '10.0.0.3'] * 2
+    assert outputs[1].send_errors == {'10.0.0.2': 2}
+    assert outputs[1].packets_sent == 2
+
+
+def test_multicast_interface_error_keeps_sending():
+    class BackupDownSocket(SenderSocketTest):
+        def __init__(self):
+            super().__init__()
+            self.sent = []
+
+        def send_multicast(self, data, destination, ttl, interfaces=None) -> None:
+            # like SenderSocketUDP: every interface is tried, then the first error is raised
+            self.sent.extend((getattr(data, 'universe', None), interface) for interface in interfaces
+                             if interface != '10.0.1.1')
+            if '10.0.1.1' in interfaces:
+                raise OSError('Network is unreachable')
+
+    handler, _, cid, source_name, outputs = get_handler()
+    handler.manual_flush = False
+    handler.socket = socket = BackupDownSocket()
+    socket._listener = handler
+    outputs[2] = Output(packet=DataPacket(cid=cid, sourceName=source_name, universe=2))
+    for output in outputs.values():
+        output.multicast = True
+        output.interfaces = ['10.0.0.1', '10.0.1.1']
+    socket.call_on_periodic_callback(100.0)
+    socket.call_on_periodic_callback(101.0)
+    assert socket.sent == [(1, '10.0.0.1'), (2, '10.0.0.1')] * 2
+    assert outputs[1].send_errors == {calculate_multicast_addr(1): 2}
+    assert outputs[2].packets_sent == 2
+
+    # a failing sync packet does not stop the flush either
+    handler.send_out_all_universes(63999, outputs, 102.0)
+    assert handler.sync_send_errors == 1
+    assert outputs[1].packets_sent == 3
+
+
+def test_per_address_priority():
+    handler, socket, cid, source_name, outputs = get_handler()
+    handler.manual_flush = False
+    outputs[1].multicast = True
+    outputs[1].per_address_priority = (0, 200, 100)
+    assert outputs[1].per_address_priority[0:4] == (0, 200, 100, 0)
+
+    sent = []
+    socket.send_multicast = lambda data, destination, ttl, interfaces=None: sent.append(
+        (data.dmxStartCode, data.sequence, data.dmxData[0:3]))
+    socket.call_on_periodic_callback(100.0)
+    # the changed priorities go out with the levels, with the next sequence number
+    assert sent == [(0x00, 0, (0, 0, 0)), (0xDD, 1, (0, 200, 100))]
+    outputs[1].dmx_data = (1, 2, 3)
+    socket.call_on_periodic_callback(100.5)
+    assert sent[2:] == [(0x00, 2, (1, 2, 3))]
+    socket.call_on_periodic_callback(101.0)
+    # unchanged priorities are repeated once a second, independent of the levels
+    assert sent[3:] == [(0xDD, 3, (0, 200, 100))]
+
+    with pytest.raises(ValueError):
+        outputs[1].per_address_priority = (201,)
+    outputs[1].per_address_priority = None
+    socket.call_on_periodic_callback(103.0)
+    assert sent[4:] == [(0x00, 4, (1, 2, 3))]
+
+
+def test_per_address_priority_manual_flush():
+    handler, socket, cid, source_name, outputs = get_handler()
+    outputs[1].multicast = True
+    outputs[1].per_address_priority = (0, 200)
+    sent = []
+    socket.send_multicast = lambda data, destination, ttl, interfaces=None: sent.append(
+        getattr(data, 'dmxStartCode', 'sync'))
+    handler.send_out_all_universes(63999, outputs, 100.0)
+    assert sent == [0x00, 0xDD, 'sync']
+    handler.send_out_all_universes(63999, outputs, 100.5)
+    assert sent[3:] == [0x00, 'sync']
+    handler.send_out_all_universes(63999, outputs, 101.0)
+    assert sent[5:] == [0x00, 0xDD, 'sync']
@@ -0,0 +1,205 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import asyncio
+import socket
+import time
+from typing import Dict, Optional, Sequence
+
+from sacn.event_loop import get_shared_event_loop, is_loop_thread, run_on_loop
+from sacn.messages.root_layer import RootLayer
+from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener, DEFAULT_PORT, make_interface_socket
+
+
+class SenderSocketAsyncio(SenderSocketBase):
+    """
+    Implements a sender socket on an asyncio event loop. The periodic callback is scheduled with loop.call_at and
+    packets are sent through a datagram transport, so no thread is needed per sender and stop() returns at once.
+    Usage: sACNsender(socket=SenderSocketAsyncio(None, bind_address, bind_port, fps)), the sender sets the listener.
+    """
+
+    def __init__(self, listener: Optional[SenderSocketListener], bind_address: str, bind_port: int, fps: int,
+                 loop: asyncio.AbstractEventLoop = None):
+        """
+        :param loop: the event loop to run on. If not given, a loop shared by all asyncio sockets is used,
+        it runs on its own daemon thread.
+        """
+        super().__init__(listener=listener)
+
+        self._bind_address: str = bind_address
+        self._bind_port: int = bind_port
+        self._enabled_flag: bool = False
+        self._started: bool = False
+        self._stopped: bool = False
+        self.fps: int = fps
+        self._loop: asyncio.AbstractEventLoop = loop if loop is not None else get_shared_event_loop()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._scheduled: float = 0.0
+
+        # the socket is bound right away, so bind errors show up in the constructor like with SenderSocketUDP
+        self._socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        except socket.error:  # Not all systems support multiple sockets on the same port and interface
+            pass
+
+        try:
+            self._socket.bind((self._bind_address, self._bind_port))
+            self._logger.info(f'Bind asyncio sender to IP:{self._bind_address} Port:{self._bind_port}')
+        except socket.error:
+            self._logger.exception(f'Could not bind to IP:{self._bind_address} Port:{self._bind_port}')
+            self._socket.close()
+            raise
+        self._socket.setblocking(False)
+        # per interface sockets, sent on directly (non-blocking) instead of through a transport
+        self._interface_sockets: Dict[str, socket.socket] = {}
+        # the multicast TTL set on each of the sockets (None: the bound one), so it is only set again when it changes
+        self._ttls: Dict[Optional[str], int] = {}
+
+    def start(self) -> None:
+        run_on_loop(self._loop, self._start)
+
+    def _start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        self._enabled_flag = True
+        self._loop.create_task(self._open_transport())
+        self._scheduled = self._loop.time()
+        self._timer = self._loop.call_at(self._scheduled, self._tick)
+
+    async def _open_transport(self) -> None:
+        transport, _ = await self._loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=self._socket)
+        if self._enabled_flag:
+            self._transport = transport
+        else:  # stopped while the transport was being created
+            transport.close()
+
+    def _tick(self) -> None:
+        if not self._enabled_flag:
+            return
+        now = self._loop.time()
+        self.tick_statistics.record(now - self._scheduled)
+        try:
+            self._listener.on_periodic_callback(time.time())
+        except Exception:
+            self._logger.exception('Error in the periodic callback of the asyncio sender')
+        # keep the fixed rate, but when the loop fell behind start over from now instead of sending a burst
+        self._scheduled = max(self._scheduled + 1 / self.fps, self._loop.time())
+        self._timer = self._loop.call_at(self._scheduled, self._tick)
+
+    def stop(self) -> None:
+        """
+        Stops the periodic callback and closes the underlying socket. If the socket was not started, nothing happens.
+        Do not reuse the socket after calling stop once.
+        """
+        if self._started and not self._stopped:
+            self._stopped = True
+            run_on_loop(self._loop, self._stop)
+
+    def _stop(self) -> None:
+        self._enabled_flag = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._transport is not None:
+            self._transport.close()  # closes the socket as well
+            self._transport = None
+        else:
+            self._socket.close()
+        for interface_socket in self._interface_sockets.values():
+            interface_socket.close()
+
+    def send_unicast(self, data: RootLayer, destination: str, interfaces: Sequence[str] = None) -> None:
+        self.send_packet(data.getBytes(), destination, interfaces=interfaces)
+
+    def send_unicast_many(self, data: RootLayer, destinations: Sequence[str],
+                          interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        """
+        Serializes once and sends to all destinations in one go on the loop thread. When handed over from another
+        thread, the errors can not be returned and are only logged.
+        """
+        data_raw = bytes(data.getBytes())
+        destinations = list(destinations)
+        if self._transport is None or is_loop_thread(self._loop):
+            return self._send_many(data_raw, destinations, interfaces)
+        self._loop.call_soon_threadsafe(self._send_many, data_raw, destinations, interfaces)
+        return {}
+
+    def send_buffers(self, buffers: Sequence, destinations: Sequence[str], ttl: int = None,
+                     interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        # datagram transports have no gather send, the buffers are joined once for all destinations
+        data_raw = b''.join(buffers)
+        destinations = list(destinations)
+        if self._transport is None or is_loop_thread(self._loop):
+            return self._send_many(data_raw, destinations, interfaces, ttl)
+        self._loop.call_soon_threadsafe(self._send_many, data_raw, destinations, interfaces, ttl)
+        return {}
+
+    def _send_many(self, data: bytes, destinations: Sequence[str], interfaces: Optional[Sequence[str]],
+                   ttl: Optional[int] = None) -> Dict[str, OSError]:
+        errors = {}
+        for destination in destinations:
+            try:
+                self._send(data, destination, ttl, False, interfaces)
+            except OSError as e:
+                errors[destination] = e
+        return errors
+
+    def send_multicast(self, data: RootLayer, destination: str, ttl: int, interfaces: Sequence[str] = None) -> None:
+        self.send_packet(data.getBytes(), destination, ttl=ttl, interfaces=interfaces)
+
+    def send_broadcast(self, data: RootLayer) -> None:
+        # hint: on windows a bind address must be set, to use broadcast
+        self.send_packet(data.getBytes(), destination='<broadcast>', broadcast=True)
+
+    def send_packet(self, data: bytearray, destination: str, ttl: int = None, broadcast: bool = False,
+                    interfaces: Sequence[str] = None) -> None:
+        """
+        Sends on the loop thread. Calls from other threads (e.g. sACNsender.flush) are handed over to the loop,
+        together with the socket options they need, so they do not race with the periodic sending.
+        """
+        data_raw = bytes(data)
+        if self._transport is None or is_loop_thread(self._loop):
+            self._send(data_raw, destination, ttl, broadcast, interfaces)
+        else:
+            self._loop.call_soon_threadsafe(self._send, data_raw, destination, ttl, broadcast, interfaces)
+
+    def _send(self, data: bytes, destination: str, ttl: Optional[int], broadcast: bool,
+              interfaces: Sequence[str] = None) -> None:
+        if interfaces:
+            self._send_on_interfaces(data, destination, ttl, interfaces)
+            return
+        if ttl is not None and self._ttls.get(None) != ttl:
+            # make socket multicast-aware: (set TTL)
+            self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            self._ttls[None] = ttl
+        if broadcast:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        try:
+            if self._transport is not None:
+                self._transport.sendto(data, (destination, DEFAULT_PORT))
+            elif self._socket.fileno() != -1:  # not started yet: the socket is non-blocking, send directly
+                self._socket.sendto(data, (destination, DEFAULT_PORT))
+        except OSError as e:
+            self._logger.exception('Failed to send packet', exc_info=e)
+            raise
+
+    def _send_on_interfaces(self, data: bytes, destination: str, ttl: Optional[int], interfaces: Sequence[str]) -> None:
+        # like SenderSocketUDP.send_packet: every interface is tried, then the first error is raised
+        error: Optional[OSError] = None
+        for interface in interfaces:
+            try:
+                interface_socket = self._interface_sockets.get(interface)
+                if interface_socket is None:
+                    interface_socket = make_interface_socket(interface)
+                    interface_socket.setblocking(False)
+                    self._interface_sockets[interface] = interface_socket
+                if ttl is not None and self._ttls.get(interface) != ttl:
+                    interface_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+                    self._ttls[interface] = ttl
+                interface_socket.sendto(data, (destination, DEFAULT_PORT))
+            except OSError as e:  # counted and logged by the sender handler
+                error = error or e
+        if error is not None:
+            raise error
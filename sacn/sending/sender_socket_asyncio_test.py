@@ -0,0 +1,65 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import asyncio
+import socket
+import time
+
+from sacn.messages.root_layer import RootLayer
+from sacn.sending.sender_socket_asyncio import SenderSocketAsyncio
+from sacn.sending.sender_socket_base import SenderSocketListener
+
+
+class Listener(SenderSocketListener):
+    def __init__(self):
+        self.ticks = []
+
+    def on_periodic_callback(self, time: float) -> None:
+        self.ticks.append(time)
+
+
+def test_periodic_callback_on_given_loop():
+    listener = Listener()
+
+    async def run():
+        sender = SenderSocketAsyncio(listener, '127.0.0.1', 0, fps=100, loop=asyncio.get_running_loop())
+        sender.start()
+        await asyncio.sleep(0.2)
+        sender.stop()
+        ticks = len(listener.ticks)
+        await asyncio.sleep(0.05)
+        assert len(listener.ticks) == ticks  # nothing runs after stop
+        return sender
+
+    sender = asyncio.run(run())
+    assert 10 <= len(listener.ticks) <= 25
+    assert sender.tick_statistics.ticks == len(listener.ticks)
+    assert sender._socket.fileno() == -1
+
+
+def test_stop_is_immediate_and_safe_before_start():
+    sender = SenderSocketAsyncio(Listener(), '127.0.0.1', 0, fps=1)
+    sender.stop()  # sACNsender.start() stops first, this must not close the socket
+    assert sender._socket.fileno() != -1
+    sender.start()
+    started = time.monotonic()
+    sender.stop()
+    assert time.monotonic() - started < 0.05
+
+
+def test_send_from_other_thread(monkeypatch):
+    monkeypatch.setattr('sacn.sending.sender_socket_asyncio.DEFAULT_PORT', 56613)
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 56613))
+    receiver.settimeout(1)
+    sender = SenderSocketAsyncio(Listener(), '127.0.0.1', 0, fps=30)
+    data = RootLayer(1, tuple(range(0, 16)), (0, 0, 0, 0))
+    try:
+        sender.send_unicast(data, '127.0.0.1')  # not started yet
+        sender.start()
+        time.sleep(0.05)
+        sender.send_multicast(data, '127.0.0.1', 4)  # handed over to the loop thread
+        assert receiver.recv(2048) == bytes(data.getBytes())
+        assert receiver.recv(2048) == bytes(data.getBytes())
+    finally:
+        sender.stop()
+        receiver.close()
@@ -1,9 +1,41 @@
 # This file is under MIT license. The license file can be obtained in the root directory of this module.
 
 import logging
+import socket
+from typing import Dict, Sequence
 from sacn.messages.root_layer import RootLayer
 
 DEFAULT_PORT = 5568
+# upper bounds in seconds of the tick lateness histogram buckets; the last one catches everything
+TICK_LATENESS_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, float('inf'))
+
+
+class TickStatistics:
+    """
+    Counts the ticks of a sending loop and how late each tick started compared to its schedule.
+    Only the sending thread writes to it, so no locking is involved.
+    """
+
+    def __init__(self):
+        self.ticks: int = 0
+        self.lateness_sum: float = 0.0
+        self.lateness_max: float = 0.0
+        self.lateness_counts: list = [0] * len(TICK_LATENESS_BUCKETS)
+
+    def record(self, lateness: float) -> None:
+        """
+        :param lateness: seconds between the scheduled and the actual start of a tick, negative values count as 0
+        """
+        if lateness < 0:
+            lateness = 0.0
+        self.ticks += 1
+        self.lateness_sum += lateness
+        if lateness > self.lateness_max:
+            self.lateness_max = lateness
+        for index, bound in enumerate(TICK_LATENESS_BUCKETS):
+            if lateness <= bound:
+                self.lateness_counts[index] += 1
+                break
 
 
 class SenderSocketListener:
@@ -23,6 +55,7 @@ class SenderSocketBase:
     def __init__(self, listener: SenderSocketListener):
         self._logger: logging.Logger = logging.getLogger('sacn')
         self._listener: SenderSocketListener = listener
+        self.tick_statistics: TickStatistics = TickStatistics()
 
     def start(self) -> None:
         raise NotImplementedError
@@ -30,11 +63,59 @@ class SenderSocketBase:
     def stop(self) -> None:
         raise NotImplementedError
 
-    def send_unicast(self, data: RootLayer, destination: str) -> None:
+    def send_unicast(self, data: RootLayer, destination: str, interfaces: Sequence[str] = None) -> None:
+        """
+        :param interfaces: IP-Addresses of the interfaces to send on, the packet is serialized once for all of them.
+        If not given, the packet is sent on the bound socket.
+        """
         raise NotImplementedError
 
-    def send_multicast(self, data: RootLayer, destination: str, ttl: int) -> None:
+    def send_unicast_many(self, data: RootLayer, destinations: Sequence[str],
+                          interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        """
+        Sends the packet to every destination. Errors do not stop the sending, they are returned instead.
+        Implementations should serialize the packet only once, this default one works with any send_unicast.
+        :return: the error per destination that could not be sent to
+        """
+        errors = {}
+        for destination in destinations:
+            try:
+                if interfaces:
+                    self.send_unicast(data, destination, interfaces)
+                else:
+                    self.send_unicast(data, destination)
+            except OSError as e:
+                errors[destination] = e
+        return errors
+
+    def send_multicast(self, data: RootLayer, destination: str, ttl: int, interfaces: Sequence[str] = None) -> None:
         raise NotImplementedError
 
     def send_broadcast(self, data: RootLayer) -> None:
         raise NotImplementedError
+
+    def send_buffers(self, buffers: Sequence, destinations: Sequence[str], ttl: int = None,
+                     interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        """
+        Sends one packet made of several buffers (e.g. a packet header and a row of a frame buffer) to every
+        destination, without joining them first where the OS allows it. Optional: outputs bound to a frame buffer
+        are sent as regular packets by sockets that do not implement it.
+        :param ttl: the multicast TTL, None for unicast
+        :return: the error per destination that could not be sent to
+        """
+        raise NotImplementedError
+
+
+def make_interface_socket(interface: str) -> socket.socket:
+    """
+    Creates a UDP socket that sends from the given interface: bound to its IP-Address on a free port and with
+    IP_MULTICAST_IF set, so multicast leaves through this interface no matter what the routing table says.
+    """
+    interface_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        interface_socket.bind((interface, 0))
+        interface_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    except OSError:
+        interface_socket.close()
+        raise
+    return interface_socket
@@ -2,7 +2,7 @@
 
 import pytest
 from sacn.messages.root_layer import RootLayer
-from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener
+from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener, TICK_LATENESS_BUCKETS
 
 
 def test_abstract_sender_socket_listener():
@@ -23,3 +23,16 @@ def test_abstract_sender_socket_base():
         socket.send_multicast(RootLayer(1, tuple(range(0, 16)), (0, 0, 0, 0)), 'test', 12)
     with pytest.raises(NotImplementedError):
         socket.send_broadcast(RootLayer(1, tuple(range(0, 16)), (0, 0, 0, 0)))
+
+
+def test_tick_statistics():
+    statistics = SenderSocketBase(None).tick_statistics
+    statistics.record(-0.001)
+    statistics.record(0.003)
+    statistics.record(1.0)
+    assert statistics.ticks == 3
+    assert statistics.lateness_max == 1.0
+    assert statistics.lateness_sum == 1.003
+    assert statistics.lateness_counts[0] == 1
+    assert statistics.lateness_counts[TICK_LATENESS_BUCKETS.index(0.005)] == 1
+    assert statistics.lateness_counts[-1] == 1
@@ -13,6 +13,7 @@ class SenderSocketTest(SenderSocketBase):
         self.send_unicast_called: (RootLayer, str) = None
         self.send_multicast_called: (RootLayer, str, int) = None
         self.send_broadcast_called: RootLayer = None
+        self.send_interfaces_called: list = None
 
     def start(self) -> None:
         self.start_called = True
@@ -20,11 +21,13 @@ class SenderSocketTest(SenderSocketBase):
     def stop(self) -> None:
         self.stop_called = True
 
-    def send_unicast(self, data: RootLayer, destination: str) -> None:
+    def send_unicast(self, data: RootLayer, destination: str, interfaces=None) -> None:
         self.send_unicast_called = (copy.deepcopy(data), copy.deepcopy(destination))
+        self.send_interfaces_called = interfaces
 
-    def send_multicast(self, data: RootLayer, destination: str, ttl: int) -> None:
+    def send_multicast(self, data: RootLayer, destination: str, ttl: int, interfaces=None) -> None:
         self.send_multicast_called = (copy.deepcopy(data), copy.deepcopy(destination), ttl)
+        self.send_interfaces_called = interfaces
 
     def send_broadcast(self, data: RootLayer) -> None:
         self.send_broadcast_called = copy.deepcopy(data)
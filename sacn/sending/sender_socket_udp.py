@@ -3,11 +3,14 @@
 import socket
 import time
 import threading
+from typing import Dict, Optional, Sequence
 
 from sacn.messages.root_layer import RootLayer
-from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener, DEFAULT_PORT
+from sacn.sending.sender_socket_base import SenderSocketBase, SenderSocketListener, DEFAULT_PORT, make_interface_socket
 
 THREAD_NAME = 'sACN sending/sender thread'
+# Windows sockets have no sendmsg, there the buffers of a packet are joined before sending
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
 
 
 class SenderSocketUDP(SenderSocketBase):
@@ -37,6 +40,10 @@ class SenderSocketUDP(SenderSocketBase):
         except socket.error:
             self._logger.exception(f'Could not bind to IP:{self._bind_address} Port:{self._bind_port}')
             raise
+        # one socket per interface that was sent on, the bound socket is used for None
+        self._sockets: Dict[Optional[str], socket.socket] = {None: self._socket}
+        # the multicast TTL set on each of the sockets, so it is only set again when it changes
+        self._ttls: Dict[Optional[str], int] = {}
 
     def start(self):
         # initialize thread infos
@@ -50,8 +57,12 @@ class SenderSocketUDP(SenderSocketBase):
     def send_loop(self) -> None:
         self._logger.info(f'Started {THREAD_NAME}')
         self._enabled_flag = True
+        scheduled = None
         while self._enabled_flag:
             time_stamp = time.time()
+            if scheduled is not None:
+                self.tick_statistics.record(time_stamp - scheduled)
+            scheduled = time_stamp + (1 / self.fps)
             self._listener.on_periodic_callback(time_stamp)
             time_to_sleep = (1 / self.fps) - (time.time() - time_stamp)
             if time_to_sleep < 0:  # if time_to_sleep is negative (because the loop has too much work to do) set it to 0
@@ -70,28 +81,82 @@ class SenderSocketUDP(SenderSocketBase):
         # wait for the thread to finish
         try:
             self._thread.join()
-            # stop the socket, after the loop terminated
-            self._socket.close()
+            # stop the sockets, after the loop terminated
+            for interface_socket in self._sockets.values():
+                interface_socket.close()
         except AttributeError:
             pass
 
-    def send_unicast(self, data: RootLayer, destination: str) -> None:
-        self.send_packet(data.getBytes(), destination)
-
-    def send_multicast(self, data: RootLayer, destination: str, ttl: int) -> None:
-        # make socket multicast-aware: (set TTL)
-        self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
-        self.send_packet(data.getBytes(), destination)
+    def send_unicast(self, data: RootLayer, destination: str, interfaces: Sequence[str] = None) -> None:
+        self.send_packet(data.getBytes(), destination, interfaces=interfaces)
+
+    def send_unicast_many(self, data: RootLayer, destinations: Sequence[str],
+                          interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        data_raw = bytes(data.getBytes())
+        errors = {}
+        for destination in destinations:
+            error = self._send_raw(data_raw, destination, None, interfaces)
+            if error is not None:
+                errors[destination] = error
+        return errors
+
+    def send_multicast(self, data: RootLayer, destination: str, ttl: int, interfaces: Sequence[str] = None) -> None:
+        # not logged here: the sender handler counts the error per output and logs it once
+        error = self._send_raw(bytes(data.getBytes()), destination, ttl, interfaces)
+        if error is not None:
+            raise error
+
+    def send_buffers(self, buffers: Sequence, destinations: Sequence[str], ttl: int = None,
+                     interfaces: Sequence[str] = None) -> Dict[str, OSError]:
+        if not HAS_SENDMSG:
+            buffers = b''.join(buffers)
+        errors = {}
+        for destination in destinations:
+            error = self._send_raw(buffers, destination, ttl, interfaces)
+            if error is not None:
+                errors[destination] = error
+        return errors
 
     def send_broadcast(self, data: RootLayer) -> None:
         # hint: on windows a bind address must be set, to use broadcast
         self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.send_packet(data.getBytes(), destination='<broadcast>')
 
-    def send_packet(self, data: bytearray, destination: str) -> None:
-        data_raw = bytearray(data)
+    def send_packet(self, data: bytearray, destination: str, ttl: int = None, interfaces: Sequence[str] = None) -> None:
+        """
+        Sends the data on every given interface (default: the bound socket). A failing interface does not keep the
+        packet from the others, the first error is raised after all of them were tried.
+        """
+        error = self._send_raw(bytes(data), destination, ttl, interfaces)
+        if error is not None:
+            self._logger.error(f'Failed to send packet to {destination}', exc_info=error)
+            raise error
+
+    def _send_raw(self, data, destination: str, ttl: Optional[int],
+                  interfaces: Optional[Sequence[str]]) -> Optional[OSError]:
+        # sends on every interface and returns the first error instead of raising it.
+        # data is bytes, or a sequence of buffers that is sent as one datagram with sendmsg (gather, no copy)
+        error: Optional[OSError] = None
+        for interface in interfaces or (None,):
+            try:
+                interface_socket = self._get_socket(interface)
+                if ttl is not None and self._ttls.get(interface) != ttl:
+                    # make socket multicast-aware: (set TTL)
+                    interface_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+                    self._ttls[interface] = ttl
+                if isinstance(data, (bytes, bytearray)):
+                    interface_socket.sendto(data, (destination, DEFAULT_PORT))
+                else:
+                    interface_socket.sendmsg(data, (), 0, (destination, DEFAULT_PORT))
+            except OSError as e:
+                error = error or e
+        return error
+
+    def _get_socket(self, interface: Optional[str]) -> socket.socket:
         try:
-            self._socket.sendto(data_raw, (destination, DEFAULT_PORT))
-        except OSError as e:
-            self._logger.exception('Failed to send packet', exc_info=e)
-            raise
+            return self._sockets[interface]
+        except KeyError:
+            interface_socket = make_interface_socket(interface)
+            self._logger.info(f'Opened sender socket for interface {interface}')
+            self._sockets[interface] = interface_socket
+            return interface_socket
@@ -0,0 +1,82 @@
+# This file is under MIT license. The license file can be obtained in the root directory of this module.
+
+import socket
+
+import pytest
+
+from sacn.messages.data_packet import DataPacket
+from sacn.sending.sender_socket_base import DEFAULT_PORT
+from sacn.sending.sender_socket_udp import SenderSocketUDP
+
+
+def test_send_on_interface():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    receiver.bind(('127.0.0.1', DEFAULT_PORT))
+    receiver.settimeout(1)
+    sender = SenderSocketUDP(None, '127.0.0.1', 0, 30)
+    try:
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1, dmxData=(1, 2, 3))
+        sender.send_multicast(packet, '127.0.0.1', 4, interfaces=['127.0.0.1'])
+        data, address = receiver.recvfrom(1144)
+        assert bytes(data) == bytes(packet.getBytes())
+        # sent from the socket of the interface, with the TTL remembered for it
+        assert address[1] == sender._sockets['127.0.0.1'].getsockname()[1]
+        assert sender._ttls == {'127.0.0.1': 4}
+    finally:
+        receiver.close()
+        for interface_socket in sender._sockets.values():
+            interface_socket.close()
+
+
+def test_send_unicast_many():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    receiver.bind(('127.0.0.1', DEFAULT_PORT))
+    receiver.settimeout(1)
+    sender = SenderSocketUDP(None, '127.0.0.1', 0, 30)
+    try:
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1)
+        errors = sender.send_unicast_many(packet, ['127.0.0.1', '256.0.0.1', '127.0.0.1'])
+        assert list(errors.keys()) == ['256.0.0.1']
+        assert receiver.recv(1144) == receiver.recv(1144) == bytes(packet.getBytes())
+    finally:
+        receiver.close()
+        sender._socket.close()
+
+
+def test_send_buffers():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    receiver.bind(('127.0.0.1', DEFAULT_PORT))
+    receiver.settimeout(1)
+    sender = SenderSocketUDP(None, '127.0.0.1', 0, 30)
+    try:
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1, dmxData=(1, 2, 3))
+        frame = bytearray(1024)
+        frame[512:515] = (1, 2, 3)
+        buffers = (packet.getHeaderBytes(), memoryview(frame)[512:1024])
+        assert sender.send_buffers(buffers, ['127.0.0.1'], ttl=2) == {}
+        assert receiver.recv(1144) == bytes(packet.getBytes())
+    finally:
+        receiver.close()
+        sender._socket.close()
+
+
+def test_send_multicast_with_failing_interface():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    receiver.bind(('127.0.0.1', DEFAULT_PORT))
+    receiver.settimeout(1)
+    sender = SenderSocketUDP(None, '127.0.0.1', 0, 30)
+    try:
+        packet = DataPacket(cid=tuple(range(0, 16)), sourceName='Test', universe=1)
+        # 192.0.2.1 (TEST-NET-1) is not an address of this host, its socket can not be bound
+        with pytest.raises(OSError):
+            sender.send_multicast(packet, '127.0.0.1', 4, interfaces=['192.0.2.1', '127.0.0.1'])
+        # the working interface got the packet anyway
+        assert receiver.recv(1144) == bytes(packet.getBytes())
+    finally:
+        receiver.close()
+        for interface_socket in sender._sockets.values():
+            interface_socket.close()